@@ -0,0 +1,117 @@
+import click
+from flask.cli import with_appcontext
+
+def persist_crawled_jobs(region, jobs):
+    """Crawler callback: save one region's postings, leaving the session usable if that fails"""
+    from app import db
+    from app.models.job import Job
+    
+    try:
+        Job.upsert_many(jobs, region=region)
+        db.session.commit()
+    except Exception as e:
+        # Roll back so the remaining regions in the crawl can still be saved
+        db.session.rollback()
+        print(f"Error saving {len(jobs)} crawled jobs for {region}: {e}")
+
+# Idempotent upgrades for PostgreSQL databases created from an older database/init.sql.
+# init.sql only runs on a fresh volume, so these bring existing deployments up to date.
+POSTGRES_UPGRADES = [
+    "ALTER TABLE job_applications ADD COLUMN IF NOT EXISTS task_id VARCHAR(36)",
+    """CREATE TABLE IF NOT EXISTS job_analyses (
+        id VARCHAR(64) PRIMARY KEY,
+        analysis TEXT NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id VARCHAR(40) PRIMARY KEY,
+        source VARCHAR(50) NOT NULL,
+        url VARCHAR(1000),
+        title VARCHAR(300) NOT NULL,
+        company VARCHAR(300),
+        location VARCHAR(200),
+        region VARCHAR(100),
+        salary VARCHAR(200),
+        date_posted VARCHAR(100),
+        scraped_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        first_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS snippet TEXT",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS analysis_id VARCHAR(64) REFERENCES job_analyses(id) ON DELETE SET NULL",
+    """CREATE TABLE IF NOT EXISTS application_jobs (
+        application_id UUID NOT NULL REFERENCES job_applications(id) ON DELETE CASCADE,
+        job_id VARCHAR(40) NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (application_id, job_id)
+    )""",
+    "ALTER TABLE application_jobs ADD COLUMN IF NOT EXISTS relevance_score REAL",
+    "ALTER TABLE application_jobs ADD COLUMN IF NOT EXISTS cover_letter TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_source ON jobs(source)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_region ON jobs(region)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_scraped_at ON jobs(scraped_at)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_analysis_id ON jobs(analysis_id)",
+    "CREATE INDEX IF NOT EXISTS idx_application_jobs_job_id ON application_jobs(job_id)"
+]
+
+def upgrade_schema():
+    """Bring an existing database up to the current models without losing data; safe to run repeatedly"""
+    from sqlalchemy import inspect, text
+    from app import db
+    from app.services.job_index import POSTGRES_SETUP
+    
+    with db.engine.begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            for statement in POSTGRES_UPGRADES + POSTGRES_SETUP:
+                connection.execute(text(statement))
+            return
+        
+        # Elsewhere (SQLite in development): create missing tables, then add missing columns
+        db.metadata.create_all(connection)
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db():
+    """Add tables and columns introduced since the database was created."""
+    upgrade_schema()
+    click.echo("Database schema is up to date")
+
+@click.command('crawl-jobs')
+@click.option('--once', is_flag=True, help='Run a single crawl pass and exit.')
+@click.option('--interval', type=int, default=900, show_default=True, help='Seconds between crawl passes.')
+@click.option('--top-n', type=int, default=None, help='Number of job titles to crawl per town.')
+@click.option('--region', 'regions', multiple=True, help='Limit the crawl to these regions.')
+@with_appcontext
+def crawl_jobs(once, interval, top_n, regions):
+    """Pre-warm the job search cache and index for every region and town."""
+    from app.services.job_crawler import JobCrawler
+    
+    crawler = JobCrawler(top_n=top_n, on_results=persist_crawled_jobs)
+    
+    if once:
+        click.echo(f"Crawl complete: {crawler.run_once(regions or None)}")
+    else:
+        crawler.run_forever(interval, regions or None)
+
+@click.command('run-worker')
+@click.option('--concurrency', type=int, default=None, help='Tasks to run at once (default TASK_WORKERS).')
+@with_appcontext
+def run_worker(concurrency):
+    """Process queued background tasks from Redis."""
+    from app import task_queue
+    
+    click.echo(f"Task worker started: {', '.join(sorted(task_queue.handlers))}")
+    task_queue.work(concurrency)
+
+def register_commands(app):
+    app.cli.add_command(upgrade_db)
+    app.cli.add_command(crawl_jobs)
+    app.cli.add_command(run_worker)
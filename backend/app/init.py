@@ -4,10 +4,12 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
+from app.services.task_queue import TaskQueue
 
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
+task_queue = TaskQueue()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -16,6 +18,7 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    task_queue.init_app(app)
     CORS(app)
     
     from app.routes.auth import auth_bp
@@ -28,4 +31,7 @@ def create_app(config_class=Config):
     app.register_blueprint(applications_bp, url_prefix='/api/applications')
     app.register_blueprint(ai_bp, url_prefix='/api/ai')
     
+    from app.commands import register_commands
+    register_commands(app)
+    
     return app
@@ -1,4 +1,5 @@
 from app import db
+from app.models.job import Job, ApplicationJob
 from datetime import datetime
 import uuid
 import json
@@ -16,18 +17,43 @@ class JobApplication(db.Model):
     job_title = db.Column(db.String(200))
     industry = db.Column(db.String(100))
     status = db.Column(db.String(50), default='pending')  # pending, processing, completed, failed
+    task_id = db.Column(db.String(36))  # background processing task
     applications_sent = db.Column(db.Integer, default=0)
     matches_found = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     
-    # Store job matches as JSON
+    # Legacy JSON copy of job matches; new matches live in application_jobs
     job_matches = db.Column(db.Text)
     
+    job_links = db.relationship(
+        'ApplicationJob',
+        backref='application',
+        lazy='selectin',
+        order_by='ApplicationJob.position',
+        cascade='all, delete-orphan'
+    )
+    
     def set_job_matches(self, matches):
-        self.job_matches = json.dumps(matches)
+        jobs = Job.upsert_many(matches, region=self.target_region)
+        existing = {link.job_id: link for link in self.job_links}
+        scores = {}
+        for match in matches:
+            scores.setdefault(Job.make_id(match), match.get('relevance_score'))
+        
+        links = []
+        for position, job in enumerate(jobs):
+            link = existing.get(job.id) or ApplicationJob(job=job)
+            link.position = position
+            link.relevance_score = scores.get(job.id)
+            links.append(link)
+        
+        self.job_links = links
+        self.job_matches = None
     
     def get_job_matches(self):
+        if self.job_links:
+            return [link.to_dict() for link in self.job_links]
         return json.loads(self.job_matches) if self.job_matches else []
     
     def to_dict(self):
@@ -39,6 +65,7 @@ class JobApplication(db.Model):
             'job_title': self.job_title,
             'industry': self.industry,
             'status': self.status,
+            'task_id': self.task_id,
             'applications_sent': self.applications_sent,
             'matches_found': self.matches_found,
             'created_at': self.created_at.isoformat(),
@@ -1,5 +1,6 @@
 from app.models.user import User
 from app.models.application import JobApplication
 from app.models.payment import Payment
+from app.models.job import Job, JobAnalysis, ApplicationJob
 
-__all__ = ['User', 'JobApplication', 'Payment']
+__all__ = ['User', 'JobApplication', 'Payment', 'Job', 'JobAnalysis', 'ApplicationJob']
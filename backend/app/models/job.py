@@ -0,0 +1,196 @@
+from app import db
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+import hashlib
+import json
+import re
+import unicodedata
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    # Canonical posting ID: sha1 of source + normalised URL
+    id = db.Column(db.String(40), primary_key=True)
+    source = db.Column(db.String(50), nullable=False, index=True)
+    url = db.Column(db.String(1000))
+    title = db.Column(db.String(300), nullable=False)
+    company = db.Column(db.String(300), index=True)
+    location = db.Column(db.String(200))
+    region = db.Column(db.String(100), index=True)
+    salary = db.Column(db.String(200))
+    date_posted = db.Column(db.String(100))
+    snippet = db.Column(db.Text)
+    scraped_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    first_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    analysis_id = db.Column(db.String(64), db.ForeignKey('job_analyses.id'), index=True)
+    
+    @staticmethod
+    def canonical_url(url: str) -> str:
+        """Lower-case scheme/host and drop the fragment and trailing slash"""
+        parts = urlsplit(url.strip())
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+    
+    @classmethod
+    def make_id(cls, job: dict) -> str:
+        if job.get('url'):
+            identity = cls.canonical_url(job['url'])
+        else:
+            # Postings without a link fall back to their visible fields
+            identity = '|'.join((job.get(field) or '').strip().lower() for field in ('title', 'company', 'location'))
+        return hashlib.sha1(f"{job.get('source', '')}|{identity}".encode()).hexdigest()
+    
+    @staticmethod
+    def _parse_scraped_at(value):
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return datetime.utcnow()
+    
+    def update_from_dict(self, job: dict, region: str = None):
+        self.source = job.get('source', self.source)
+        self.url = job.get('url', self.url)
+        self.title = job.get('title', self.title)
+        self.company = job.get('company', self.company)
+        self.location = job.get('location', self.location)
+        self.salary = job.get('salary', self.salary)
+        self.date_posted = job.get('date_posted', self.date_posted)
+        self.snippet = job.get('snippet', self.snippet)
+        self.scraped_at = self._parse_scraped_at(job.get('scraped_at'))
+        if region:
+            self.region = region.lower()
+    
+    UPSERT_FIELDS = ('source', 'url', 'title', 'company', 'location', 'region', 'salary', 'date_posted',
+                     'snippet', 'scraped_at')
+    
+    def _upsert_values(self) -> dict:
+        values = {field: getattr(self, field) for field in ('id',) + self.UPSERT_FIELDS}
+        values['first_seen_at'] = datetime.utcnow()
+        return values
+    
+    @classmethod
+    def upsert_many(cls, jobs, region: str = None):
+        """Insert or refresh scraped postings, returning Job rows in input order.
+        
+        Postings repeated in ``jobs`` collapse onto one row. On PostgreSQL and
+        SQLite this is a single ``INSERT ... ON CONFLICT (id) DO UPDATE``, so
+        concurrent writers saving the same posting (applications, the crawler,
+        live searches) don't collide; fields missing from a posting keep their
+        stored value. Other databases insert each new row in a savepoint and
+        fall back to updating it if another writer got there first.
+        """
+        by_id = {}
+        for job in jobs:
+            by_id.setdefault(cls.make_id(job), job)
+        
+        if not by_id:
+            return []
+        
+        # Transient rows give every posting the same field handling as update_from_dict
+        staged = {}
+        for job_id, job in by_id.items():
+            row = cls(id=job_id)
+            row.update_from_dict(job, region)
+            staged[job_id] = row
+        
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+            statement = insert(cls.__table__).values([row._upsert_values() for row in staged.values()])
+            statement = statement.on_conflict_do_update(
+                index_elements=[cls.__table__.c.id],
+                set_={
+                    field: func.coalesce(statement.excluded[field], cls.__table__.c[field])
+                    for field in cls.UPSERT_FIELDS
+                }
+            )
+            db.session.execute(statement)
+        else:
+            cls._upsert_with_savepoints(staged, by_id, region)
+        
+        existing = {
+            row.id: row
+            for row in cls.query.filter(cls.id.in_(list(by_id))).populate_existing().all()
+        }
+        return [existing[job_id] for job_id in by_id]
+    
+    @classmethod
+    def _upsert_with_savepoints(cls, staged, by_id, region):
+        existing = {row.id: row for row in cls.query.filter(cls.id.in_(list(by_id))).all()}
+        for job_id, job in by_id.items():
+            row = existing.get(job_id)
+            if row is None:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(staged[job_id])
+                    continue
+                except IntegrityError:
+                    row = cls.query.get(job_id)
+            row.update_from_dict(job, region)
+    
+    def description_text(self) -> str:
+        """Posting text used for its shared analysis"""
+        return '\n'.join(part for part in (self.title, self.company, self.location, self.salary, self.snippet) if part)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'company': self.company,
+            'location': self.location,
+            'url': self.url,
+            'source': self.source,
+            'date_posted': self.date_posted,
+            'salary': self.salary,
+            'snippet': self.snippet,
+            'scraped_at': self.scraped_at.isoformat() if self.scraped_at else None
+        }
+
+class JobAnalysis(db.Model):
+    """Structured AI analysis of a job description, shared by everyone who looks it up"""
+    __tablename__ = 'job_analyses'
+    
+    # sha256 of the normalised description text
+    id = db.Column(db.String(64), primary_key=True)
+    analysis = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Case, punctuation and whitespace folded so re-pasted copies of a posting match"""
+        text = unicodedata.normalize('NFKC', text or '').lower()
+        return ' '.join(re.sub(r'[^\w]+', ' ', text).split())
+    
+    @classmethod
+    def make_id(cls, text: str) -> str:
+        return hashlib.sha256(cls.normalize(text).encode('utf-8')).hexdigest()
+    
+    def get_analysis(self):
+        return json.loads(self.analysis)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'analysis': self.get_analysis(),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class ApplicationJob(db.Model):
+    __tablename__ = 'application_jobs'
+    
+    application_id = db.Column(db.String(36), db.ForeignKey('job_applications.id'), primary_key=True)
+    job_id = db.Column(db.String(40), db.ForeignKey('jobs.id'), primary_key=True, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    relevance_score = db.Column(db.Float)
+    cover_letter = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    job = db.relationship('Job', lazy='joined')
+    
+    def to_dict(self):
+        return dict(self.job.to_dict(), relevance_score=self.relevance_score, cover_letter=self.cover_letter)
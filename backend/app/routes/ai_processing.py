@@ -1,12 +1,68 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services.ai_agent import AIAgentService
+from app import db, task_queue
+from app.models.application import JobApplication
+from app.models.job import Job
+from app.services.ai_agent import ai_service
 from app.services.document_processor import DocumentProcessor
+from app.services.job_analysis import JobAnalysisService
 import base64
+import json
 
 ai_bp = Blueprint('ai_processing', __name__)
-ai_service = AIAgentService()
 doc_processor = DocumentProcessor()
+job_analysis = JobAnalysisService(ai_service)
+task_queue.register(JobAnalysisService.TASK, job_analysis.run_task)
+
+def _stream_format():
+    """'sse' or 'ndjson' when the client asked for a streamed response, else None"""
+    fmt = request.args.get('stream')
+    if fmt in ('sse', 'ndjson'):
+        return fmt
+    if fmt in ('1', 'true') or 'text/event-stream' in request.headers.get('Accept', ''):
+        return 'sse'
+    return None
+
+def _save_result(user_id, application_id, field, text):
+    """Store generated text on the user's application when one was given"""
+    if not application_id or not text:
+        return
+    
+    application = JobApplication.query.filter_by(id=application_id, user_id=user_id).first()
+    if application:
+        setattr(application, field, text)
+        db.session.commit()
+
+def _stream_response(fmt, chunks, result_key, on_complete):
+    """Forward text chunks as they arrive, then a final event with the whole text.
+    
+    SSE sends ``token`` events followed by ``done`` (or ``error``); NDJSON sends
+    one ``{"type": ...}`` object per line with the same payloads.
+    """
+    def encode(event, payload):
+        if fmt == 'ndjson':
+            return json.dumps(dict(payload, type=event)) + '\n'
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    def events():
+        parts = []
+        try:
+            for text in chunks:
+                parts.append(text)
+                yield encode('token', {'text': text})
+        except Exception as e:
+            yield encode('error', {'success': False, 'error': str(e)})
+            return
+        
+        full_text = ''.join(parts).strip()
+        on_complete(full_text)
+        yield encode('done', {'success': True, result_key: full_text})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='application/x-ndjson' if fmt == 'ndjson' else 'text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @ai_bp.route('/enhance-resume', methods=['POST'])
 @jwt_required()
@@ -22,12 +78,30 @@ def enhance_resume():
         if not resume_text:
             return jsonify({'error': 'Resume text is required'}), 400
         
-        result = ai_service.enhance_resume(resume_text, job_title, industry)
+        application_id = data.get('application_id')
+        fmt = _stream_format()
+        if fmt:
+            chunks = ai_service.stream(
+                'enhance_resume',
+                original_resume=resume_text,
+                job_title=job_title,
+                industry=industry,
+                use_cache=data.get('use_cache', True)
+            )
+            return _stream_response(
+                fmt, chunks, 'enhanced_resume',
+                lambda text: _save_result(user_id, application_id, 'enhanced_resume', text)
+            )
+        
+        result = ai_service.enhance_resume(resume_text, job_title, industry,
+                                           use_cache=data.get('use_cache', True))
         
         if result['success']:
+            _save_result(user_id, application_id, 'enhanced_resume', result['enhanced_resume'])
             return jsonify({
                 'success': True,
-                'enhanced_resume': result['enhanced_resume']
+                'enhanced_resume': result['enhanced_resume'],
+                'tokens_saved': result['tokens_saved']
             })
         else:
             return jsonify({
@@ -52,12 +126,30 @@ def generate_cover_letter():
         if not resume_text or not job_description:
             return jsonify({'error': 'Resume text and job description are required'}), 400
         
-        result = ai_service.generate_cover_letter(resume_text, job_description, company)
+        application_id = data.get('application_id')
+        fmt = _stream_format()
+        if fmt:
+            chunks = ai_service.stream(
+                'generate_cover_letter',
+                resume=resume_text,
+                job_description=job_description,
+                company=company,
+                use_cache=data.get('use_cache', True)
+            )
+            return _stream_response(
+                fmt, chunks, 'cover_letter',
+                lambda text: _save_result(user_id, application_id, 'cover_letter', text)
+            )
+        
+        result = ai_service.generate_cover_letter(resume_text, job_description, company,
+                                                  use_cache=data.get('use_cache', True))
         
         if result['success']:
+            _save_result(user_id, application_id, 'cover_letter', result['cover_letter'])
             return jsonify({
                 'success': True,
-                'cover_letter': result['cover_letter']
+                'cover_letter': result['cover_letter'],
+                'tokens_saved': result['tokens_saved']
             })
         else:
             return jsonify({
@@ -84,12 +176,29 @@ def optimize_ats():
         if not isinstance(keywords, list):
             return jsonify({'error': 'Keywords must be a list'}), 400
         
-        result = ai_service.optimize_for_ats(resume_text, keywords)
+        application_id = data.get('application_id')
+        fmt = _stream_format()
+        if fmt:
+            chunks = ai_service.stream(
+                'optimize_for_ats',
+                resume=resume_text,
+                keywords=keywords,
+                use_cache=data.get('use_cache', True)
+            )
+            return _stream_response(
+                fmt, chunks, 'optimized_resume',
+                lambda text: _save_result(user_id, application_id, 'enhanced_resume', text)
+            )
+        
+        result = ai_service.optimize_for_ats(resume_text, keywords,
+                                             use_cache=data.get('use_cache', True))
         
         if result['success']:
+            _save_result(user_id, application_id, 'enhanced_resume', result['optimized_resume'])
             return jsonify({
                 'success': True,
-                'optimized_resume': result['optimized_resume']
+                'optimized_resume': result['optimized_resume'],
+                'tokens_saved': result['tokens_saved']
             })
         else:
             return jsonify({
@@ -129,55 +238,51 @@ def process_document():
 @ai_bp.route('/analyze-job-description', methods=['POST'])
 @jwt_required()
 def analyze_job_description():
+    """Shared analysis of a pasted description or a scraped posting (``job_id``)"""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
         
         job_description = data.get('job_description', '')
-        resume_text = data.get('resume_text', '')
+        job_id = data.get('job_id')
+        refresh = not data.get('use_cache', True)
         
-        if not job_description:
+        if job_id:
+            job = Job.query.get(job_id)
+            if not job:
+                return jsonify({'error': 'Job not found'}), 404
+            result = job_analysis.analyze_job(job, refresh=refresh)
+        elif job_description:
+            result = job_analysis.analyze(job_description, refresh=refresh)
+        else:
             return jsonify({'error': 'Job description is required'}), 400
         
-        # Use AI to analyze job description and provide insights
-        prompt = f"""
-        Analyze this job description and provide:
-        1. Key skills and qualifications required
-        2. Experience level
-        3. Industry keywords
-        4. Salary range estimation (if possible)
-        5. Company culture insights
-        
-        Job Description:
-        {job_description}
-        
-        Provide the analysis in a structured JSON format.
-        """
-        
-        try:
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a career advisor and job market analyst."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.5
-            )
-            
-            analysis = response.choices[0].message.content.strip()
-            
+        if result['success']:
             return jsonify({
                 'success': True,
-                'analysis': analysis
+                'analysis_id': result['analysis_id'],
+                'analysis': result['analysis'],
+                'structured': result['structured'],
+                'cached': result['cached'],
+                'tokens_saved': result['tokens_saved']
             })
-            
-        except Exception as ai_error:
+        else:
             return jsonify({
                 'success': False,
-                'error': f'AI analysis failed: {str(ai_error)}'
+                'error': f"AI analysis failed: {result.get('error')}"
             }), 500
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@ai_bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def cache_stats():
+    return jsonify(dict(
+        ai_service.cache.get_stats(),
+        compaction=ai_service.compactor.get_stats(),
+        usage=ai_service.get_usage(),
+        quota=ai_service.limiter.get_stats(),
+        routing=ai_service.router.get_stats(),
+        single_flight=ai_service.single_flight.get_stats(),
+        job_analysis=job_analysis.get_stats()
+    ))
@@ -1,16 +1,22 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, url_for, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.application import JobApplication
 from app.models.user import User
 from app.models.payment import Payment
-from app import db
-from app.services.ai_agent import AIAgentService
+from app.models.job import Job
+from app import db, task_queue
+from app.services.ai_agent import ai_service
+from app.services.application_pipeline import ApplicationPipeline
 from app.services.job_scraper import JobScraperService
+from app.services.job_index import JobSearchIndex
 import json
+import time
 
 applications_bp = Blueprint('applications', __name__)
-ai_service = AIAgentService()
 job_scraper = JobScraperService()
+job_index = JobSearchIndex()
+pipeline = ApplicationPipeline(ai_service, job_scraper)
+task_queue.register('process_application', pipeline.run)
 
 @applications_bp.route('/create', methods=['POST'])
 @jwt_required()
@@ -58,36 +64,31 @@ def process_application(application_id):
     if not application:
         return jsonify({'error': 'Application not found'}), 404
     
+    # Don't start a second run while one is queued or in flight
+    if application.status == 'processing' and application.task_id:
+        task = task_queue.get_status(application.task_id)
+        if task and task.get('state') in ('queued', 'running'):
+            return jsonify({
+                'success': True,
+                'application_id': application.id,
+                'task_id': application.task_id,
+                'status_url': url_for('applications.process_status', application_id=application.id)
+            }), 202
+    
     try:
-        # Step 1: Enhance resume with AI
-        resume_result = ai_service.enhance_resume(
-            application.original_resume,
-            application.job_title,
-            application.industry
-        )
-        
-        if resume_result['success']:
-            application.enhanced_resume = resume_result['enhanced_resume']
-        
-        # Step 2: Search for jobs
-        search_keywords = application.job_title or ''
-        jobs = job_scraper.search_jobs(
-            keywords=search_keywords,
-            region=application.target_region,
-            town=application.target_town
-        )
-        
-        application.set_job_matches(jobs)
-        application.matches_found = len(jobs)
-        application.status = 'completed'
+        # Commit the status first so a fast worker's result isn't overwritten
+        application.status = 'processing'
+        db.session.commit()
         
+        application.task_id = task_queue.enqueue('process_application', {'application_id': application.id})
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'application': application.to_dict(),
-            'jobs_found': len(jobs)
-        })
+            'application_id': application.id,
+            'task_id': application.task_id,
+            'status_url': url_for('applications.process_status', application_id=application.id)
+        }), 202
         
     except Exception as e:
         application.status = 'failed'
@@ -98,6 +99,146 @@ def process_application(application_id):
             'error': str(e)
         }), 500
 
+def _process_status(application):
+    task = task_queue.get_status(application.task_id) if application.task_id else None
+    if task and task.get('state') == 'failed' and application.status == 'processing':
+        # The worker was lost before the pipeline could record the failure
+        application.status = 'failed'
+        db.session.commit()
+    return {
+        'application_id': application.id,
+        'status': application.status,
+        'task': task
+    }
+
+@applications_bp.route('/process/<application_id>/status', methods=['GET'])
+@jwt_required()
+def process_status(application_id):
+    user_id = get_jwt_identity()
+    
+    application = JobApplication.query.filter_by(
+        id=application_id,
+        user_id=user_id
+    ).first()
+    
+    if not application:
+        return jsonify({'error': 'Application not found'}), 404
+    
+    status = _process_status(application)
+    if application.status == 'completed':
+        status['application'] = application.to_dict()
+    
+    return jsonify(status)
+
+@applications_bp.route('/process/<application_id>/stream', methods=['GET'])
+@jwt_required()
+def process_stream(application_id):
+    """Server-Sent Events feed of task progress until processing ends"""
+    user_id = get_jwt_identity()
+    
+    application = JobApplication.query.filter_by(
+        id=application_id,
+        user_id=user_id
+    ).first()
+    
+    if not application:
+        return jsonify({'error': 'Application not found'}), 404
+    
+    if not application.task_id:
+        return jsonify({'error': 'Application has not been processed'}), 404
+    
+    def events(task_id):
+        for task in task_queue.stream_status(task_id):
+            yield f"data: {json.dumps(task)}\n\n"
+    
+    return Response(
+        events(application.task_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@applications_bp.route('/cover-letters/<application_id>', methods=['POST'])
+@jwt_required()
+def generate_cover_letters(application_id):
+    """Write a cover letter for every job match, streamed as Server-Sent Events.
+    
+    One ``letter`` event is sent per match as soon as it is written (and saved),
+    then a ``done`` event with totals.
+    """
+    user_id = get_jwt_identity()
+    
+    application = JobApplication.query.filter_by(
+        id=application_id,
+        user_id=user_id
+    ).first()
+    
+    if not application:
+        return jsonify({'error': 'Application not found'}), 404
+    
+    if not application.job_links:
+        return jsonify({'error': 'Application has no job matches yet'}), 400
+    
+    data = request.get_json(silent=True) or {}
+    limits = {}
+    for field in ('max_concurrency', 'token_budget'):
+        if data.get(field) is None:
+            continue
+        try:
+            limits[field] = int(data[field])
+        except (TypeError, ValueError):
+            return jsonify({'error': f'{field} must be an integer'}), 400
+        if limits[field] < 1:
+            return jsonify({'error': f'{field} must be positive'}), 400
+    
+    regenerate = bool(data.get('regenerate', False))
+    links = [link for link in application.job_links if regenerate or not link.cover_letter]
+    resume = application.enhanced_resume or application.original_resume
+    
+    def events():
+        written = failed = 0
+        links_by_index = dict(enumerate(links))
+        
+        results = ai_service.generate_cover_letters(
+            resume,
+            [link.job.to_dict() for link in links],
+            max_concurrency=limits.get('max_concurrency'),
+            token_budget=limits.get('token_budget'),
+            use_cache=data.get('use_cache', True)
+        )
+        
+        for result in results:
+            link = links_by_index[result['index']]
+            
+            if result['success']:
+                link.cover_letter = result['cover_letter']
+                db.session.commit()
+                written += 1
+            else:
+                failed += 1
+            
+            event = {
+                'job_id': link.job_id,
+                'success': result['success'],
+                'cover_letter': result.get('cover_letter'),
+                'error': result.get('error'),
+                'skipped': result.get('skipped', False)
+            }
+            yield f"event: letter\ndata: {json.dumps(event)}\n\n"
+        
+        summary = {
+            'application_id': application_id,
+            'written': written,
+            'failed': failed,
+            'already_written': len(application.job_links) - len(links)
+        }
+        yield f"event: done\ndata: {json.dumps(summary)}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @applications_bp.route('/history', methods=['GET'])
 @jwt_required()
 def application_history():
@@ -111,6 +252,45 @@ def application_history():
         'applications': [app.to_dict() for app in applications]
     })
 
+@applications_bp.route('/jobs/search', methods=['GET'])
+@jwt_required()
+def search_jobs():
+    """Search indexed job postings, scraping live only when the index is thin"""
+    query = request.args.get('q', '').strip()
+    region = request.args.get('region')
+    town = request.args.get('town')
+    limit = max(1, min(request.args.get('limit', 20, type=int), 50))
+    
+    if not query:
+        return jsonify({'error': 'Search query is required'}), 400
+    
+    started = time.monotonic()
+    jobs = job_index.search(query, region, town, limit)
+    source = 'index'
+    
+    if len(jobs) < min(limit, job_index.min_hits):
+        live_jobs = job_scraper.search_jobs(keywords=query, region=region or '', town=town, limit=limit)
+        Job.upsert_many(live_jobs, region=region)
+        db.session.commit()
+        
+        # Ranked index hits first, then live postings the index didn't match
+        jobs = job_index.search(query, region, town, limit)
+        seen = {job['id'] for job in jobs}
+        for job in live_jobs:
+            if len(jobs) >= limit:
+                break
+            job_id = Job.make_id(job)
+            if job_id not in seen:
+                seen.add(job_id)
+                jobs.append(dict(job, id=job_id))
+        source = 'live'
+    
+    return jsonify({
+        'jobs': jobs,
+        'source': source,
+        'took_ms': round((time.monotonic() - started) * 1000, 1)
+    })
+
 @applications_bp.route('/regions', methods=['GET'])
 def get_regions():
     """Get all South African regions and towns"""
@@ -1,16 +1,179 @@
-import openai
 import os
-from typing import Dict, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List
 import json
+from app.services.llm_cache import LLMCache
+from app.services.model_router import ModelRouter
+from app.services.llm_providers import LLMProvider, ProviderRateLimitError, TransientProviderError, get_provider
+from app.services.prompt_compactor import PromptCompactor, count_tokens
+from app.services.resilience import QuotaExceededError, QuotaLimiter, SingleFlight, backoff_delay
+from app.utils.redis_client import get_redis_client
 
 class AIAgentService:
-    def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        if self.api_key:
-            openai.api_key = self.api_key
+    def __init__(self, cache: LLMCache = None, compactor: PromptCompactor = None, limiter: QuotaLimiter = None,
+                 provider: LLMProvider = None, router: ModelRouter = None, single_flight: SingleFlight = None):
+        self.provider = provider or get_provider()
+        self.router = router or ModelRouter()
+        self.cache = cache or LLMCache()
+        self.compactor = compactor or PromptCompactor()
+        
+        # Shared OpenAI quota and retry policy
+        self.limiter = limiter or QuotaLimiter(get_redis_client())
+        self.max_attempts = int(os.getenv('OPENAI_MAX_ATTEMPTS', '5'))
+        self.retry_base = float(os.getenv('OPENAI_RETRY_BASE', '1'))
+        self.queue_timeout = float(os.getenv('OPENAI_QUEUE_TIMEOUT', '120'))
+        self.request_timeout = float(os.getenv('OPENAI_REQUEST_TIMEOUT', '60'))
+        
+        # Identical requests already in flight (here or in another worker) are shared
+        self.single_flight = single_flight or SingleFlight(get_redis_client())
+        
+        # Batch generation (cover letters for every job match)
+        self.batch_concurrency = int(os.getenv('AI_BATCH_CONCURRENCY', '4'))
+        self.batch_token_budget = int(os.getenv('AI_BATCH_TOKEN_BUDGET', '60000'))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.batch_concurrency,
+            thread_name_prefix='ai-batch'
+        )
+        
+        self._usage_lock = threading.Lock()
+        self.usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
     
-    def enhance_resume(self, original_resume: str, job_title: str = None, industry: str = None) -> Dict:
-        """Enhance and rewrite resume using AI"""
+    def _record_usage(self, usage: Dict):
+        with self._usage_lock:
+            self.usage['requests'] += 1
+            for field in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+                self.usage[field] += usage.get(field, 0)
+    
+    def get_usage(self) -> Dict:
+        with self._usage_lock:
+            return dict(self.usage, provider=self.provider.name)
+    
+    def _call_provider(self, model: str, messages: List[Dict], max_tokens: int, temperature: float,
+                       stream: bool = False):
+        """One provider call within the shared quota, retrying transient failures.
+        
+        Each attempt first reserves a request and its worst-case tokens (prompt
+        plus ``max_tokens``). A rate limit pauses every worker for its
+        Retry-After; other transient errors back off exponentially with jitter.
+        """
+        tokens = sum(count_tokens(m['content']) for m in messages) + max_tokens
+        call = self.provider.stream if stream else self.provider.complete
+        
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.limiter.acquire(tokens, timeout=self.queue_timeout):
+                raise QuotaExceededError('LLM quota is exhausted, try again shortly')
+            
+            try:
+                started = time.monotonic()
+                response = call(model, messages, max_tokens, temperature, timeout=self.request_timeout)
+                if not stream:
+                    # Streams are paced by the client, so only whole completions feed routing
+                    self.router.record(model, time.monotonic() - started)
+                return response
+            except TransientProviderError as e:
+                if attempt == self.max_attempts:
+                    raise
+                
+                wait = getattr(e, 'retry_after', 0) or backoff_delay(attempt, self.retry_base)
+                print(f"LLM call failed ({e}), retry {attempt} in {wait:.1f}s")
+                if isinstance(e, ProviderRateLimitError):
+                    self.limiter.pause(wait)  # the next acquire waits it out, in every worker
+                else:
+                    time.sleep(wait)
+    
+    @staticmethod
+    def _messages(system: str, prompt: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _complete(self, method: str, system: str, prompt: str, max_tokens: int,
+                  temperature: float, use_cache: bool = True) -> str:
+        """Run one chat completion, answering repeats from the LLM cache.
+        
+        Concurrent callers with the same fingerprint (the cache key) share a
+        single upstream request.
+        """
+        model = self.router.choose(method)
+        key = LLMCache.make_key(method, model, system, prompt, temperature, max_tokens)
+        
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        else:
+            self.cache.count('bypassed')
+        
+        def fetch():
+            response = self._call_provider(model, self._messages(system, prompt), max_tokens, temperature)
+            self._record_usage(response['usage'])
+            self.cache.set(key, response['content'])
+            return response['content']
+        
+        return self.single_flight.do(key, fetch)
+    
+    def _stream_complete(self, method: str, system: str, prompt: str, max_tokens: int,
+                         temperature: float, use_cache: bool = True) -> Iterator[str]:
+        """Like ``_complete`` but yields text as the model produces it.
+        
+        A cache hit is yielded as one chunk; a fresh completion is cached once
+        the stream finishes.
+        """
+        model = self.router.choose(method)
+        key = LLMCache.make_key(method, model, system, prompt, temperature, max_tokens)
+        
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        else:
+            self.cache.count('bypassed')
+        
+        messages = self._messages(system, prompt)
+        chunks = self._call_provider(model, messages, max_tokens, temperature, stream=True)
+        
+        parts = []
+        for text in chunks:
+            # Match _complete, which strips the finished text
+            if not parts:
+                text = text.lstrip()
+                if not text:
+                    continue
+            parts.append(text)
+            yield text
+        
+        content = ''.join(parts).strip()
+        prompt_tokens = sum(count_tokens(m['content']) for m in messages)
+        self._record_usage({
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': count_tokens(content),
+            'total_tokens': prompt_tokens + count_tokens(content)
+        })
+        self.cache.set(key, content)
+    
+    def stream(self, task: str, use_cache: bool = True, **params) -> Iterator[str]:
+        """Stream the output of ``enhance_resume``, ``generate_cover_letter`` or ``optimize_for_ats``"""
+        builders = {
+            'enhance_resume': self._enhance_resume_request,
+            'generate_cover_letter': self._cover_letter_request,
+            'optimize_for_ats': self._ats_request
+        }
+        if task not in builders:
+            raise ValueError(f"Streaming not supported for: {task}")
+        
+        request = builders[task](**params)
+        request.pop('tokens_saved')
+        return self._stream_complete(**request, use_cache=use_cache)
+    
+    def _enhance_resume_request(self, original_resume: str, job_title: str = None, industry: str = None) -> Dict:
+        """Prompt for rewriting a resume"""
+        
+        # The rewrite replaces the resume, so only lossless cleanup: every section must reach the model
+        resume = self.compactor.clean_resume(original_resume)
         
         prompt = f"""
         Please enhance and professionally rewrite the following resume. 
@@ -25,7 +188,7 @@ class AIAgentService:
         8. Skills categorization
         
         Original Resume:
-        {original_resume}
+        {resume['text']}
         
         Target Industry: {industry if industry else 'General'}
         Target Job Title: {job_title if job_title else 'Various'}
@@ -34,21 +197,27 @@ class AIAgentService:
         Maintain the original structure but improve content and formatting.
         """
         
+        return {
+            'method': 'enhance_resume',
+            'system': "You are a professional resume writer and career coach with expertise in ATS optimization.",
+            'prompt': prompt,
+            'max_tokens': 2000,
+            'temperature': 0.7,
+            'tokens_saved': resume['tokens_saved']
+        }
+    
+    def enhance_resume(self, original_resume: str, job_title: str = None, industry: str = None,
+                       use_cache: bool = True) -> Dict:
+        """Enhance and rewrite resume using AI"""
+        
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a professional resume writer and career coach with expertise in ATS optimization."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.7
-            )
-            
-            enhanced_resume = response.choices[0].message.content.strip()
+            request = self._enhance_resume_request(original_resume, job_title, industry)
+            tokens_saved = request.pop('tokens_saved')
+            enhanced_resume = self._complete(**request, use_cache=use_cache)
             return {
                 'success': True,
-                'enhanced_resume': enhanced_resume
+                'enhanced_resume': enhanced_resume,
+                'tokens_saved': tokens_saved
             }
             
         except Exception as e:
@@ -57,8 +226,11 @@ class AIAgentService:
                 'error': str(e)
             }
     
-    def generate_cover_letter(self, resume: str, job_description: str, company: str = None) -> Dict:
-        """Generate personalized cover letter"""
+    def _cover_letter_request(self, resume: str, job_description: str, company: str = None) -> Dict:
+        """Prompt for a cover letter tailored to one job"""
+        
+        job = self.compactor.compact_text(job_description, terms=self.compactor.terms(resume))
+        compacted = self.compactor.compact_resume(resume, terms=self.compactor.terms(job_description))
         
         prompt = f"""
         Generate a professional, personalized cover letter based on the resume and job description.
@@ -72,31 +244,37 @@ class AIAgentService:
         6. Include a call to action
         
         Resume:
-        {resume}
+        {compacted['text']}
         
         Job Description:
-        {job_description}
+        {job['text']}
         
         Company: {company if company else 'the company'}
         
         Return only the cover letter text without any explanations.
         """
         
+        return {
+            'method': 'generate_cover_letter',
+            'system': "You are a professional cover letter writer who creates compelling, personalized cover letters.",
+            'prompt': prompt,
+            'max_tokens': 1500,
+            'temperature': 0.7,
+            'tokens_saved': compacted['tokens_saved'] + job['tokens_saved']
+        }
+    
+    def generate_cover_letter(self, resume: str, job_description: str, company: str = None,
+                              use_cache: bool = True) -> Dict:
+        """Generate personalized cover letter"""
+        
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a professional cover letter writer who creates compelling, personalized cover letters."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.7
-            )
-            
-            cover_letter = response.choices[0].message.content.strip()
+            request = self._cover_letter_request(resume, job_description, company)
+            tokens_saved = request.pop('tokens_saved')
+            cover_letter = self._complete(**request, use_cache=use_cache)
             return {
                 'success': True,
-                'cover_letter': cover_letter
+                'cover_letter': cover_letter,
+                'tokens_saved': tokens_saved
             }
             
         except Exception as e:
@@ -105,10 +283,97 @@ class AIAgentService:
                 'error': str(e)
             }
     
-    def optimize_for_ats(self, resume: str, keywords: List[str]) -> Dict:
-        """Optimize resume for Applicant Tracking Systems"""
+    @staticmethod
+    def describe_job(job: Dict) -> str:
+        """Job description text for a scraped posting"""
+        lines = [f"{job.get('title', '')} at {job.get('company', 'the company')}"]
+        if job.get('location'):
+            lines.append(f"Location: {job['location']}")
+        if job.get('salary') and job['salary'] != 'Not specified':
+            lines.append(f"Salary: {job['salary']}")
+        if job.get('snippet'):
+            lines.append(job['snippet'])
+        return '\n'.join(lines)
+    
+    def generate_cover_letters(self, resume: str, jobs: List[Dict], max_concurrency: int = None,
+                               token_budget: int = None, use_cache: bool = True) -> Iterator[Dict]:
+        """Generate a cover letter for each job concurrently, yielding each as it finishes.
+        
+        At most ``max_concurrency`` requests are in flight. Each job reserves its
+        prompt estimate plus the completion limit against ``token_budget``; jobs
+        that can no longer fit are yielded as skipped rather than sent. Both
+        limits can only be lowered from the configured batch settings.
+        """
+        max_concurrency = max(1, min(int(max_concurrency or self.batch_concurrency), self.batch_concurrency))
+        budget = min(int(token_budget), self.batch_token_budget) if token_budget else self.batch_token_budget
+        
+        pending = list(enumerate(jobs))
+        in_flight = {}
+        
+        try:
+            yield from self._run_batch(resume, pending, in_flight, max_concurrency, budget, use_cache)
+        finally:
+            # Consumer went away (e.g. client disconnected): drop what hasn't started
+            for future in in_flight:
+                future.cancel()
+    
+    def _run_batch(self, resume, pending, in_flight, max_concurrency, budget, use_cache):
+        completion_tokens = 1500
+        prompt_overhead = 250  # instructions around the resume and job description
+        spent = 0
+        
+        while pending or in_flight:
+            while pending and len(in_flight) < max_concurrency:
+                index, job = pending[0]
+                cost = (min(count_tokens(resume), self.compactor.resume_budget) + count_tokens(self.describe_job(job))
+                        + prompt_overhead + completion_tokens)
+                
+                if spent + sum(in_flight.values()) + cost > budget:
+                    if in_flight:
+                        break  # wait for a letter to finish and free its reservation
+                    pending.pop(0)
+                    yield {
+                        'index': index,
+                        'job': job,
+                        'success': False,
+                        'skipped': True,
+                        'error': 'Token budget exhausted'
+                    }
+                    continue
+                
+                pending.pop(0)
+                future = self.executor.submit(
+                    self.generate_cover_letter,
+                    resume,
+                    self.describe_job(job),
+                    job.get('company'),
+                    use_cache
+                )
+                future.batch_item = (index, job)
+                in_flight[future] = cost
+            
+            if not in_flight:
+                continue
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                cost = in_flight.pop(future)
+                index, job = future.batch_item
+                result = future.result()
+                
+                if result['success']:
+                    spent += cost - completion_tokens + count_tokens(result['cover_letter'])
+                else:
+                    spent += cost - completion_tokens
+                
+                yield dict(result, index=index, job=job, tokens_spent=spent)
+    
+    def _ats_request(self, resume: str, keywords: List[str]) -> Dict:
+        """Prompt for working keywords into a resume"""
         
         keyword_str = ', '.join(keywords)
+        # The optimised resume replaces the original, so nothing may be trimmed away
+        compacted = self.compactor.clean_resume(resume)
         
         prompt = f"""
         Optimize the following resume for Applicant Tracking Systems (ATS) by:
@@ -120,26 +385,31 @@ class AIAgentService:
         6. Ensuring proper formatting that ATS systems can parse
         
         Resume to optimize:
-        {resume}
+        {compacted['text']}
         
         Return only the optimized resume text without explanations.
         """
         
+        return {
+            'method': 'optimize_for_ats',
+            'system': "You are an ATS optimization expert who understands how recruiters and automated systems scan resumes.",
+            'prompt': prompt,
+            'max_tokens': 2000,
+            'temperature': 0.5,
+            'tokens_saved': compacted['tokens_saved']
+        }
+    
+    def optimize_for_ats(self, resume: str, keywords: List[str], use_cache: bool = True) -> Dict:
+        """Optimize resume for Applicant Tracking Systems"""
+        
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an ATS optimization expert who understands how recruiters and automated systems scan resumes."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.5
-            )
-            
-            optimized_resume = response.choices[0].message.content.strip()
+            request = self._ats_request(resume, keywords)
+            tokens_saved = request.pop('tokens_saved')
+            optimized_resume = self._complete(**request, use_cache=use_cache)
             return {
                 'success': True,
-                'optimized_resume': optimized_resume
+                'optimized_resume': optimized_resume,
+                'tokens_saved': tokens_saved
             }
             
         except Exception as e:
@@ -148,7 +418,8 @@ class AIAgentService:
                 'error': str(e)
             }
     
-    def generate_follow_up_email(self, company: str, position: str, interview_date: str = None) -> Dict:
+    def generate_follow_up_email(self, company: str, position: str, interview_date: str = None,
+                                 use_cache: bool = True) -> Dict:
         """Generate follow-up email after application"""
         
         prompt = f"""
@@ -169,17 +440,14 @@ class AIAgentService:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a professional career coach helping with job application follow-ups."},
-                    {"role": "user", "content": prompt}
-                ],
+            follow_up_email = self._complete(
+                'generate_follow_up_email',
+                "You are a professional career coach helping with job application follow-ups.",
+                prompt,
                 max_tokens=1000,
-                temperature=0.7
+                temperature=0.7,
+                use_cache=use_cache
             )
-            
-            follow_up_email = response.choices[0].message.content.strip()
             return {
                 'success': True,
                 'follow_up_email': follow_up_email
@@ -190,3 +458,72 @@ class AIAgentService:
                 'success': False,
                 'error': str(e)
             }
+    
+    ANALYSIS_FIELDS = ('required_skills', 'experience_level', 'industry_keywords', 'salary_range', 'culture_insights')
+    
+    @staticmethod
+    def _parse_json(text: str) -> Dict:
+        """First JSON object in a model response (which may be wrapped in a code fence)"""
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            raise ValueError('No JSON object in response')
+        parsed = json.loads(text[start:end + 1])
+        if not isinstance(parsed, dict):
+            raise ValueError('Response is not a JSON object')
+        return parsed
+    
+    def analyze_job_description(self, job_description: str, use_cache: bool = True) -> Dict:
+        """Extract skills, experience level and other insights from a job description.
+        
+        ``analysis`` is the parsed JSON object; ``structured`` is False when the
+        model didn't return valid JSON and ``analysis`` only has a ``summary``.
+        """
+        
+        job = self.compactor.compact_text(job_description)
+        
+        prompt = f"""
+        Analyze this job description and respond with only a JSON object with these keys:
+        - "required_skills": list of key skills and qualifications required
+        - "experience_level": e.g. "entry", "mid", "senior"
+        - "industry_keywords": list of industry keywords
+        - "salary_range": estimated salary range, or null if it can't be estimated
+        - "culture_insights": short text on the company culture
+        
+        Job Description:
+        {job['text']}
+        """
+        
+        try:
+            response = self._complete(
+                'analyze_job_description',
+                "You are a career advisor and job market analyst. You reply with JSON only.",
+                prompt,
+                max_tokens=1000,
+                temperature=0.5,
+                use_cache=use_cache
+            )
+            
+            try:
+                parsed = self._parse_json(response)
+                analysis = {field: parsed.get(field) for field in self.ANALYSIS_FIELDS}
+                structured = True
+            except ValueError:
+                analysis = {'summary': response}
+                structured = False
+            
+            return {
+                'success': True,
+                'analysis': analysis,
+                'structured': structured,
+                'tokens_saved': job['tokens_saved']
+            }
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+# One instance per process: the local quota, in-flight call sharing, model
+# latency samples, cache and usage counters only work if every caller shares them
+ai_service = AIAgentService()
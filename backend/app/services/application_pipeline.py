@@ -0,0 +1,119 @@
+import os
+from datetime import datetime
+from typing import Callable, Dict
+from app import db
+from app.models.application import JobApplication
+from app.services.ai_agent import AIAgentService
+from app.services.job_analysis import JobAnalysisService
+from app.services.job_ranker import JobRanker
+from app.services.job_scraper import JobScraperService
+from app.services.stage_graph import Stage, StageGraph
+
+class ApplicationPipeline:
+    """Resume enhancement + job search for one application, run as a background task.
+    
+    The work is a small stage graph: resume enhancement and the job search
+    don't depend on each other and run concurrently, and ranking follows the
+    search. The search pulls a wider pool of ``candidates`` postings, which
+    are ranked against the resume locally; the best ``match_limit`` are saved
+    in that order. Each stage has its own timeout. A failed enhancement still
+    leaves the job matches to save, and a failed search still saves the
+    enhanced resume before the application is marked failed.
+    """
+    
+    def __init__(self, ai_service: AIAgentService, job_scraper: JobScraperService, ranker: JobRanker = None,
+                 candidates: int = None, match_limit: int = None, enhance_timeout: float = None,
+                 search_timeout: float = None):
+        self.ai_service = ai_service
+        self.job_scraper = job_scraper
+        self.ranker = ranker or JobRanker()
+        self.candidates = candidates or int(os.getenv('RANKER_CANDIDATES', '100'))
+        self.match_limit = match_limit or int(os.getenv('APPLICATION_MATCH_LIMIT', '20'))
+        self.enhance_timeout = enhance_timeout or float(os.getenv('PIPELINE_ENHANCE_TIMEOUT', '180'))
+        self.search_timeout = search_timeout or float(os.getenv('PIPELINE_SEARCH_TIMEOUT', '120'))
+    
+    def _enhance_resume(self, resume: str, job_title: str, industry: str) -> str:
+        result = self.ai_service.enhance_resume(resume, job_title, industry)
+        if not result['success']:
+            raise RuntimeError(result.get('error') or 'Resume enhancement failed')
+        return result['enhanced_resume']
+    
+    def build_graph(self, application: JobApplication) -> StageGraph:
+        """Stages for ``application``, bound to plain values so they can run off the request thread"""
+        resume = application.original_resume
+        job_title = application.job_title
+        industry = application.industry
+        region = application.target_region
+        town = application.target_town
+        
+        return StageGraph([
+            Stage('enhance_resume', lambda inputs: self._enhance_resume(resume, job_title, industry),
+                  timeout=self.enhance_timeout),
+            Stage('search_jobs', lambda inputs: self.job_scraper.search_jobs(
+                keywords=job_title or '',
+                region=region,
+                town=town,
+                limit=self.candidates
+            ), timeout=self.search_timeout),
+            Stage('rank_jobs', lambda inputs: self.ranker.rank(resume, inputs['search_jobs'], job_title)[:self.match_limit],
+                  after=('search_jobs',))
+        ])
+    
+    def run(self, payload: Dict, progress: Callable[[str, int], None]) -> Dict:
+        application = JobApplication.query.get(payload['application_id'])
+        if not application:
+            raise ValueError('Application not found')
+        
+        try:
+            graph = self.build_graph(application)
+            finished = []
+            
+            def on_finish(name, outcome):
+                finished.append(name)
+                if outcome['status'] != 'finished':
+                    print(f"Application {application.id}: stage {name} {outcome['status']}: {outcome['error']}")
+                progress(name, 10 + 80 * len(finished) // len(graph.stages))
+            
+            progress('run_stages', 10)
+            outcomes = graph.run(on_finish)
+            stages = {
+                name: {'status': outcome['status'], 'seconds': outcome['seconds'], 'error': outcome['error']}
+                for name, outcome in outcomes.items()
+            }
+            
+            progress('save_results', 90)
+            if outcomes['enhance_resume']['status'] == 'finished':
+                application.enhanced_resume = outcomes['enhance_resume']['value']
+            
+            ranked = outcomes['rank_jobs']
+            if ranked['status'] != 'finished':
+                # Keep the enhanced resume; without a search there are no matches to save
+                db.session.commit()
+                failed = next(name for name in ('search_jobs', 'rank_jobs') if outcomes[name]['status'] != 'finished')
+                raise RuntimeError(f"{failed} {outcomes[failed]['status']}: {outcomes[failed]['error']}")
+            
+            jobs = ranked['value']
+            application.set_job_matches(jobs)
+            application.matches_found = len(jobs)
+            application.status = 'completed'
+            application.completed_at = datetime.utcnow()
+            db.session.commit()
+            
+        except Exception:
+            db.session.rollback()
+            application.status = 'failed'
+            db.session.commit()
+            raise
+        
+        # Analyse the matched postings ahead of the user opening them. This is
+        # best-effort: the application has already completed either way.
+        try:
+            JobAnalysisService.schedule(link.job for link in application.job_links)
+        except Exception as e:
+            print(f"Error scheduling job analysis for application {application.id}: {e}")
+        
+        return {
+            'application_id': application.id,
+            'jobs_found': len(jobs),
+            'stages': stages
+        }
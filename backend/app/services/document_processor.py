@@ -1,7 +1,7 @@
 import PyPDF2
 import docx
 import re
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 class DocumentProcessor:
     @staticmethod
@@ -64,6 +64,48 @@ class DocumentProcessor:
         
         return text.strip()
     
+    # Common section headers
+    SECTION_PATTERNS = {
+        'contact': r'(contact|personal|details|information)',
+        'summary': r'(summary|objective|profile|about)',
+        'experience': r'(experience|work\s+history|employment|work)',
+        'education': r'(education|qualifications|academic)',
+        'skills': r'(skills|technical\s+skills|competencies)',
+        'projects': r'(projects|portfolio|achievements)'
+    }
+    
+    def section_for_header(self, line: str) -> Optional[str]:
+        """Section name if the line looks like a heading rather than content"""
+        words = line.split()
+        if not words or len(words) > 4 or len(line) > 40 or ',' in line or line.endswith('.'):
+            return None
+        
+        for section, pattern in self.SECTION_PATTERNS.items():
+            if re.search(pattern, line, re.IGNORECASE):
+                return section
+        return None
+    
+    def split_sections(self, text: str) -> List[Tuple[str, str, List[str]]]:
+        """Split text into ordered ``(section, heading, lines)`` blocks without losing lines.
+        
+        Lines before the first heading belong to a ``header`` block (usually the
+        name and contact details).
+        """
+        blocks = [('header', '', [])]
+        
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            
+            section = self.section_for_header(line)
+            if section:
+                blocks.append((section, line, []))
+            else:
+                blocks[-1][2].append(line)
+        
+        return [block for block in blocks if block[1] or block[2]]
+    
     def detect_sections(self, text: str) -> Dict[str, str]:
         """Detect and extract resume sections"""
         sections = {
@@ -75,33 +117,9 @@ class DocumentProcessor:
             'projects': ''
         }
         
-        # Common section headers
-        section_patterns = {
-            'contact': r'(contact|personal|details|information)',
-            'summary': r'(summary|objective|profile|about)',
-            'experience': r'(experience|work\s+history|employment|work)',
-            'education': r'(education|qualifications|academic)',
-            'skills': r'(skills|technical\s+skills|competencies)',
-            'projects': r'(projects|portfolio|achievements)'
-        }
-        
-        lines = text.split('\n')
-        current_section = 'unknown'
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Check if this line is a section header
-            for section, pattern in section_patterns.items():
-                if re.search(pattern, line, re.IGNORECASE):
-                    current_section = section
-                    break
-            else:
-                # If not a header, add to current section
-                if current_section in sections:
-                    sections[current_section] += line + '\n'
+        for section, _, lines in self.split_sections(text):
+            if section in sections and lines:
+                sections[section] += '\n'.join(lines) + '\n'
         
         # Clean up sections
         for key in sections:
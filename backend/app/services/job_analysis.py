@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, List
+from sqlalchemy.exc import IntegrityError
+from app import db, task_queue
+from app.models.job import Job, JobAnalysis
+from app.services.ai_agent import AIAgentService
+
+class JobAnalysisService:
+    """Job-description analyses computed once and shared by every user.
+    
+    Analyses are stored in ``job_analyses`` under the hash of the normalised
+    description text, so a posting (or a pasted description) is sent to the
+    model only the first time it is seen. Postings matched to an application
+    are analysed ahead of time by the ``analyze_jobs`` background task, as
+    the user is about to open them; crawled and searched postings are left
+    until someone asks. Only valid structured JSON is stored.
+    """
+    
+    TASK = 'analyze_jobs'
+    
+    def __init__(self, ai_service: AIAgentService):
+        self.ai_service = ai_service
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'unstructured': 0, 'failed': 0}
+    
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+    
+    @staticmethod
+    def is_analysed(job: Job) -> bool:
+        """Whether ``job`` is linked to the analysis of its current text"""
+        return job.analysis_id is not None and job.analysis_id == JobAnalysis.make_id(job.description_text())
+    
+    @classmethod
+    def schedule(cls, jobs: Iterable[Job]) -> List[str]:
+        """Queue background analysis for an application's Job rows that lack one; returns the task ids"""
+        if os.getenv('JOB_ANALYSIS_EAGER', '1') == '0':
+            return []
+        
+        pending = [job.id for job in jobs if not cls.is_analysed(job)]
+        batch_size = int(os.getenv('JOB_ANALYSIS_BATCH_SIZE', '25'))
+        return [
+            task_queue.enqueue(cls.TASK, {'job_ids': pending[i:i + batch_size]})
+            for i in range(0, len(pending), batch_size)
+        ]
+    
+    def _store(self, analysis_id: str, analysis: Dict):
+        row = JobAnalysis.query.get(analysis_id)
+        if row is None:
+            row = JobAnalysis(id=analysis_id)
+            db.session.add(row)
+        row.analysis = json.dumps(analysis)
+        
+        try:
+            db.session.commit()
+            self._count('stored')
+        except IntegrityError:
+            # Another worker stored the same analysis first
+            db.session.rollback()
+    
+    def analyze(self, text: str, refresh: bool = False) -> Dict:
+        """Stored analysis for ``text``, calling the model only on a miss (or ``refresh``)"""
+        analysis_id = JobAnalysis.make_id(text)
+        
+        row = None if refresh else JobAnalysis.query.get(analysis_id)
+        if row is not None:
+            self._count('hits')
+            return {
+                'success': True,
+                'analysis_id': analysis_id,
+                'analysis': row.get_analysis(),
+                'structured': True,
+                'cached': True,
+                'tokens_saved': 0
+            }
+        
+        self._count('misses')
+        result = self.ai_service.analyze_job_description(text, use_cache=not refresh)
+        if not result['success']:
+            self._count('failed')
+            return result
+        
+        if result['structured']:
+            self._store(analysis_id, result['analysis'])
+        else:
+            self._count('unstructured')
+        
+        return dict(result, analysis_id=analysis_id, cached=False)
+    
+    def analyze_job(self, job: Job, refresh: bool = False) -> Dict:
+        """Analysis of a scraped posting, linking the posting to it"""
+        result = self.analyze(job.description_text(), refresh)
+        
+        if result['success'] and result['structured'] and job.analysis_id != result['analysis_id']:
+            job.analysis_id = result['analysis_id']
+            db.session.commit()
+        return result
+    
+    def run_task(self, payload: Dict, progress: Callable[[str, int], None]) -> Dict:
+        """``analyze_jobs`` task handler: analyse the postings in ``payload['job_ids']``"""
+        jobs = Job.query.filter(Job.id.in_(payload.get('job_ids', []))).all()
+        summary = {'jobs': len(jobs), 'analysed': 0, 'shared': 0, 'failed': 0}
+        
+        for i, job in enumerate(jobs):
+            progress('analyze_jobs', int(100 * i / len(jobs)))
+            if self.is_analysed(job):
+                continue
+            
+            result = self.analyze_job(job)
+            if not result['success']:
+                summary['failed'] += 1
+            elif result['cached']:
+                summary['shared'] += 1
+            else:
+                summary['analysed'] += 1
+        
+        return summary
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from app.services.job_scraper import JobScraperService
+
+class JobCrawler:
+    """Pre-warm the scrape cache for popular searches in every town we serve.
+    
+    Walks ``south_africa_regions`` x top job titles x sources, re-scraping any
+    combination whose cached result is no longer fresh. Each combination is
+    warmed up to the scraper's ``max_pages``, the pages a town search walks,
+    so those searches don't fall through to live HTTP after the first page.
+    Requests run on a bounded pool and each board is hit at most once per
+    ``delay`` seconds.
+    
+    ``on_results(region, jobs)`` is called from the calling thread for every
+    fresh scrape, e.g. to persist postings to the jobs table.
+    """
+    
+    DEFAULT_TITLES = [
+        'accountant', 'administrator', 'sales representative', 'software developer',
+        'customer service', 'call centre agent', 'receptionist', 'driver',
+        'teacher', 'nurse', 'engineer', 'project manager', 'cashier',
+        'marketing', 'bookkeeper', 'data analyst', 'electrician', 'warehouse'
+    ]
+    
+    def __init__(self, scraper: JobScraperService = None, titles: List[str] = None, top_n: int = None,
+                 max_workers: int = None, delay: float = None,
+                 on_results: Callable[[str, List[Dict]], None] = None):
+        self.scraper = scraper or JobScraperService()
+        self.on_results = on_results
+        
+        env_titles = [t.strip() for t in os.getenv('CRAWLER_TITLES', '').split(',') if t.strip()]
+        self.titles = titles or env_titles or self.DEFAULT_TITLES
+        self.top_n = top_n or int(os.getenv('CRAWLER_TOP_N', '10'))
+        self.max_workers = max_workers or int(os.getenv('CRAWLER_MAX_WORKERS', '4'))
+        self.delay = delay if delay is not None else float(os.getenv('CRAWLER_DELAY', '2'))
+        
+        self._next_request = {}
+        self._host_locks = {source: threading.Lock() for source in self.scraper.sources}
+    
+    def iter_targets(self, regions: Iterable[str] = None) -> Iterable[Tuple[str, str, str, str]]:
+        """Yield (source, title, region, town) for every combination to crawl"""
+        catalog = self.scraper.get_all_regions()
+        selected = [r.lower() for r in regions] if regions else None
+        
+        for region, towns in catalog.items():
+            if selected and region.lower() not in selected:
+                continue
+            for town in towns:
+                for title in self.titles[:self.top_n]:
+                    for source in self.scraper.sources:
+                        yield source, title, region, town
+    
+    def _wait_for_turn(self, source: str):
+        """Politeness delay: space out requests to the same board"""
+        with self._host_locks[source]:
+            wait = self._next_request.get(source, 0) - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_request[source] = time.monotonic() + self.delay
+    
+    def crawl_target(self, source: str, title: str, town: str) -> Optional[List[Dict]]:
+        """Scrape one combination's result pages into the cache; None if its cached result is still fresh"""
+        cached = self.scraper.cache.get(source, title, town)
+        if cached is not None and cached['fresh']:
+            return None
+        
+        jobs = []
+        for page in range(self.scraper.max_pages):
+            self._wait_for_turn(source)
+            page_jobs = self.scraper.scrape_source(source, title, town, use_cache=False, page=page)
+            if not page_jobs:
+                # Same stopping rule as iter_source: nothing after the first empty page
+                break
+            self.scraper.cache.set(source, title, town, page_jobs, page=page)
+            jobs.extend(page_jobs)
+        return jobs
+    
+    def run_once(self, regions: Iterable[str] = None) -> Dict:
+        """Crawl every target once and return summary counts"""
+        stats = {'targets': 0, 'skipped': 0, 'scraped': 0, 'jobs': 0, 'errors': 0}
+        started = time.monotonic()
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job-crawler') as executor:
+            futures = {
+                executor.submit(self.crawl_target, source, title, town): region
+                for source, title, region, town in self.iter_targets(regions)
+            }
+            stats['targets'] = len(futures)
+            
+            for future in as_completed(futures):
+                try:
+                    jobs = future.result()
+                    if jobs and self.on_results:
+                        self.on_results(futures[future], jobs)
+                except Exception as e:
+                    stats['errors'] += 1
+                    print(f"Crawler error: {e}")
+                    continue
+                
+                if jobs is None:
+                    stats['skipped'] += 1
+                else:
+                    stats['scraped'] += 1
+                    stats['jobs'] += len(jobs)
+        
+        stats['duration'] = round(time.monotonic() - started, 2)
+        return stats
+    
+    def run_forever(self, interval: int, regions: Iterable[str] = None):
+        """Crawl repeatedly, starting a new pass every ``interval`` seconds"""
+        while True:
+            started = time.monotonic()
+            stats = self.run_once(regions)
+            print(f"Crawl pass complete: {stats}")
+            time.sleep(max(0, interval - (time.monotonic() - started)))
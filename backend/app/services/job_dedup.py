@@ -0,0 +1,105 @@
+import hashlib
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Set
+
+# Legal-entity noise that boards add or drop inconsistently
+COMPANY_SUFFIXES = {
+    'pty', 'ltd', 'limited', 'inc', 'incorporated', 'llc', 'cc', 'npc',
+    'soc', 'plc', 'co', 'company', 'group', 'holdings', 'sa', 'za'
+}
+
+# Words that decorate a title without changing the role
+TITLE_NOISE = {'urgent', 'vacancy', 'position', 'opportunity', 'wanted', 'needed', 'hiring', 'now', 'new'}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r'[a-z0-9]+', (text or '').lower())
+
+def normalise_title(title: str) -> str:
+    return ' '.join(t for t in _tokens(title) if t not in TITLE_NOISE)
+
+def normalise_company(company: str) -> str:
+    return ' '.join(t for t in _tokens(company) if t not in COMPANY_SUFFIXES)
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class JobDeduplicator:
+    """Near-duplicate filter for postings cross-posted on several boards.
+    
+    Titles and companies are normalised, then candidate duplicates are found
+    with MinHash/LSH so each posting is only compared with the few postings
+    sharing a band bucket. Candidates count as duplicates when both the title
+    and the company token sets reach ``threshold`` Jaccard similarity.
+    
+    ``add`` works incrementally, so the same instance can filter a stream.
+    """
+    
+    def __init__(self, threshold: float = None, bands: int = 8, rows: int = 4):
+        self.threshold = threshold if threshold is not None else float(os.getenv('SCRAPER_DEDUP_THRESHOLD', '0.8'))
+        self.bands = bands
+        self.rows = rows
+        
+        num_perm = bands * rows
+        self._perms = [
+            (int.from_bytes(hashlib.blake2b(f'a{i}'.encode(), digest_size=8).digest(), 'big') | 1,
+             int.from_bytes(hashlib.blake2b(f'b{i}'.encode(), digest_size=8).digest(), 'big'))
+            for i in range(num_perm)
+        ]
+        
+        self._exact = set()
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._features = []
+    
+    @staticmethod
+    def _hash(token: str) -> int:
+        return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+    
+    def _signature(self, features: Set[str]) -> List[int]:
+        hashes = [self._hash(f) for f in features] or [0]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+    
+    def add(self, job: Dict) -> bool:
+        """Record ``job`` and return True if it is not a duplicate of one already seen"""
+        title = normalise_title(job.get('title', ''))
+        company = normalise_company(job.get('company', ''))
+        
+        if (title, company) in self._exact:
+            return False
+        
+        title_tokens = set(title.split())
+        company_tokens = set(company.split())
+        features = {f't:{t}' for t in title_tokens} | {f'c:{t}' for t in company_tokens}
+        
+        signature = self._signature(features)
+        band_keys = [
+            tuple(signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+        
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(key, ()))
+        
+        for index in candidates:
+            seen_title, seen_company = self._features[index]
+            if (jaccard(title_tokens, seen_title) >= self.threshold
+                    and jaccard(company_tokens, seen_company) >= self.threshold):
+                return False
+        
+        index = len(self._features)
+        self._features.append((title_tokens, company_tokens))
+        self._exact.add((title, company))
+        for band, key in enumerate(band_keys):
+            self._buckets[band][key].append(index)
+        
+        return True
+    
+    def dedupe(self, jobs: List[Dict]) -> List[Dict]:
+        """Return ``jobs`` without near-duplicates, keeping first occurrences"""
+        return [job for job in jobs if self.add(job)]
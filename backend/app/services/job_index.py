@@ -0,0 +1,134 @@
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import bindparam, text
+from app import db
+from app.models.job import Job
+
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        title, company, location, snippet, content='jobs', content_rowid='rowid'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, title, company, location, snippet)
+        VALUES (new.rowid, new.title, new.company, new.location, new.snippet);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, location, snippet)
+        VALUES ('delete', old.rowid, old.title, old.company, old.location, old.snippet);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, location, snippet)
+        VALUES ('delete', old.rowid, old.title, old.company, old.location, old.snippet);
+        INSERT INTO jobs_fts(rowid, title, company, location, snippet)
+        VALUES (new.rowid, new.title, new.company, new.location, new.snippet);
+    END""",
+    "INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')"
+]
+
+POSTGRES_SETUP = [
+    """ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(company, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(snippet, '')), 'D')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN(search_vector)"
+]
+
+class JobSearchIndex:
+    """Ranked full-text search over scraped postings in the jobs table.
+    
+    SQLite uses an FTS5 table kept in sync by triggers; PostgreSQL uses a
+    generated tsvector column with a GIN index. Either way every write to
+    ``jobs`` is indexed without extra calls, and ``search`` only has to rank.
+    """
+    
+    def __init__(self, max_age_hours: float = None, min_hits: int = None):
+        self.max_age = timedelta(hours=max_age_hours or float(os.getenv('JOB_INDEX_MAX_AGE_HOURS', '24')))
+        # Fewer fresh hits than this and callers should fall back to a live scrape
+        self.min_hits = min_hits or int(os.getenv('JOB_INDEX_MIN_HITS', '5'))
+        self._ready = set()
+        self._lock = threading.Lock()
+    
+    @property
+    def dialect(self) -> str:
+        return db.engine.dialect.name
+    
+    def ensure_index(self):
+        """Create the index structures for the current database if needed"""
+        url = str(db.engine.url)
+        if url in self._ready:
+            return
+        
+        with self._lock:
+            if url in self._ready:
+                return
+            
+            with db.engine.begin() as connection:
+                if self.dialect == 'sqlite':
+                    exists = connection.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+                    )).first()
+                    statements = [] if exists else SQLITE_SETUP
+                else:
+                    statements = POSTGRES_SETUP
+                
+                for statement in statements:
+                    connection.execute(text(statement))
+            self._ready.add(url)
+    
+    @staticmethod
+    def _terms(query: str) -> List[str]:
+        return re.findall(r'\w+', (query or '').lower())
+    
+    def _ranked_ids(self, terms: List[str], region: str, since: datetime, limit: int) -> List[str]:
+        filters = ['jobs.scraped_at >= :since']
+        params = {'since': since, 'limit': limit}
+        if region:
+            filters.append('jobs.region = :region')
+            params['region'] = region
+        
+        if self.dialect == 'sqlite':
+            params['query'] = ' '.join(f'"{term}"' for term in terms)
+            sql = f"""
+                SELECT jobs.id FROM jobs_fts
+                JOIN jobs ON jobs.rowid = jobs_fts.rowid
+                WHERE jobs_fts MATCH :query AND {' AND '.join(filters)}
+                ORDER BY bm25(jobs_fts, 10.0, 4.0, 2.0, 1.0)
+                LIMIT :limit
+            """
+        else:
+            params['query'] = ' '.join(terms)
+            sql = f"""
+                SELECT jobs.id FROM jobs
+                WHERE jobs.search_vector @@ plainto_tsquery('english', :query) AND {' AND '.join(filters)}
+                ORDER BY ts_rank(jobs.search_vector, plainto_tsquery('english', :query)) DESC
+                LIMIT :limit
+            """
+        
+        statement = text(sql).bindparams(bindparam('since', type_=db.DateTime))
+        return [row[0] for row in db.session.execute(statement, params)]
+    
+    def search(self, query: str, region: str = None, town: str = None, limit: int = 20) -> List[Dict]:
+        """Return fresh postings matching ``query``, best match first.
+        
+        A town is matched as extra terms against the indexed location.
+        """
+        terms = self._terms(query)
+        if not terms:
+            return []
+        
+        self.ensure_index()
+        if town:
+            terms += self._terms(town.replace('-', ' '))
+        
+        since = datetime.utcnow() - self.max_age
+        ids = self._ranked_ids(terms, region.lower() if region else None, since, limit)
+        if not ids:
+            return []
+        
+        rows = {job.id: job for job in Job.query.filter(Job.id.in_(ids)).all()}
+        return [rows[job_id].to_dict() for job_id in ids if job_id in rows]
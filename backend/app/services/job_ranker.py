@@ -0,0 +1,79 @@
+import os
+import re
+from collections import Counter
+from typing import Dict, List
+import numpy as np
+from app.services.prompt_compactor import STOPWORDS
+
+TOKEN_PATTERN = re.compile(r'[a-z][a-z0-9+#]+')
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased content words (stopwords removed)"""
+    return [w for w in TOKEN_PATTERN.findall((text or '').lower()) if w not in STOPWORDS]
+
+class JobRanker:
+    """Scores postings against a resume with BM25, batched in NumPy.
+    
+    Each posting is a document (its title counted ``title_weight`` times,
+    plus company, location and snippet); the resume and target job title are
+    the query. Resume term counts are log-dampened so a word repeated all over
+    a CV doesn't dominate, and the target title's words get extra weight.
+    Scores are normalised to 0-1 against the best match.
+    """
+    
+    def __init__(self, k1: float = None, b: float = None, title_weight: int = 3, job_title_weight: float = 2.0):
+        self.k1 = k1 if k1 is not None else float(os.getenv('RANKER_BM25_K1', '1.5'))
+        self.b = b if b is not None else float(os.getenv('RANKER_BM25_B', '0.75'))
+        self.title_weight = title_weight
+        self.job_title_weight = job_title_weight
+    
+    def _document(self, job: Dict) -> List[str]:
+        return (tokenize(job.get('title')) * self.title_weight
+                + tokenize(job.get('company'))
+                + tokenize(job.get('location'))
+                + tokenize(job.get('snippet')))
+    
+    def score(self, resume: str, jobs: List[Dict], job_title: str = None) -> np.ndarray:
+        """BM25 relevance of each job to the resume, normalised to 0-1"""
+        if not jobs:
+            return np.zeros(0)
+        
+        query = Counter(tokenize(resume))
+        for term in tokenize(job_title):
+            query[term] += 0  # make sure title words are in the vocabulary
+        vocab = {term: i for i, term in enumerate(query)}
+        if not vocab:
+            return np.zeros(len(jobs))
+        
+        # Term-frequency matrix restricted to query terms: jobs x terms
+        docs = [self._document(job) for job in jobs]
+        tf = np.zeros((len(jobs), len(vocab)), dtype=np.float32)
+        lengths = np.empty(len(jobs), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            lengths[row] = len(doc)
+            for term, count in Counter(doc).items():
+                col = vocab.get(term)
+                if col is not None:
+                    tf[row, col] = count
+        
+        n = len(jobs)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        
+        avg_length = lengths.mean() or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        saturated = tf * (self.k1 + 1) / (tf + norm[:, None])
+        
+        weights = np.log1p(np.array([query[term] for term in vocab], dtype=np.float32))
+        for term in tokenize(job_title):
+            weights[vocab[term]] += self.job_title_weight
+        
+        scores = saturated @ (idf * weights)
+        best = scores.max()
+        return scores / best if best > 0 else scores
+    
+    def rank(self, resume: str, jobs: List[Dict], job_title: str = None) -> List[Dict]:
+        """Copies of ``jobs`` with ``relevance_score``, best match first (ties keep input order)"""
+        scores = self.score(resume, jobs, job_title)
+        order = np.argsort(-scores, kind='stable')
+        return [dict(jobs[i], relevance_score=round(float(scores[i]), 4)) for i in order]
@@ -1,13 +1,35 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import hashlib
+import os
 import time
 import json
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import Dict, Iterator, List
 import re
 from datetime import datetime
+from app.services.job_dedup import JobDeduplicator
+from app.services.resilience import CircuitBreaker, SourceUnavailableError, TokenBucket
+from app.services.scrape_cache import PageValidatorStore, ScrapeCache
+from app.utils.redis_client import get_redis_client
+
+try:
+    import brotli  # noqa: F401 -- lets urllib3 decode 'br' responses
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+try:
+    import lxml  # noqa: F401 -- C parser backend for BeautifulSoup
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
 
 class JobScraperService:
     def __init__(self):
+        # Keys are lowercase: get_region_towns lowercases the region it's given
         self.south_africa_regions = {
             'gauteng': [
                 'johannesburg', 'pretoria', 'sandton', 'randburg', 'roodepoort',
@@ -23,7 +45,7 @@ class JobScraperService:
                 'port-elizabeth', 'east-london', 'grahamstown', 'queenstown',
                 'bisho', 'butterworth', 'uitenhage', 'graaff-reinet'
             ],
-            'kwaZulu_natal': [
+            'kwazulu_natal': [
                 'durban', 'pietermaritzburg', 'richards-bay', 'newcastle',
                 'ladysmith', 'ballito', 'umhlanga', 'pinetown', 'pmb'
             ],
@@ -50,170 +72,513 @@ class JobScraperService:
         }
         
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive'
+        }
+        
+        self.base_urls = {
+            'indeed': 'https://za.indeed.com',
+            'careerjet': 'https://www.careerjet.co.za',
+            'careers24': 'https://www.careers24.com'
+        }
+        
+        # Deepest results page a search will walk to per board
+        self.max_pages = int(os.getenv('SCRAPER_MAX_PAGES', '3'))
+        
+        # Deadlines (seconds) for a single board and for the whole search
+        self.source_timeout = float(os.getenv('SCRAPER_SOURCE_TIMEOUT', '10'))
+        self.search_timeout = float(os.getenv('SCRAPER_SEARCH_TIMEOUT', '15'))
+        
+        # Long-lived pool so concurrent searches don't pay thread start-up
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('SCRAPER_MAX_WORKERS', '8')),
+            thread_name_prefix='job-scraper'
+        )
+        
+        # Only the job cards are built into a tree; the rest of the page is skipped
+        self.html_parser = os.getenv('SCRAPER_HTML_PARSER', DEFAULT_HTML_PARSER)
+        self.card_selectors = {
+            'indeed': ('div', 'job_seen_beacon'),
+            'careerjet': ('article', 'job'),
+            'careers24': ('div', 'job-card')
+        }
+        
+        self.session = self._build_session()
+        self.cache = ScrapeCache(get_redis_client())
+        self.validators = PageValidatorStore(get_redis_client())
+        
+        # Per-host politeness and fail-fast for boards that are down or blocking us
+        self.rate_limiters = {
+            source: TokenBucket(
+                rate=float(os.getenv('SCRAPER_RATE_PER_SECOND', '2')),
+                capacity=float(os.getenv('SCRAPER_RATE_BURST', '5'))
+            )
+            for source in self.base_urls
         }
+        self.breaker = CircuitBreaker(get_redis_client())
+        
+        # Region-wide searches get their own pool; its size caps town x source
+        # scrapes in flight across all region searches in this process
+        self.region_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('SCRAPER_REGION_CONCURRENCY', '6')),
+            thread_name_prefix='job-scraper-region'
+        )
+        
+        self.sources = {
+            'indeed': self.scrape_indeed,
+            'careerjet': self.scrape_careerjet,
+            'careers24': self.scrape_careers24
+        }
+    
+    def _build_session(self) -> requests.Session:
+        """Create the keep-alive session shared by all scraper threads.
+        
+        Each job board gets its own mounted adapter, so connections are pooled
+        per host and reused across searches instead of re-handshaking TLS on
+        every request.
+        """
+        session = requests.Session()
+        session.headers.update(self.headers)
+        
+        pool_size = int(os.getenv('SCRAPER_POOL_MAXSIZE', '10'))
+        retries = Retry(
+            total=int(os.getenv('SCRAPER_MAX_RETRIES', '2')),
+            backoff_factor=float(os.getenv('SCRAPER_RETRY_BACKOFF', '0.3')),
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+            # A 503 with Retry-After would otherwise sleep a shared worker past the
+            # source timeout; backing off from a struggling board is the breaker's job
+            respect_retry_after_header=False
+        )
+        
+        for base_url in self.base_urls.values():
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_size,
+                max_retries=retries,
+                pool_block=True
+            )
+            session.mount(base_url, adapter)
+        
+        return session
+    
+    def _fetch(self, url: str, params: Dict, headers: Dict = None) -> requests.Response:
+        """GET a results page through the pooled session"""
+        return self.session.get(url, params=params, headers=headers, timeout=self.source_timeout)
     
-    def scrape_careerjet(self, keywords: str, location: str) -> List[Dict]:
+    def _fetch_jobs(self, source: str, url: str, params: Dict, extract) -> List[Dict]:
+        """Fetch a results page and extract its jobs, skipping unchanged pages.
+        
+        The ETag, Last-Modified and body hash of the last response are kept per
+        (source, params). Later fetches are conditional; a 304 or an identical
+        body returns the previously extracted jobs without parsing again.
+        """
+        key = self.validators.make_key(source, params)
+        previous = self.validators.get(key)
+        
+        headers = {}
+        if previous:
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+        
+        # Wait for a rate-limit token first: allow() may claim the half-open probe
+        if not self.rate_limiters[source].acquire(timeout=self.source_timeout):
+            raise SourceUnavailableError(f"{source} rate limit exceeded")
+        if not self.breaker.allow(source):
+            raise SourceUnavailableError(f"{source} circuit is open")
+        
+        recorded = False
+        try:
+            try:
+                response = self._fetch(url, params, headers)
+            except Exception:
+                self.breaker.record_failure(source)
+                recorded = True
+                raise
+            
+            if response.status_code in (403, 429) or response.status_code >= 500:
+                self.breaker.record_failure(source, rate_limited=response.status_code == 429)
+                recorded = True
+                raise SourceUnavailableError(f"{source} returned HTTP {response.status_code}")
+            self.breaker.record_success(source)
+            recorded = True
+        finally:
+            if not recorded:
+                # Never leave a half-open probe claimed, or the source stays blocked
+                self.breaker.release_probe(source)
+        
+        if response.status_code == 304 and previous:
+            self.validators.count('not_modified')
+            return [dict(job) for job in previous['jobs']]
+        
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        if previous and previous['body_hash'] == body_hash:
+            self.validators.count('unchanged')
+            return [dict(job) for job in previous['jobs']]
+        
+        jobs = extract(response.content)
+        self.validators.count('parsed')
+        
+        if response.ok and jobs:
+            self.validators.set(key, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'body_hash': body_hash,
+                'jobs': jobs
+            })
+        
+        return [dict(job) for job in jobs]
+    
+    def parse_cards(self, source: str, content: bytes, parser: str = None) -> List:
+        """Parse only the job cards of a results page for ``source``"""
+        tag, css_class = self.card_selectors[source]
+        
+        # The strainer sees the raw attribute string, so match one class among several
+        def has_class(value):
+            if value is None:
+                return False
+            return css_class in (value.split() if isinstance(value, str) else value)
+        
+        soup = BeautifulSoup(
+            content,
+            parser or self.html_parser,
+            parse_only=SoupStrainer(tag, class_=has_class)
+        )
+        return soup.find_all(tag, class_=css_class)
+    
+    def scrape_careerjet(self, keywords: str, location: str, page: int = 0) -> List[Dict]:
         """Scrape jobs from CareerJet South Africa"""
         jobs = []
         try:
-            base_url = "https://www.careerjet.co.za"
-            search_url = f"{base_url}/search/jobs"
+            search_url = f"{self.base_urls['careerjet']}/search/jobs"
             
             params = {
                 's': keywords,
                 'l': location,
                 'radius': 25
             }
+            if page:
+                params['p'] = page + 1
             
-            response = requests.get(search_url, params=params, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            jobs = self._fetch_jobs(
+                'careerjet', search_url, params,
+                lambda content: self.extract_careerjet(content, location)
+            )
             
-            job_listings = soup.find_all('article', class_='job')
-            
-            for job in job_listings[:15]:
-                try:
-                    title_elem = job.find('h2')
-                    company_elem = job.find('p', class_='company')
-                    location_elem = job.find('ul', class_='location')
-                    date_elem = job.find('span', class_='badge--default')
-                    
-                    if title_elem and company_elem:
-                        job_data = {
-                            'title': title_elem.text.strip(),
-                            'company': company_elem.text.strip(),
-                            'location': location_elem.text.strip() if location_elem else location,
-                            'url': base_url + title_elem.find('a')['href'] if title_elem.find('a') else '',
-                            'source': 'careerjet',
-                            'date_posted': date_elem.text.strip() if date_elem else 'Recent',
-                            'salary': 'Not specified'
-                        }
-                        jobs.append(job_data)
-                except Exception as e:
-                    continue
-                    
         except Exception as e:
             print(f"CareerJet scraping error: {e}")
             
         return jobs
     
-    def scrape_indeed(self, keywords: str, location: str) -> List[Dict]:
+    def extract_careerjet(self, content: bytes, location: str) -> List[Dict]:
+        """Extract job data from a CareerJet results page"""
+        jobs = []
+        base_url = self.base_urls['careerjet']
+        job_listings = self.parse_cards('careerjet', content)
+        
+        for job in job_listings:
+            try:
+                title_elem = job.find('h2')
+                company_elem = job.find('p', class_='company')
+                location_elem = job.find('ul', class_='location')
+                date_elem = job.find('span', class_='badge--default')
+                snippet_elem = job.find('div', class_='desc')
+                
+                if title_elem and company_elem:
+                    job_data = {
+                        'title': title_elem.text.strip(),
+                        'company': company_elem.text.strip(),
+                        'location': location_elem.text.strip() if location_elem else location,
+                        'url': base_url + title_elem.find('a')['href'] if title_elem.find('a') else '',
+                        'source': 'careerjet',
+                        'date_posted': date_elem.text.strip() if date_elem else 'Recent',
+                        'salary': 'Not specified',
+                        'snippet': snippet_elem.text.strip() if snippet_elem else ''
+                    }
+                    jobs.append(job_data)
+            except Exception as e:
+                continue
+        
+        return jobs
+    
+    def scrape_indeed(self, keywords: str, location: str, page: int = 0) -> List[Dict]:
         """Scrape jobs from Indeed South Africa"""
         jobs = []
         try:
-            base_url = "https://za.indeed.com"
-            search_url = f"{base_url}/jobs"
+            search_url = f"{self.base_urls['indeed']}/jobs"
             
             params = {
                 'q': keywords,
                 'l': location,
                 'fromage': 7  # Last 7 days
             }
+            if page:
+                params['start'] = page * 10
             
-            response = requests.get(search_url, params=params, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            jobs = self._fetch_jobs(
+                'indeed', search_url, params,
+                lambda content: self.extract_indeed(content, location)
+            )
             
-            job_cards = soup.find_all('div', class_='job_seen_beacon')
-            
-            for job in job_cards[:15]:
-                try:
-                    title_elem = job.find('h2', class_='jobTitle')
-                    company_elem = job.find('span', class_='companyName')
-                    location_elem = job.find('div', class_='companyLocation')
-                    salary_elem = job.find('div', class_='salary-snippet')
-                    
-                    if title_elem and company_elem:
-                        job_data = {
-                            'title': title_elem.text.strip(),
-                            'company': company_elem.text.strip(),
-                            'location': location_elem.text.strip() if location_elem else location,
-                            'url': base_url + title_elem.find('a')['href'] if title_elem.find('a') else '',
-                            'source': 'indeed',
-                            'date_posted': 'Recent',
-                            'salary': salary_elem.text.strip() if salary_elem else 'Not specified'
-                        }
-                        jobs.append(job_data)
-                except Exception as e:
-                    continue
-                    
         except Exception as e:
             print(f"Indeed scraping error: {e}")
             
         return jobs
     
-    def scrape_careers24(self, keywords: str, location: str) -> List[Dict]:
+    def extract_indeed(self, content: bytes, location: str) -> List[Dict]:
+        """Extract job data from an Indeed results page"""
+        jobs = []
+        base_url = self.base_urls['indeed']
+        job_cards = self.parse_cards('indeed', content)
+        
+        for job in job_cards:
+            try:
+                title_elem = job.find('h2', class_='jobTitle')
+                company_elem = job.find('span', class_='companyName')
+                location_elem = job.find('div', class_='companyLocation')
+                salary_elem = job.find('div', class_='salary-snippet')
+                snippet_elem = job.find('div', class_='job-snippet')
+                
+                if title_elem and company_elem:
+                    job_data = {
+                        'title': title_elem.text.strip(),
+                        'company': company_elem.text.strip(),
+                        'location': location_elem.text.strip() if location_elem else location,
+                        'url': base_url + title_elem.find('a')['href'] if title_elem.find('a') else '',
+                        'source': 'indeed',
+                        'date_posted': 'Recent',
+                        'salary': salary_elem.text.strip() if salary_elem else 'Not specified',
+                        'snippet': snippet_elem.text.strip() if snippet_elem else ''
+                    }
+                    jobs.append(job_data)
+            except Exception as e:
+                continue
+        
+        return jobs
+    
+    def scrape_careers24(self, keywords: str, location: str, page: int = 0) -> List[Dict]:
         """Scrape jobs from Careers24"""
         jobs = []
         try:
-            base_url = "https://www.careers24.com"
-            search_url = f"{base_url}/jobs"
+            search_url = f"{self.base_urls['careers24']}/jobs"
             
             params = {
                 'keywords': keywords,
                 'location': location
             }
+            if page:
+                params['page'] = page + 1
             
-            response = requests.get(search_url, params=params, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            job_listings = soup.find_all('div', class_='job-card')
+            jobs = self._fetch_jobs(
+                'careers24', search_url, params,
+                lambda content: self.extract_careers24(content, location)
+            )
             
-            for job in job_listings[:15]:
-                try:
-                    title_elem = job.find('h3')
-                    company_elem = job.find('div', class_='company')
-                    location_elem = job.find('div', class_='location')
-                    
-                    if title_elem and company_elem:
-                        job_data = {
-                            'title': title_elem.text.strip(),
-                            'company': company_elem.text.strip(),
-                            'location': location_elem.text.strip() if location_elem else location,
-                            'url': base_url + title_elem.find('a')['href'] if title_elem.find('a') else '',
-                            'source': 'careers24',
-                            'date_posted': 'Recent',
-                            'salary': 'Not specified'
-                        }
-                        jobs.append(job_data)
-                except Exception as e:
-                    continue
-                    
         except Exception as e:
             print(f"Careers24 scraping error: {e}")
             
         return jobs
     
-    def search_jobs(self, keywords: str, region: str, town: str = None) -> List[Dict]:
-        """Main method to search jobs across multiple platforms"""
-        all_jobs = []
-        location = town if town else region
+    def extract_careers24(self, content: bytes, location: str) -> List[Dict]:
+        """Extract job data from a Careers24 results page"""
+        jobs = []
+        base_url = self.base_urls['careers24']
+        job_listings = self.parse_cards('careers24', content)
         
-        print(f"Searching jobs for: {keywords} in {location}")
+        for job in job_listings:
+            try:
+                title_elem = job.find('h3')
+                company_elem = job.find('div', class_='company')
+                location_elem = job.find('div', class_='location')
+                snippet_elem = job.find('div', class_='job-card__summary')
+                
+                if title_elem and company_elem:
+                    job_data = {
+                        'title': title_elem.text.strip(),
+                        'company': company_elem.text.strip(),
+                        'location': location_elem.text.strip() if location_elem else location,
+                        'url': base_url + title_elem.find('a')['href'] if title_elem.find('a') else '',
+                        'source': 'careers24',
+                        'date_posted': 'Recent',
+                        'salary': 'Not specified',
+                        'snippet': snippet_elem.text.strip() if snippet_elem else ''
+                    }
+                    jobs.append(job_data)
+            except Exception as e:
+                continue
+        
+        return jobs
+    
+    def scrape_source(self, source: str, keywords: str, location: str, use_cache: bool = True,
+                      page: int = 0) -> List[Dict]:
+        """Scrape one results page of a source, served from the result cache when possible"""
+        def fetch():
+            jobs = self.sources[source](keywords, location, page)
+            scraped_at = datetime.utcnow().isoformat()
+            for job in jobs:
+                job.setdefault('scraped_at', scraped_at)
+            return jobs
+        
+        if not use_cache:
+            return fetch()
+        
+        return self.cache.get_or_fetch(source, keywords, location, fetch, executor=self.executor, page=page)
+    
+    def iter_source(self, source: str, keywords: str, location: str, use_cache: bool = True,
+                    max_pages: int = None) -> Iterator[List[Dict]]:
+        """Lazily walk a source's result pages, yielding each page's jobs.
+        
+        Stops at ``max_pages`` or at the first empty page.
+        """
+        for page in range(max_pages or self.max_pages):
+            jobs = self.scrape_source(source, keywords, location, use_cache, page)
+            if not jobs:
+                return
+            yield jobs
+    
+    def _next_pages(self, pages: Dict[str, Iterator], concurrent: bool, deadline: float) -> Dict[str, List[Dict]]:
+        """Advance every page iterator by one page.
+        
+        Returns the pages that arrived in time, keyed by source in source order.
+        Exhausted sources map to an empty list; sources that failed or missed
+        their deadline are left out (their iterator may still be running).
+        """
+        results = {}
         
-        # Search multiple platforms
-        indeed_jobs = self.scrape_indeed(keywords, location)
-        all_jobs.extend(indeed_jobs)
+        if not concurrent:
+            for name, iterator in pages.items():
+                try:
+                    results[name] = next(iterator, [])
+                except Exception as e:
+                    print(f"{name} scraping error: {e}")
+            return results
+        
+        started = time.monotonic()
+        futures = {
+            name: self.executor.submit(next, iterator, [])
+            for name, iterator in pages.items()
+        }
+        
+        for name, future in futures.items():
+            source_deadline = min(deadline, started + self.source_timeout)
+            try:
+                results[name] = future.result(timeout=max(0, source_deadline - time.monotonic()))
+            except FutureTimeoutError:
+                future.cancel()
+                print(f"{name} scraping skipped: deadline exceeded")
+            except Exception as e:
+                print(f"{name} scraping error: {e}")
+        
+        return results
+    
+    def stream_jobs(self, keywords: str, location: str, limit: int = 20, concurrent: bool = True,
+                    use_cache: bool = True, max_pages: int = None) -> Iterator[Dict]:
+        """Yield unique jobs from all sources, fetching pages only as needed.
+        
+        Each round pulls the next page from every live source (concurrently by
+        default, each within ``source_timeout``) and the stream stops fetching
+        as soon as ``limit`` unique jobs have been yielded, every source is
+        exhausted, or ``search_timeout`` has elapsed.
+        """
+        deadline = time.monotonic() + self.search_timeout
+        dedup = JobDeduplicator()
+        pages = {
+            name: self.iter_source(name, keywords, location, use_cache, max_pages)
+            for name in self.sources
+        }
+        yielded = 0
         
-        careerjet_jobs = self.scrape_careerjet(keywords, location)
-        all_jobs.extend(careerjet_jobs)
+        while pages and time.monotonic() < deadline:
+            results = self._next_pages(pages, concurrent, deadline)
+            
+            for name in list(pages):
+                jobs = results.get(name)
+                if not jobs:
+                    # Exhausted, failed or too slow: stop pulling from this source
+                    del pages[name]
+                    continue
+                
+                for job in jobs:
+                    if dedup.add(job):
+                        # Copy so callers can't mutate cached entries
+                        yield dict(job)
+                        yielded += 1
+                        if yielded >= limit:
+                            return
+    
+    def stream_region_jobs(self, keywords: str, region: str, limit: int = 20,
+                           use_cache: bool = True, timeout: float = None) -> Iterator[Dict]:
+        """Yield unique jobs from every town in ``region``.
         
-        careers24_jobs = self.scrape_careers24(keywords, location)
-        all_jobs.extend(careers24_jobs)
+        Every town x source first page is scraped on the region pool and
+        results are merged, deduplicated and yielded as each scrape completes.
+        The search ends at ``limit`` jobs or when ``timeout`` (default
+        ``search_timeout``) runs out, whichever comes first, so latency does
+        not grow with the number of towns.
+        """
+        towns = self.get_region_towns(region)
+        if not towns:
+            yield from self.stream_jobs(keywords, region, limit=limit, use_cache=use_cache)
+            return
         
-        # Remove duplicates based on title and company
-        seen = set()
-        unique_jobs = []
-        for job in all_jobs:
-            identifier = (job['title'].lower(), job['company'].lower())
-            if identifier not in seen:
-                seen.add(identifier)
-                unique_jobs.append(job)
+        futures = [
+            self.region_executor.submit(self.scrape_source, source, keywords, town, use_cache)
+            for town in towns
+            for source in self.sources
+        ]
+        dedup = JobDeduplicator()
+        yielded = 0
         
-        # Add timestamp
-        for job in unique_jobs:
-            job['scraped_at'] = datetime.utcnow().isoformat()
+        try:
+            for future in as_completed(futures, timeout=timeout or self.search_timeout):
+                try:
+                    jobs = future.result()
+                except Exception as e:
+                    print(f"Region scrape error: {e}")
+                    continue
+                
+                for job in jobs:
+                    if dedup.add(job):
+                        yield dict(job)
+                        yielded += 1
+                        if yielded >= limit:
+                            return
+        except FutureTimeoutError:
+            print(f"Region search for {region} hit its deadline after {yielded} jobs")
+        finally:
+            for future in futures:
+                future.cancel()
+    
+    def search_jobs(self, keywords: str, region: str, town: str = None, concurrent: bool = True,
+                    use_cache: bool = True, limit: int = 20, max_pages: int = None,
+                    region_wide: bool = None) -> List[Dict]:
+        """Main method to search jobs across multiple platforms.
+        
+        Without a town, a known region is searched town by town
+        (``region_wide``) rather than as a literal location string.
+        """
+        if region_wide is None:
+            region_wide = not town and bool(self.get_region_towns(region or ''))
+        
+        if region_wide:
+            print(f"Searching jobs for: {keywords} across {region}")
+            return list(self.stream_region_jobs(keywords, region, limit=limit, use_cache=use_cache))
+        
+        location = town if town else region
+        
+        print(f"Searching jobs for: {keywords} in {location}")
         
-        return unique_jobs[:20]  # Return max 20 unique jobs
+        return list(self.stream_jobs(
+            keywords, location,
+            limit=limit,
+            concurrent=concurrent,
+            use_cache=use_cache,
+            max_pages=max_pages
+        ))
     
     def get_region_towns(self, region: str) -> List[str]:
         """Get towns for a specific region"""
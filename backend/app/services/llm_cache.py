@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+from app.utils.redis_client import get_redis_client
+
+class RedisLLMBackend:
+    """Cached completions in Redis with a TTL and an LRU-ordered size cap"""
+    
+    def __init__(self, redis_client, ttl: int, max_entries: int, prefix: str = 'llm'):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index_key = f'{prefix}:index'
+    
+    def get(self, key: str) -> Optional[str]:
+        raw = self.redis.get(f'{self.prefix}:{key}')
+        if raw is None:
+            self.redis.zrem(self.index_key, key)
+            return None
+        self.redis.zadd(self.index_key, {key: time.time()})
+        return raw.decode('utf-8') if isinstance(raw, bytes) else raw
+    
+    def set(self, key: str, content: str):
+        pipe = self.redis.pipeline()
+        pipe.set(f'{self.prefix}:{key}', content, ex=self.ttl)
+        pipe.zadd(self.index_key, {key: time.time()})
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+        
+        if size > self.max_entries:
+            evicted = self.redis.zpopmin(self.index_key, size - self.max_entries)
+            if evicted:
+                self.redis.delete(*(f'{self.prefix}:{k.decode() if isinstance(k, bytes) else k}' for k, _ in evicted))
+    
+    def size(self) -> int:
+        return self.redis.zcard(self.index_key)
+
+class DiskLLMBackend:
+    """Cached completions as files in a directory.
+    
+    Reads touch the file, so mtime is the last use: entries expire after ``ttl``
+    seconds unused and the least recently used go first when over the caps.
+    """
+    
+    def __init__(self, directory: str, ttl: int, max_entries: int, max_bytes: int):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.txt')
+    
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+    
+    def set(self, key: str, content: str):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp, self._path(key))
+        self._evict()
+    
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.txt'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+    
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if len(entries) <= self.max_entries and total <= self.max_bytes:
+                return
+            
+            # Oldest (least recently read or written) first
+            entries.sort()
+            count = len(entries)
+            for _, size, path in entries:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                count -= 1
+                total -= size
+    
+    def size(self) -> int:
+        return len(self._entries())
+
+class LLMCache:
+    """Content-addressed cache of LLM completions.
+    
+    Keys are a SHA-256 of (method, model, system prompt, rendered prompt,
+    temperature, max_tokens), so identical requests share one stored
+    completion. Uses Redis when configured, otherwise a local directory
+    (LLM_CACHE_BACKEND=redis|disk|none overrides the choice).
+    """
+    
+    def __init__(self, backend=None):
+        ttl = int(os.getenv('LLM_CACHE_TTL', '604800'))
+        max_entries = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+        
+        if backend is None:
+            choice = os.getenv('LLM_CACHE_BACKEND', '').lower()
+            redis_client = get_redis_client() if choice in ('', 'redis') else None
+            
+            if redis_client is not None:
+                backend = RedisLLMBackend(redis_client, ttl, max_entries)
+            elif choice != 'none':
+                backend = DiskLLMBackend(
+                    os.getenv('LLM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'llm_cache')),
+                    ttl,
+                    max_entries,
+                    int(os.getenv('LLM_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+                )
+        
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'errors': 0}
+    
+    @staticmethod
+    def make_key(method: str, model: str, system: str, prompt: str,
+                 temperature: float, max_tokens: int = None) -> str:
+        material = json.dumps(
+            [method, model, system, prompt, round(float(temperature), 3), max_tokens],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+    
+    def get(self, key: str) -> Optional[str]:
+        if self.backend is None:
+            return None
+        
+        try:
+            content = self.backend.get(key)
+        except Exception as e:
+            print(f"LLM cache read error: {e}")
+            self.count('errors')
+            return None
+        
+        self.count('hits' if content is not None else 'misses')
+        return content
+    
+    def set(self, key: str, content: str):
+        if self.backend is None or not content:
+            return
+        
+        try:
+            self.backend.set(key, content)
+        except Exception as e:
+            print(f"LLM cache write error: {e}")
+            self.count('errors')
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['backend'] = type(self.backend).__name__ if self.backend else None
+        try:
+            stats['entries'] = self.backend.size() if self.backend else 0
+        except Exception:
+            stats['entries'] = None
+        return stats
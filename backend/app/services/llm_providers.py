@@ -0,0 +1,223 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+class ProviderError(Exception):
+    """A completion request failed and should not be retried"""
+
+class TransientProviderError(ProviderError):
+    """A completion request failed in a way worth retrying (timeout, 5xx, overload)"""
+
+class ProviderRateLimitError(TransientProviderError):
+    """The provider refused the request for quota reasons"""
+    
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMProvider:
+    """Chat completion backend used by AIAgentService.
+    
+    ``complete`` returns ``{'content': str, 'usage': {'prompt_tokens',
+    'completion_tokens', 'total_tokens'}}``. ``stream`` sends the request
+    immediately (so failures surface to the caller's retry loop) and returns an
+    iterator of text chunks; streamed responses carry no usage, so callers
+    count the text themselves.
+    """
+    
+    name = 'base'
+    
+    def complete(self, model: str, messages: List[Dict], max_tokens: int, temperature: float,
+                 timeout: float = None) -> Dict:
+        raise NotImplementedError
+    
+    def stream(self, model: str, messages: List[Dict], max_tokens: int, temperature: float,
+               timeout: float = None) -> Iterator[str]:
+        raise NotImplementedError
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI ChatCompletion API (openai<1.0)"""
+    
+    name = 'openai'
+    
+    def __init__(self, api_key: str = None):
+        if openai is None:
+            raise ProviderError('The openai package is not installed')
+        
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if self.api_key:
+            openai.api_key = self.api_key
+        
+        # Errors worth retrying: rate limits, timeouts and server-side failures
+        self.transient_errors = (
+            openai.error.Timeout,
+            openai.error.APIConnectionError,
+            openai.error.ServiceUnavailableError,
+            openai.error.TryAgain,
+            openai.error.APIError
+        )
+    
+    def _create(self, **kwargs):
+        try:
+            return openai.ChatCompletion.create(**kwargs)
+        except openai.error.RateLimitError as e:
+            headers = getattr(e, 'headers', None) or {}
+            try:
+                wait = float(headers.get('retry-after') or headers.get('Retry-After') or 0)
+            except (TypeError, ValueError):
+                wait = 0.0
+            raise ProviderRateLimitError(str(e), retry_after=wait) from e
+        except self.transient_errors as e:
+            raise TransientProviderError(f'{type(e).__name__}: {e}') from e
+        except openai.error.OpenAIError as e:
+            raise ProviderError(f'{type(e).__name__}: {e}') from e
+    
+    def complete(self, model, messages, max_tokens, temperature, timeout=None):
+        response = self._create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            request_timeout=timeout
+        )
+        
+        usage = getattr(response, 'usage', None)
+        return {
+            'content': response.choices[0].message.content.strip(),
+            'usage': {
+                'prompt_tokens': getattr(usage, 'prompt_tokens', 0) if usage else 0,
+                'completion_tokens': getattr(usage, 'completion_tokens', 0) if usage else 0,
+                'total_tokens': getattr(usage, 'total_tokens', 0) if usage else 0
+            }
+        }
+    
+    def stream(self, model, messages, max_tokens, temperature, timeout=None):
+        response = self._create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            request_timeout=timeout,
+            stream=True
+        )
+        
+        def chunks():
+            for chunk in response:
+                text = chunk.choices[0].delta.get('content')
+                if text:
+                    yield text
+        
+        return chunks()
+
+class LocalProvider(LLMProvider):
+    """Offline stand-in that returns deterministic text.
+    
+    The same messages always produce the same response, so outputs are stable
+    across runs and cacheable. ``latency`` seconds are spent before the first
+    token and ``tokens_per_second`` paces the rest, to mimic a real model.
+    ``error_rate`` and ``rate_limit_rate`` inject failures from a seeded RNG.
+    """
+    
+    name = 'local'
+    
+    WORDS = (
+        'delivered', 'managed', 'improved', 'designed', 'led', 'built', 'reduced', 'increased',
+        'stakeholders', 'processes', 'results', 'customers', 'systems', 'quality', 'teams',
+        'reporting', 'budgets', 'projects', 'growth', 'operations', 'strategy', 'compliance'
+    )
+    
+    def __init__(self, latency: float = None, tokens_per_second: float = None, error_rate: float = None,
+                 rate_limit_rate: float = None, seed: int = None):
+        self.latency = latency if latency is not None else float(os.getenv('LLM_LOCAL_LATENCY', '0'))
+        self.tokens_per_second = tokens_per_second if tokens_per_second is not None else \
+            float(os.getenv('LLM_LOCAL_TOKENS_PER_SECOND', '0'))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv('LLM_LOCAL_ERROR_RATE', '0'))
+        self.rate_limit_rate = rate_limit_rate if rate_limit_rate is not None else \
+            float(os.getenv('LLM_LOCAL_RATE_LIMIT_RATE', '0'))
+        self.random = random.Random(seed if seed is not None else int(os.getenv('LLM_LOCAL_SEED', '0')))
+        self._lock = threading.Lock()
+        self.calls = 0
+    
+    @staticmethod
+    def _count(text: str) -> int:
+        return len(text) // 4 + 1
+    
+    def _respond(self, model: str, messages: List[Dict], max_tokens: int) -> List[str]:
+        """Deterministic response for the messages, as word chunks within max_tokens"""
+        digest = hashlib.sha256(repr((model, messages)).encode('utf-8')).digest()
+        prompt = messages[-1]['content'] if messages else ''
+        
+        words = [f'[local:{digest[:4].hex()}]']
+        length = min(max_tokens, 40 + digest[4] % 120)
+        for i in range(length):
+            words.append(self.WORDS[digest[i % len(digest)] % len(self.WORDS)] + ('.' if i % 12 == 11 else ''))
+        
+        # Echo a little of the prompt so different inputs read differently
+        words.extend(prompt.split()[:8])
+        return [word + ' ' for word in words]
+    
+    def _maybe_fail(self):
+        with self._lock:
+            self.calls += 1
+            roll = self.random.random()
+        
+        if roll < self.rate_limit_rate:
+            raise ProviderRateLimitError('Simulated rate limit', retry_after=0.05)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise TransientProviderError('Simulated provider error')
+    
+    def _usage(self, messages: List[Dict], content: str) -> Dict:
+        prompt_tokens = sum(self._count(m['content']) for m in messages)
+        completion_tokens = self._count(content)
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    
+    def complete(self, model, messages, max_tokens, temperature, timeout=None):
+        self._maybe_fail()
+        
+        chunks = self._respond(model, messages, max_tokens)
+        content = ''.join(chunks).strip()
+        
+        delay = self.latency + (self._count(content) / self.tokens_per_second if self.tokens_per_second else 0)
+        if delay:
+            time.sleep(delay)
+        
+        return {'content': content, 'usage': self._usage(messages, content)}
+    
+    def stream(self, model, messages, max_tokens, temperature, timeout=None):
+        self._maybe_fail()
+        
+        chunks = self._respond(model, messages, max_tokens)
+        
+        def generate():
+            if self.latency:
+                time.sleep(self.latency)
+            for chunk in chunks:
+                if self.tokens_per_second:
+                    time.sleep(self._count(chunk) / self.tokens_per_second)
+                yield chunk
+        
+        return generate()
+
+PROVIDERS = {
+    'openai': OpenAIProvider,
+    'local': LocalProvider
+}
+
+def get_provider(name: str = None) -> LLMProvider:
+    """Provider named by ``name`` or LLM_PROVIDER (default ``openai``)"""
+    name = (name or os.getenv('LLM_PROVIDER', 'openai')).lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {name}")
+    return PROVIDERS[name]()
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+class LatencyTracker:
+    """Recent completion latencies per model, for p50/p95 estimates.
+    
+    Keeps at most ``window`` samples per model, and drops samples older than
+    ``max_age`` seconds so a past slowdown stops counting once it is over.
+    """
+    
+    def __init__(self, window: int = 200, max_age: float = None, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.max_age = max_age or float(os.getenv('LLM_ROUTER_WINDOW_SECONDS', '300'))
+        self.clock = clock
+        self._samples = {}
+        self._lock = threading.Lock()
+    
+    def _recent(self, model: str) -> List[float]:
+        """Latencies still inside the time window (expired ones are discarded); caller holds the lock"""
+        samples = self._samples.get(model)
+        if not samples:
+            return []
+        cutoff = self.clock() - self.max_age
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [seconds for _, seconds in samples]
+    
+    def record(self, model: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append((self.clock(), seconds))
+    
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._recent(model))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))]
+    
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._recent(model))
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            models = [model for model in self._samples if self._recent(model)]
+        return {
+            model: {
+                'samples': self.count(model),
+                'p50_ms': round(self.percentile(model, 50) * 1000, 1),
+                'p95_ms': round(self.percentile(model, 95) * 1000, 1)
+            }
+            for model in models
+        }
+
+class ModelRouter:
+    """Maps each AI task to a model tier, stepping down to faster tiers under deadline.
+    
+    Tiers run from slowest/strongest to fastest/cheapest. A task starts at its
+    configured tier; if that model's observed p95 latency (once it has
+    ``min_samples`` completions) would miss the task's deadline, the next
+    faster tier is tried, down to the fastest. While a tier is skipped, one
+    request every ``probe_interval`` seconds is still sent to it, so its
+    latency is re-measured and the task moves back once it is fast again.
+    """
+    
+    TIERS = ('premium', 'standard', 'fast')
+    
+    DEFAULT_MODELS = {
+        'premium': 'gpt-4',
+        'standard': 'gpt-4-turbo-preview',
+        'fast': 'gpt-3.5-turbo'
+    }
+    
+    # task: (tier, deadline in seconds)
+    DEFAULT_ROUTES = {
+        'enhance_resume': ('premium', 60),
+        'optimize_for_ats': ('standard', 45),
+        'generate_cover_letter': ('standard', 45),
+        'generate_follow_up_email': ('fast', 20),
+        'analyze_job_description': ('fast', 20)
+    }
+    
+    def __init__(self, models: Dict[str, str] = None, routes: Dict[str, Tuple[str, float]] = None,
+                 tracker: LatencyTracker = None, min_samples: int = None, probe_interval: float = None):
+        self.models = dict(self.DEFAULT_MODELS)
+        self.models['premium'] = os.getenv('OPENAI_MODEL', self.models['premium'])
+        for tier in self.TIERS:
+            env_model = os.getenv(f'LLM_MODEL_{tier.upper()}')
+            if env_model:
+                self.models[tier] = env_model
+        self.models.update(models or {})
+        
+        self.routes = dict(self.DEFAULT_ROUTES)
+        for task in self.routes:
+            env_route = os.getenv(f'LLM_ROUTE_{task.upper()}')  # e.g. "standard:30"
+            if env_route:
+                tier, _, deadline = env_route.partition(':')
+                self.routes[task] = (tier, float(deadline) if deadline else self.routes[task][1])
+        self.routes.update(routes or {})
+        
+        self.tracker = tracker or LatencyTracker()
+        self.min_samples = min_samples or int(os.getenv('LLM_ROUTER_MIN_SAMPLES', '10'))
+        self.probe_interval = probe_interval or float(os.getenv('LLM_ROUTER_PROBE_INTERVAL', '30'))
+        
+        self._lock = threading.Lock()
+        self._last_probe = {}
+        self.fallbacks = {}
+        self.probes = {}
+    
+    def _probe_due(self, model: str) -> bool:
+        """Whether a skipped ``model`` should get this request to re-measure it"""
+        now = self.tracker.clock()
+        with self._lock:
+            last = self._last_probe.setdefault(model, now)
+            if now - last < self.probe_interval:
+                return False
+            self._last_probe[model] = now
+            self.probes[model] = self.probes.get(model, 0) + 1
+            return True
+    
+    def choose(self, task: str) -> str:
+        """Model to use for ``task`` right now"""
+        tier, deadline = self.routes.get(task, ('premium', None))
+        start = self.TIERS.index(tier) if tier in self.TIERS else 0
+        
+        for candidate in self.TIERS[start:]:
+            model = self.models[candidate]
+            if deadline is None or self.tracker.count(model) < self.min_samples:
+                break
+            if self.tracker.percentile(model, 95) <= deadline or self._probe_due(model):
+                break
+        
+        if candidate != tier:
+            with self._lock:
+                self.fallbacks[task] = self.fallbacks.get(task, 0) + 1
+        return model
+    
+    def record(self, model: str, seconds: float):
+        self.tracker.record(model, seconds)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            fallbacks = dict(self.fallbacks)
+            probes = dict(self.probes)
+        return {
+            'routes': {
+                task: {'tier': tier, 'model': self.models.get(tier), 'deadline_s': deadline}
+                for task, (tier, deadline) in self.routes.items()
+            },
+            'latency': self.tracker.get_stats(),
+            'fallbacks': fallbacks,
+            'probes': probes
+        }
@@ -0,0 +1,225 @@
+import os
+import re
+import threading
+from typing import Dict, List, Set
+from app.services.document_processor import DocumentProcessor
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding('cl100k_base')
+except Exception:  # not installed, or encoding data unavailable offline
+    _ENCODING = None
+
+def count_tokens(text: str) -> int:
+    """Token count for GPT-4 prompts (about four characters per token without tiktoken)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'you', 'your', 'our', 'are', 'will', 'this', 'that',
+    'from', 'have', 'has', 'all', 'can', 'who', 'not', 'but', 'any', 'into', 'their',
+    'they', 'able', 'must', 'work', 'team', 'role', 'job', 'year', 'years', 'including'
+}
+
+# Lines that carry no information for the model
+BOILERPLATE = [
+    r'^(curriculum vitae|resume|r[ée]sum[ée]|cv)$',
+    r'references (are )?(available )?(up)?on request',
+    r'^page \d+( of \d+)?$',
+    r'^i hereby (declare|certify)',
+    r'^[\W_]+$',
+    r'equal opportunity employer',
+    r'^(apply now|click here to apply|share this job)',
+    r'we use cookies'
+]
+
+class PromptCompactor:
+    """Shrinks resumes and job descriptions to a token budget before prompting.
+    
+    Drops boilerplate and repeated lines first. If that is not enough, resume
+    sections are ranked by priority and overlap with the target job's terms,
+    and the weakest optional sections and then the least relevant lines are
+    removed until the text fits. Original order is always preserved.
+    
+    Trimming only suits prompts that read the resume (analysis, cover
+    letters). Rewrites such as resume enhancement return a resume that
+    replaces the original, so they use ``clean_resume``, which never drops
+    content.
+    """
+    
+    SECTION_PRIORITY = {
+        'header': 3.0,
+        'contact': 3.0,
+        'summary': 2.5,
+        'experience': 3.0,
+        'skills': 3.0,
+        'projects': 1.5,
+        'education': 1.5
+    }
+    REQUIRED_SECTIONS = {'header', 'contact', 'summary', 'experience', 'skills'}
+    
+    def __init__(self, resume_budget: int = None, job_budget: int = None):
+        self.resume_budget = resume_budget or int(os.getenv('PROMPT_RESUME_TOKEN_BUDGET', '1500'))
+        self.job_budget = job_budget or int(os.getenv('PROMPT_JOB_TOKEN_BUDGET', '600'))
+        self.processor = DocumentProcessor()
+        self.boilerplate = [re.compile(pattern, re.IGNORECASE) for pattern in BOILERPLATE]
+        
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'compacted': 0, 'tokens_in': 0, 'tokens_saved': 0}
+    
+    @staticmethod
+    def terms(*texts: str) -> Set[str]:
+        """Lower-cased content words used to judge relevance to the target job"""
+        words = set()
+        for text in texts:
+            if text:
+                words.update(w for w in re.findall(r'[a-z][a-z0-9+#.]{2,}', text.lower()) if w not in STOPWORDS)
+        return words
+    
+    def _clean_lines(self, text: str) -> List[str]:
+        seen = set()
+        lines = []
+        for line in (text or '').split('\n'):
+            line = re.sub(r'[ \t]+', ' ', line).strip()
+            if not line or any(pattern.search(line) for pattern in self.boilerplate):
+                continue
+            
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            lines.append(line)
+        return lines
+    
+    def _relevance(self, line: str, terms: Set[str]) -> float:
+        if not terms:
+            return 0.0
+        words = self.terms(line)
+        return len(words & terms) / (len(words) or 1)
+    
+    def _trim_lines(self, lines: List[str], budget: int, terms: Set[str]) -> List[str]:
+        """Drop the least relevant lines (later ones first on ties) until ``lines`` fit ``budget``"""
+        costs = [count_tokens(line) + 1 for line in lines]
+        total = sum(costs)
+        if total <= budget:
+            return lines
+        
+        order = sorted(range(len(lines)), key=lambda i: (self._relevance(lines[i], terms), -i))
+        dropped = set()
+        for i in order:
+            if total <= budget:
+                break
+            dropped.add(i)
+            total -= costs[i]
+        return [line for i, line in enumerate(lines) if i not in dropped]
+    
+    def _record(self, original: int, tokens: int):
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['tokens_in'] += original
+            self.stats['tokens_saved'] += original - tokens
+            if tokens < original:
+                self.stats['compacted'] += 1
+    
+    def compact_text(self, text: str, budget: int = None, terms: Set[str] = None) -> Dict:
+        """Compact free text such as a job description"""
+        budget = budget or self.job_budget
+        original = count_tokens(text)
+        
+        lines = self._trim_lines(self._clean_lines(text), budget, terms or set())
+        compacted = '\n'.join(lines)
+        tokens = count_tokens(compacted)
+        self._record(original, tokens)
+        
+        return {
+            'text': compacted,
+            'original_tokens': original,
+            'tokens': tokens,
+            'tokens_saved': original - tokens
+        }
+    
+    def clean_resume(self, resume: str) -> Dict:
+        """Lossless cleanup for prompts whose output replaces the resume: boilerplate and repeats only"""
+        original = count_tokens(resume)
+        cleaned = '\n'.join(self._clean_lines(resume))
+        tokens = count_tokens(cleaned)
+        self._record(original, tokens)
+        
+        return {
+            'text': cleaned,
+            'original_tokens': original,
+            'tokens': tokens,
+            'tokens_saved': original - tokens,
+            'dropped_sections': []
+        }
+    
+    def compact_resume(self, resume: str, budget: int = None, terms: Set[str] = None) -> Dict:
+        """Compact a resume section by section, keeping what matters for the target job"""
+        budget = budget or self.resume_budget
+        terms = terms or set()
+        original = count_tokens(resume)
+        
+        blocks = []
+        for section, heading, lines in self.processor.split_sections('\n'.join(self._clean_lines(resume))):
+            body = [heading] + lines if heading else lines
+            score = self.SECTION_PRIORITY.get(section, 1.0) + 2 * self._relevance(' '.join(lines), terms)
+            blocks.append({
+                'section': section,
+                'lines': body,
+                # Headings, names and contact details are never trimmed line by line
+                'keep': len(body) if section in ('header', 'contact') else (1 if heading else 0),
+                'score': score,
+                'tokens': sum(count_tokens(line) + 1 for line in body)
+            })
+        
+        total = sum(block['tokens'] for block in blocks)
+        dropped = []
+        
+        # Drop whole optional sections, weakest first
+        for block in sorted(blocks, key=lambda b: b['score']):
+            if total <= budget:
+                break
+            if block['section'] not in self.REQUIRED_SECTIONS:
+                dropped.append(block['section'])
+                total -= block['tokens']
+                block['lines'] = []
+        
+        # Then drop the weakest lines anywhere, scored by section and relevance to the job
+        if total > budget:
+            candidates = []
+            for b, block in enumerate(blocks):
+                for i in range(block['keep'], len(block['lines'])):
+                    line = block['lines'][i]
+                    score = block['score'] + self._relevance(line, terms)
+                    candidates.append((score, -i, b, count_tokens(line) + 1))
+            
+            removed = set()
+            for score, neg_i, b, cost in sorted(candidates):
+                if total <= budget:
+                    break
+                removed.add((b, -neg_i))
+                total -= cost
+            
+            for b, block in enumerate(blocks):
+                block['lines'] = [line for i, line in enumerate(block['lines']) if (b, i) not in removed]
+        
+        compacted = '\n'.join('\n'.join(block['lines']) for block in blocks if block['lines'])
+        tokens = count_tokens(compacted)
+        self._record(original, tokens)
+        
+        return {
+            'text': compacted,
+            'original_tokens': original,
+            'tokens': tokens,
+            'tokens_saved': original - tokens,
+            'dropped_sections': dropped
+        }
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['saved_ratio'] = round(stats['tokens_saved'] / stats['tokens_in'], 4) if stats['tokens_in'] else 0.0
+        return stats
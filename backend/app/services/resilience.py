@@ -0,0 +1,436 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+class SourceUnavailableError(Exception):
+    """Raised when a job board is skipped by its rate limiter or circuit breaker"""
+
+class QuotaExceededError(Exception):
+    """Raised when a call could not get under the shared quota in time"""
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff for retry ``attempt`` (1-based)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests per second, bursts up to ``capacity``"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def acquire(self, timeout: float = None) -> bool:
+        """Take one token, waiting up to ``timeout`` seconds; False if none became available"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class CircuitBreaker:
+    """Per-source circuit breaker, shared across workers through Redis when available.
+    
+    A source opens after ``failure_threshold`` consecutive failures, or at once
+    on a 429. While open every call is refused; after the cool-off a single
+    half-open probe is let through and its outcome closes or re-opens the
+    breaker. Each consecutive trip doubles the cool-off up to ``max_cool_off``.
+    """
+    
+    def __init__(self, redis_client=None, failure_threshold: int = None, cool_off: float = None,
+                 max_cool_off: float = None, prefix: str = 'breaker'):
+        self.redis = redis_client
+        self.failure_threshold = failure_threshold or int(os.getenv('SCRAPER_BREAKER_FAILURES', '3'))
+        self.cool_off = cool_off or float(os.getenv('SCRAPER_BREAKER_COOL_OFF', '60'))
+        self.max_cool_off = max_cool_off or float(os.getenv('SCRAPER_BREAKER_MAX_COOL_OFF', '900'))
+        self.prefix = prefix
+        
+        self._local = {}
+        self._probing = set()
+        self._lock = threading.Lock()
+    
+    def _key(self, name: str) -> str:
+        return f'{self.prefix}:{name}'
+    
+    def _load(self, name: str) -> Dict:
+        if self.redis is not None:
+            try:
+                raw = self.redis.hgetall(self._key(name))
+                return {k.decode(): float(v) for k, v in raw.items()}
+            except Exception as e:
+                print(f"Circuit breaker read error: {e}")
+        with self._lock:
+            return dict(self._local.get(name, {}))
+    
+    def _save(self, name: str, state: Dict):
+        if self.redis is not None:
+            try:
+                key = self._key(name)
+                pipe = self.redis.pipeline()
+                pipe.delete(key)
+                if state:
+                    pipe.hset(key, mapping=state)
+                    pipe.expire(key, int(self.max_cool_off * 2))
+                pipe.execute()
+                return
+            except Exception as e:
+                print(f"Circuit breaker write error: {e}")
+        with self._lock:
+            self._local[name] = dict(state)
+    
+    def _claim_probe(self, name: str) -> bool:
+        if self.redis is not None:
+            try:
+                return bool(self.redis.set(f'{self._key(name)}:probe', 1, nx=True, ex=30))
+            except Exception as e:
+                print(f"Circuit breaker probe error: {e}")
+        with self._lock:
+            if name in self._probing:
+                return False
+            self._probing.add(name)
+            return True
+    
+    def release_probe(self, name: str):
+        """Give back a claimed half-open probe without recording an outcome"""
+        if self.redis is not None:
+            try:
+                self.redis.delete(f'{self._key(name)}:probe')
+            except Exception:
+                pass
+        with self._lock:
+            self._probing.discard(name)
+    
+    def state(self, name: str) -> str:
+        opened_until = self._load(name).get('opened_until', 0)
+        if not opened_until:
+            return 'closed'
+        return 'open' if time.time() < opened_until else 'half_open'
+    
+    def allow(self, name: str) -> bool:
+        """Whether a call to ``name`` may go ahead right now"""
+        state = self.state(name)
+        if state == 'closed':
+            return True
+        if state == 'open':
+            return False
+        return self._claim_probe(name)
+    
+    def record_success(self, name: str):
+        if self._load(name):
+            self._save(name, {})
+            self.release_probe(name)
+    
+    def record_failure(self, name: str, rate_limited: bool = False):
+        state = self._load(name)
+        failures = state.get('failures', 0) + 1
+        half_open = state.get('opened_until', 0) and time.time() >= state['opened_until']
+        
+        if rate_limited or half_open or failures >= self.failure_threshold:
+            trips = state.get('trips', 0) + 1
+            cool_off = min(self.max_cool_off, self.cool_off * 2 ** (trips - 1))
+            state = {'failures': 0, 'trips': trips, 'opened_until': time.time() + cool_off}
+            print(f"Circuit opened for {name} for {cool_off:.0f}s")
+        else:
+            state = dict(state, failures=failures)
+        
+        self._save(name, state)
+        self.release_probe(name)
+
+class QuotaLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared across workers.
+    
+    Usage is counted in Redis (when available) over a sliding window estimated
+    from the current and previous fixed windows, so every gunicorn worker draws
+    on the same quota. Callers in one process are served first come, first
+    served; only the caller at the head of the queue polls the shared counters.
+    ``pause`` blocks everyone until a Retry-After has passed.
+    """
+    
+    RESERVE_SCRIPT = """
+    local blocked = redis.call('PTTL', KEYS[3])
+    if blocked > 0 then return blocked end
+    local weight = 1 - tonumber(ARGV[4])
+    local pr = tonumber(redis.call('HGET', KEYS[2], 'r') or '0')
+    local pt = tonumber(redis.call('HGET', KEYS[2], 't') or '0')
+    local cr = tonumber(redis.call('HGET', KEYS[1], 'r') or '0')
+    local ct = tonumber(redis.call('HGET', KEYS[1], 't') or '0')
+    local tokens = tonumber(ARGV[3])
+    if pr * weight + cr + 1 > tonumber(ARGV[1]) or pt * weight + ct + tokens > tonumber(ARGV[2]) then
+        return -1
+    end
+    redis.call('HINCRBY', KEYS[1], 'r', 1)
+    redis.call('HINCRBY', KEYS[1], 't', tokens)
+    redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[5]))
+    return 0
+    """
+    
+    def __init__(self, redis_client=None, requests_per_minute: int = None, tokens_per_minute: int = None,
+                 window: float = 60.0, prefix: str = 'quota:openai'):
+        self.redis = redis_client
+        self.requests_per_minute = requests_per_minute or int(os.getenv('OPENAI_RPM', '500'))
+        self.tokens_per_minute = tokens_per_minute or int(os.getenv('OPENAI_TPM', '40000'))
+        self.window = window
+        self.prefix = prefix
+        self._script = redis_client.register_script(self.RESERVE_SCRIPT) if redis_client is not None else None
+        
+        self._local = {}
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        
+        # FIFO ticket queue for callers in this process
+        self._turn = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()
+        
+        self.stats = {'reserved': 0, 'waited': 0, 'timeouts': 0, 'pauses': 0}
+    
+    def _windows(self) -> Tuple[int, float]:
+        now = time.time()
+        return int(now // self.window), (now % self.window) / self.window
+    
+    def _reserve_local(self, tokens: int) -> float:
+        window, elapsed = self._windows()
+        with self._lock:
+            if time.time() < self._blocked_until:
+                return self._blocked_until - time.time()
+            
+            current = self._local.setdefault(window, [0, 0])
+            previous = self._local.get(window - 1, [0, 0])
+            for old in [w for w in self._local if w < window - 1]:
+                del self._local[old]
+            
+            weight = 1 - elapsed
+            if (previous[0] * weight + current[0] + 1 > self.requests_per_minute or
+                    previous[1] * weight + current[1] + tokens > self.tokens_per_minute):
+                return -1
+            
+            current[0] += 1
+            current[1] += tokens
+            return 0
+    
+    def _reserve(self, tokens: int) -> float:
+        """0 when reserved, -1 when over quota, else seconds until a pause ends"""
+        if self._script is not None:
+            window, elapsed = self._windows()
+            try:
+                result = self._script(
+                    keys=[f'{self.prefix}:{window}', f'{self.prefix}:{window - 1}', f'{self.prefix}:blocked'],
+                    args=[self.requests_per_minute, self.tokens_per_minute, tokens, elapsed, int(self.window * 2000)]
+                )
+                return result / 1000 if result > 0 else result
+            except Exception as e:
+                print(f"Quota limiter error, using local quota: {e}")
+        return self._reserve_local(tokens)
+    
+    def _advance(self):
+        with self._turn:
+            self._serving += 1
+            while self._serving in self._abandoned:
+                self._abandoned.discard(self._serving)
+                self._serving += 1
+            self._turn.notify_all()
+    
+    def acquire(self, tokens: int = 0, timeout: float = None) -> bool:
+        """Reserve one request and ``tokens`` tokens, waiting in line up to ``timeout`` seconds"""
+        tokens = min(max(tokens, 0), self.tokens_per_minute)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        with self._turn:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._abandoned.add(ticket)
+                    self.stats['timeouts'] += 1
+                    return False
+                self._turn.wait(remaining)
+        
+        try:
+            waited = False
+            while True:
+                wait = self._reserve(tokens)
+                if wait == 0:
+                    self.stats['reserved'] += 1
+                    self.stats['waited'] += int(waited)
+                    return True
+                
+                # Over quota: poll again shortly (with jitter so workers don't align)
+                wait = wait if wait > 0 else random.uniform(0.5, 1.0) * min(1.0, self.window / 60)
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    self.stats['timeouts'] += 1
+                    return False
+                waited = True
+                time.sleep(wait)
+        finally:
+            self._advance()
+    
+    def pause(self, seconds: float):
+        """Hold every caller (in all workers) for ``seconds``, e.g. after a 429 with Retry-After"""
+        if seconds <= 0:
+            return
+        self.stats['pauses'] += 1
+        
+        if self.redis is not None:
+            try:
+                self.redis.set(f'{self.prefix}:blocked', 1, px=int(seconds * 1000))
+                return
+            except Exception as e:
+                print(f"Quota limiter pause error: {e}")
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.time() + seconds)
+    
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
+class SingleFlight:
+    """Coalesces concurrent identical calls so only one of them does the work.
+    
+    Within a process, the first caller for a key runs the function and later
+    callers wait on its result (or its exception). Across workers, the running
+    caller also holds a Redis lock; a worker that finds the lock taken polls
+    for the holder's published result instead of repeating the call, and runs
+    the call itself only if the holder fails or ``wait_timeout`` passes.
+    Results must be JSON-serialisable to be shared between workers.
+    """
+    
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+    
+    def __init__(self, redis_client=None, lock_ttl: float = None, wait_timeout: float = None,
+                 poll_interval: float = None, prefix: str = 'singleflight'):
+        self.redis = redis_client
+        self.lock_ttl = lock_ttl or float(os.getenv('SINGLE_FLIGHT_LOCK_TTL', '120'))
+        self.wait_timeout = wait_timeout or float(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', '180'))
+        self.poll_interval = poll_interval or float(os.getenv('SINGLE_FLIGHT_POLL_INTERVAL', '0.2'))
+        self.prefix = prefix
+        self._release = redis_client.register_script(self.RELEASE_SCRIPT) if redis_client is not None else None
+        
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'coalesced': 0, 'remote_waits': 0, 'remote_hits': 0}
+    
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Result of ``fn()``, shared with any identical call already in flight"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        
+        if not leader:
+            self._count('coalesced')
+            return future.result(timeout=self.wait_timeout)
+        
+        try:
+            result = self._run_shared(key, fn)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+    
+    def _run(self, fn: Callable[[], Any]) -> Any:
+        self._count('calls')
+        return fn()
+    
+    def _run_shared(self, key: str, fn: Callable[[], Any]) -> Any:
+        if self.redis is None:
+            return self._run(fn)
+        
+        lock_key = f'{self.prefix}:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        
+        while time.monotonic() < deadline:
+            token = uuid.uuid4().hex
+            try:
+                acquired = self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+                holder = None if acquired else self.redis.get(lock_key)
+            except Exception as e:
+                print(f"Single-flight lock error, running locally: {e}")
+                return self._run(fn)
+            
+            if acquired:
+                try:
+                    result = self._run(fn)
+                    try:
+                        self.redis.set(f'{lock_key}:{token}', json.dumps(result), px=int(self.wait_timeout * 1000))
+                    except Exception as e:
+                        print(f"Single-flight publish error: {e}")
+                    return result
+                finally:
+                    try:
+                        self._release(keys=[lock_key], args=[token])
+                    except Exception:
+                        pass
+            
+            if holder is None:
+                continue  # released between SET and GET
+            
+            # Another worker is making this call: wait for its result
+            if not waited:
+                waited = True
+                self._count('remote_waits')
+            result = self._wait_for(lock_key, holder, deadline)
+            if result is not None:
+                self._count('remote_hits')
+                return json.loads(result)
+        
+        return self._run(fn)
+    
+    def _wait_for(self, lock_key: str, holder, deadline: float):
+        """Result published by the call holding the lock as ``holder``; None if it ends without one"""
+        token = holder.decode() if isinstance(holder, bytes) else holder
+        result_key = f'{lock_key}:{token}'
+        
+        while time.monotonic() < deadline:
+            try:
+                finished = self.redis.get(lock_key) != holder
+                result = self.redis.get(result_key)
+            except Exception as e:
+                print(f"Single-flight wait error: {e}")
+                return None
+            
+            if result is not None or finished:
+                return result
+            time.sleep(self.poll_interval)
+        return None
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._inflight)
+        return stats
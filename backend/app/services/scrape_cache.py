@@ -0,0 +1,272 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+class LRUCache:
+    """Small thread-safe LRU map used as the in-process cache tier"""
+    
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def __len__(self):
+        return len(self._data)
+
+class ScrapeCache:
+    """Two-tier (in-process LRU + Redis) cache of scraped job lists.
+    
+    Entries are keyed by (source, keywords, location, page) after normalisation and
+    stay fresh for the source's TTL. After that they can still be served for
+    ``stale_ttl`` seconds while a single background refresh re-scrapes the
+    board, so hot queries never wait on a live scrape.
+    """
+    
+    DEFAULT_TTLS = {
+        'indeed': 900,
+        'careerjet': 1800,
+        'careers24': 1800
+    }
+    
+    def __init__(self, redis_client=None, maxsize: int = None, ttls: Dict[str, int] = None,
+                 stale_ttl: int = None, prefix: str = 'scrape'):
+        self.redis = redis_client
+        self.local = LRUCache(maxsize or int(os.getenv('SCRAPE_CACHE_SIZE', '512')))
+        self.ttls = dict(self.DEFAULT_TTLS)
+        for source in self.ttls:
+            env_ttl = os.getenv(f'SCRAPE_CACHE_TTL_{source.upper()}')
+            if env_ttl:
+                self.ttls[source] = int(env_ttl)
+        self.ttls.update(ttls or {})
+        self.default_ttl = int(os.getenv('SCRAPE_CACHE_TTL', '900'))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else int(os.getenv('SCRAPE_CACHE_STALE_TTL', '3600'))
+        self.prefix = prefix
+        
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'local_hits': 0,
+            'redis_hits': 0,
+            'refreshes': 0,
+            'errors': 0
+        }
+    
+    @staticmethod
+    def normalise_keywords(keywords: str) -> str:
+        return re.sub(r'\s+', ' ', (keywords or '').strip().lower())
+    
+    @staticmethod
+    def normalise_location(location: str) -> str:
+        """Reduce a town or region to its slug ('Kempton Park' -> 'kempton-park')"""
+        return re.sub(r'[\s_]+', '-', (location or '').strip().lower())
+    
+    def make_key(self, source: str, keywords: str, location: str, page: int = 0) -> str:
+        return ':'.join([
+            self.prefix,
+            source,
+            self.normalise_keywords(keywords),
+            self.normalise_location(location),
+            str(page)
+        ])
+    
+    def ttl_for(self, source: str) -> int:
+        return self.ttls.get(source, self.default_ttl)
+    
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+    
+    def _read(self, key: str) -> Optional[Dict]:
+        entry = self.local.get(key)
+        if entry is not None:
+            self._count('local_hits')
+            return entry
+        
+        if self.redis is None:
+            return None
+        
+        try:
+            raw = self.redis.get(key)
+        except Exception as e:
+            self._count('errors')
+            print(f"Scrape cache read error: {e}")
+            return None
+        
+        if raw is None:
+            return None
+        
+        entry = json.loads(raw)
+        self.local.set(key, entry)
+        self._count('redis_hits')
+        return entry
+    
+    def _write(self, key: str, entry: Dict, source: str):
+        self.local.set(key, entry)
+        
+        if self.redis is None:
+            return
+        
+        try:
+            self.redis.set(key, json.dumps(entry), ex=self.ttl_for(source) + self.stale_ttl)
+        except Exception as e:
+            self._count('errors')
+            print(f"Scrape cache write error: {e}")
+    
+    def get(self, source: str, keywords: str, location: str, page: int = 0) -> Optional[Dict]:
+        """Return ``{'jobs', 'stored_at', 'fresh'}`` or None when nothing usable is cached"""
+        entry = self._read(self.make_key(source, keywords, location, page))
+        if entry is None:
+            return None
+        
+        age = time.time() - entry['stored_at']
+        ttl = self.ttl_for(source)
+        if age >= ttl + self.stale_ttl:
+            return None
+        
+        return dict(entry, fresh=age < ttl)
+    
+    def set(self, source: str, keywords: str, location: str, jobs: List[Dict], page: int = 0):
+        # Empty lists are usually a failed or blocked scrape; don't pin them
+        if not jobs:
+            return
+        
+        entry = {'jobs': jobs, 'stored_at': time.time()}
+        self._write(self.make_key(source, keywords, location, page), entry, source)
+    
+    def get_or_fetch(self, source: str, keywords: str, location: str,
+                     fetch: Callable[[], List[Dict]], executor=None, page: int = 0) -> List[Dict]:
+        """Serve from cache, falling back to ``fetch`` on a miss.
+        
+        A stale hit is returned immediately and, when an executor is given,
+        refreshed in the background (at most one refresh per key at a time).
+        """
+        cached = self.get(source, keywords, location, page)
+        
+        if cached is not None and cached['fresh']:
+            self._count('hits')
+            return cached['jobs']
+        
+        if cached is not None and executor is not None:
+            self._count('stale_hits')
+            self._schedule_refresh(source, keywords, location, fetch, executor, page)
+            return cached['jobs']
+        
+        self._count('misses')
+        jobs = fetch()
+        self.set(source, keywords, location, jobs, page)
+        return jobs
+    
+    def _schedule_refresh(self, source: str, keywords: str, location: str, fetch, executor, page: int = 0):
+        key = self.make_key(source, keywords, location, page)
+        
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                self.set(source, keywords, location, fetch(), page)
+                self._count('refreshes')
+            except Exception as e:
+                print(f"Scrape cache refresh error for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        try:
+            executor.submit(refresh)
+        except RuntimeError:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+        stats['local_entries'] = len(self.local)
+        return stats
+
+class PageValidatorStore:
+    """Conditional-GET validators and extracted jobs per (source, params).
+    
+    Holds the ETag, Last-Modified and body hash of the last response for each
+    results page, plus the jobs extracted from it, so an unchanged page can be
+    answered without downloading or parsing it again.
+    """
+    
+    def __init__(self, redis_client=None, maxsize: int = None, ttl: int = None, prefix: str = 'page'):
+        self.redis = redis_client
+        self.local = LRUCache(maxsize or int(os.getenv('PAGE_VALIDATOR_CACHE_SIZE', '1024')))
+        self.ttl = ttl or int(os.getenv('PAGE_VALIDATOR_TTL', '86400'))
+        self.prefix = prefix
+        
+        self._lock = threading.Lock()
+        self.stats = {'not_modified': 0, 'unchanged': 0, 'parsed': 0}
+    
+    def make_key(self, source: str, params: Dict) -> str:
+        query = '&'.join(f'{k}={str(v).strip().lower()}' for k, v in sorted(params.items()))
+        return f'{self.prefix}:{source}:{query}'
+    
+    def count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+    
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self.local.get(key)
+        if entry is not None or self.redis is None:
+            return entry
+        
+        try:
+            raw = self.redis.get(key)
+        except Exception as e:
+            print(f"Page validator read error: {e}")
+            return None
+        
+        if raw is None:
+            return None
+        
+        entry = json.loads(raw)
+        self.local.set(key, entry)
+        return entry
+    
+    def set(self, key: str, entry: Dict):
+        self.local.set(key, entry)
+        
+        if self.redis is None:
+            return
+        
+        try:
+            self.redis.set(key, json.dumps(entry), ex=self.ttl)
+        except Exception as e:
+            print(f"Page validator write error: {e}")
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,102 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List
+
+class Stage:
+    """One step of a pipeline.
+    
+    ``fn(inputs)`` is called with ``{name: value}`` for each stage listed in
+    ``after``. Stages run on worker threads, so they should work on plain
+    values and leave database access to the caller.
+    """
+    
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Any], after: Iterable[str] = (),
+                 timeout: float = None):
+        self.name = name
+        self.fn = fn
+        self.after = tuple(after)
+        self.timeout = timeout
+
+class StageGraph:
+    """Runs each stage as soon as the stages it depends on have finished.
+    
+    Independent stages run concurrently, so a graph takes as long as its
+    slowest path rather than the sum of its stages. A stage that raises or
+    outlives its ``timeout`` is recorded as ``failed`` or ``timed_out`` and
+    the stages after it are ``skipped``; other branches carry on, so the
+    caller gets every result that could still be produced. A timed-out stage
+    can't be interrupted: its thread finishes in the background and its
+    result is discarded.
+    """
+    
+    def __init__(self, stages: List[Stage], max_workers: int = None):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            unknown = [name for name in stage.after if name not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {', '.join(unknown)}")
+        self.max_workers = max_workers or int(os.getenv('PIPELINE_MAX_WORKERS', '0')) or len(stages)
+    
+    def run(self, on_finish: Callable[[str, Dict], None] = None) -> Dict[str, Dict]:
+        """Run every stage; returns ``{name: {status, value, error, seconds}}``.
+        
+        ``on_finish(name, outcome)`` is called from the calling thread as each
+        stage ends, e.g. to report progress.
+        """
+        outcomes = {}
+        pending = dict(self.stages)
+        running = {}
+        
+        def finish(name, status, value=None, error=None, seconds=0.0):
+            outcomes[name] = {'status': status, 'value': value, 'error': error, 'seconds': round(seconds, 3)}
+            if on_finish:
+                on_finish(name, outcomes[name])
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline-stage')
+        try:
+            while pending or running:
+                # Start stages whose inputs are ready; skip those whose inputs never will be
+                scheduled = True
+                while scheduled:
+                    scheduled = False
+                    for name, stage in list(pending.items()):
+                        blocked = [dep for dep in stage.after if dep in outcomes and outcomes[dep]['status'] != 'finished']
+                        if blocked:
+                            finish(name, 'skipped', error=f"{blocked[0]} {outcomes[blocked[0]]['status']}")
+                        elif all(dep in outcomes for dep in stage.after):
+                            inputs = {dep: outcomes[dep]['value'] for dep in stage.after}
+                            running[executor.submit(stage.fn, inputs)] = (stage, time.monotonic())
+                        else:
+                            continue
+                        del pending[name]
+                        scheduled = True
+                
+                if not running:
+                    if pending:
+                        raise ValueError(f"Stage dependencies form a cycle: {', '.join(pending)}")
+                    break
+                
+                deadlines = [started + stage.timeout for stage, started in running.values() if stage.timeout]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                now = time.monotonic()
+                for future, (stage, started) in list(running.items()):
+                    if future in done:
+                        error = future.exception()
+                        if error is None:
+                            finish(stage.name, 'finished', value=future.result(), seconds=now - started)
+                        else:
+                            finish(stage.name, 'failed', error=str(error) or type(error).__name__, seconds=now - started)
+                    elif stage.timeout and now - started >= stage.timeout:
+                        future.cancel()
+                        finish(stage.name, 'timed_out', error=f'no result after {stage.timeout:g}s',
+                               seconds=now - started)
+                    else:
+                        continue
+                    del running[future]
+        finally:
+            executor.shutdown(wait=False)
+        
+        return outcomes
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from app.utils.redis_client import get_redis_client
+
+class TaskQueue:
+    """Background task runner with pollable status and progress.
+    
+    With Redis configured, ``enqueue`` pushes the task onto a Redis list and
+    ``flask run-worker`` processes execute it; status lives in Redis so any web
+    worker can report it. Without Redis (or when testing) tasks run on an
+    in-process thread pool and status is kept in memory.
+    
+    Handlers are called as ``handler(payload, progress)`` inside an app
+    context, where ``progress(stage, percent)`` updates the task status.
+    
+    A running task refreshes its ``updated_at`` every few seconds. A task
+    left ``queued`` or ``running`` with no update for ``TASK_STALE_AFTER``
+    seconds (its worker crashed or was redeployed) is reported as
+    ``failed``, so callers can enqueue it again; if a queued copy is picked
+    up later anyway, it is skipped.
+    """
+    
+    def __init__(self, app=None):
+        self.handlers = {}
+        self.redis = None
+        self.app = None
+        self.executor = None
+        self.queue_key = 'tasks:queue'
+        self.status_ttl = int(os.getenv('TASK_STATUS_TTL', '86400'))
+        self.stale_after = float(os.getenv('TASK_STALE_AFTER', '300'))
+        self.heartbeat_interval = self.stale_after / 5
+        
+        self._local = {}
+        self._lock = threading.Lock()
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        self.redis = None if app.testing else get_redis_client()
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('TASK_WORKERS', '4')),
+            thread_name_prefix='task-worker'
+        )
+    
+    def register(self, name: str, handler: Callable):
+        self.handlers[name] = handler
+    
+    def _status_key(self, task_id: str) -> str:
+        return f'tasks:status:{task_id}'
+    
+    def _read_status(self, task_id: str) -> Optional[Dict]:
+        if self.redis is not None:
+            raw = self.redis.get(self._status_key(task_id))
+            return json.loads(raw) if raw else None
+        with self._lock:
+            status = self._local.get(task_id)
+            return dict(status) if status else None
+    
+    def _is_stale(self, status: Dict) -> bool:
+        if status.get('state') not in ('queued', 'running') or not status.get('updated_at'):
+            return False
+        idle = datetime.utcnow() - datetime.fromisoformat(status['updated_at'])
+        return idle.total_seconds() > self.stale_after
+    
+    def get_status(self, task_id: str) -> Optional[Dict]:
+        status = self._read_status(task_id)
+        if status and self._is_stale(status):
+            # The worker died (crash or deploy) without reporting back
+            self.update(task_id, state='failed', error=f"Task abandoned: no progress for {self.stale_after:g}s")
+            status = self._read_status(task_id)
+        return status
+    
+    def update(self, task_id: str, **fields):
+        status = self._read_status(task_id) or {'id': task_id}
+        status.update(fields, updated_at=datetime.utcnow().isoformat())
+        
+        if self.redis is not None:
+            self.redis.set(self._status_key(task_id), json.dumps(status), ex=self.status_ttl)
+        else:
+            with self._lock:
+                self._local[task_id] = status
+    
+    def enqueue(self, name: str, payload: Dict) -> str:
+        """Queue ``name`` with ``payload`` and return its task ID"""
+        if name not in self.handlers:
+            raise ValueError(f"Unknown task: {name}")
+        
+        task_id = str(uuid.uuid4())
+        self.update(
+            task_id,
+            name=name,
+            state='queued',
+            stage=None,
+            progress=0,
+            result=None,
+            error=None,
+            created_at=datetime.utcnow().isoformat()
+        )
+        
+        if self.redis is not None:
+            self.redis.lpush(self.queue_key, json.dumps({'id': task_id, 'name': name, 'payload': payload}))
+        else:
+            self.executor.submit(self._run, task_id, name, payload)
+        
+        return task_id
+    
+    def _run(self, task_id: str, name: str, payload: Dict):
+        status = self.get_status(task_id)
+        if status and status.get('state') == 'failed':
+            # Given up on while queued; the caller may already have enqueued a replacement
+            return
+        
+        # Heartbeats and progress share a lock so neither writes back a stale copy of the other
+        beat_lock = threading.Lock()
+        stopped = threading.Event()
+        
+        def progress(stage: str, percent: int):
+            with beat_lock:
+                self.update(task_id, stage=stage, progress=percent)
+        
+        def heartbeat():
+            while not stopped.wait(self.heartbeat_interval):
+                with beat_lock:
+                    self.update(task_id)
+        
+        self.update(task_id, state='running', started_at=datetime.utcnow().isoformat())
+        beater = threading.Thread(target=heartbeat, name=f'task-heartbeat-{task_id[:8]}', daemon=True)
+        beater.start()
+        
+        with self.app.app_context():
+            try:
+                result = self.handlers[name](payload, progress)
+                outcome = {'state': 'finished', 'progress': 100, 'result': result}
+            except Exception as e:
+                outcome = {'state': 'failed', 'error': str(e)}
+            finally:
+                stopped.set()
+                beater.join()
+            self.update(task_id, **outcome)
+    
+    def work(self, concurrency: int = None, poll_timeout: int = 5):
+        """Consume tasks from Redis forever (the ``flask run-worker`` loop)"""
+        if self.redis is None:
+            raise RuntimeError("REDIS_URL must be set to run a task worker")
+        
+        slots = threading.Semaphore(concurrency or int(os.getenv('TASK_WORKERS', '4')))
+        
+        while True:
+            slots.acquire()
+            item = self.redis.brpop(self.queue_key, timeout=poll_timeout)
+            if item is None:
+                slots.release()
+                continue
+            
+            message = json.loads(item[1])
+            
+            def run(message=message):
+                try:
+                    self._run(message['id'], message['name'], message['payload'])
+                finally:
+                    slots.release()
+            
+            self.executor.submit(run)
+    
+    def stream_status(self, task_id: str, interval: float = 0.5, timeout: float = 600):
+        """Yield status dicts whenever they change, until the task finishes or fails"""
+        last = None
+        deadline = time.monotonic() + timeout
+        
+        while time.monotonic() < deadline:
+            status = self.get_status(task_id)
+            if status != last:
+                last = status
+                yield status
+            if status is None or status.get('state') in ('finished', 'failed'):
+                return
+            time.sleep(interval)
@@ -0,0 +1,27 @@
+import os
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+_client = None
+_lock = threading.Lock()
+
+def get_redis_client():
+    """Return the shared Redis client, or None when Redis is not configured"""
+    global _client
+    
+    url = os.getenv('REDIS_URL')
+    if not url or redis is None:
+        return None
+    
+    with _lock:
+        if _client is None:
+            _client = redis.Redis.from_url(
+                url,
+                socket_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5')),
+                socket_connect_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5'))
+            )
+    return _client
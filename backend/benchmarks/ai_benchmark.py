@@ -0,0 +1,152 @@
+"""Offline AI pipeline benchmark against the local LLM stand-in.
+
+Runs ``enhance_resume`` calls from a pool of concurrent clients, then one
+batched ``generate_cover_letters`` over a set of job matches, with
+``LocalProvider`` simulating model latency, streaming speed and failures.
+Reports calls/sec, tokens/sec, latency percentiles and retries, so changes to
+the quota limiter, retry policy, batching or caching can be measured without
+network access or an API key.
+
+    python -m benchmarks.ai_benchmark [--calls 40] [--concurrency 8] [--latency 0.2] [--json out.json]
+"""
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.services.ai_agent import AIAgentService
+from app.services.llm_cache import DiskLLMBackend, LLMCache
+from app.services.llm_providers import LocalProvider
+from app.services.resilience import QuotaLimiter
+
+RESUME = """Jane Doe
+jane@example.com
+Summary
+Accountant with eight years in audit and financial reporting.
+Experience
+Senior Accountant, Acme Holdings - month-end close, IFRS reporting, audit liaison
+Accountant, Beta Retail - reconciliations, VAT returns, payroll
+Skills
+IFRS, Excel, Sage, Pastel, SAP
+Education
+BCom Accounting, University of Johannesburg"""
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def build_service(cache_dir: str, latency: float, tokens_per_second: float, error_rate: float,
+                  rate_limit_rate: float, rpm: int, tpm: int, concurrency: int) -> AIAgentService:
+    provider = LocalProvider(
+        latency=latency,
+        tokens_per_second=tokens_per_second,
+        error_rate=error_rate,
+        rate_limit_rate=rate_limit_rate,
+        seed=1
+    )
+    service = AIAgentService(
+        cache=LLMCache(DiskLLMBackend(cache_dir, ttl=3600, max_entries=10000, max_bytes=64 * 1024 * 1024)),
+        limiter=QuotaLimiter(requests_per_minute=rpm, tokens_per_minute=tpm),
+        provider=provider
+    )
+    service.retry_base = 0.05
+    service.batch_concurrency = concurrency
+    service.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ai-batch')
+    return service
+
+def run(calls: int = 40, concurrency: int = 8, jobs: int = 20, latency: float = 0.2,
+        tokens_per_second: float = 0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+        rpm: int = 100000, tpm: int = 100000000, use_cache: bool = False) -> dict:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = build_service(cache_dir, latency, tokens_per_second, error_rate, rate_limit_rate,
+                                rpm, tpm, concurrency)
+        
+        # Single calls from concurrent clients, each with a distinct resume
+        latencies = []
+        
+        def call(i):
+            started = time.perf_counter()
+            result = service.enhance_resume(f'{RESUME}\nReference number {i}', 'Accountant', 'Finance',
+                                            use_cache=use_cache)
+            latencies.append(time.perf_counter() - started)
+            return result['success']
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            succeeded = sum(clients.map(call, range(calls)))
+        single_elapsed = time.perf_counter() - started
+        single_usage = service.get_usage()
+        
+        # One batch of cover letters for an application's job matches
+        matches = [
+            {'title': f'Accountant {i}', 'company': f'Company {i}', 'location': 'Johannesburg',
+             'snippet': 'Month-end close, IFRS reporting and audit support.'}
+            for i in range(jobs)
+        ]
+        started = time.perf_counter()
+        letters = list(service.generate_cover_letters(RESUME, matches, use_cache=use_cache))
+        batch_elapsed = time.perf_counter() - started
+        
+        usage = service.get_usage()
+        provider_calls = service.provider.calls
+    
+    return {
+        'provider': 'local',
+        'latency_s': latency,
+        'concurrency': concurrency,
+        'single': {
+            'calls': calls,
+            'succeeded': succeeded,
+            'seconds': round(single_elapsed, 4),
+            'calls_per_sec': round(calls / single_elapsed, 2),
+            'tokens_per_sec': round(single_usage['total_tokens'] / single_elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1)
+        },
+        'batch': {
+            'jobs': jobs,
+            'written': sum(1 for letter in letters if letter['success']),
+            'seconds': round(batch_elapsed, 4),
+            'letters_per_sec': round(jobs / batch_elapsed, 2)
+        },
+        'total_tokens': usage['total_tokens'],
+        'provider_calls': provider_calls,
+        'retries': provider_calls - usage['requests'],
+        'quota': service.limiter.get_stats(),
+        'cache': service.cache.get_stats()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--jobs', type=int, default=20, help='Job matches in the cover-letter batch')
+    parser.add_argument('--latency', type=float, default=0.2, help='Simulated seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=0, help='Simulated generation speed (0 = instant)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--rpm', type=int, default=100000)
+    parser.add_argument('--tpm', type=int, default=100000000)
+    parser.add_argument('--cache', action='store_true', help='Let repeated prompts hit the LLM cache')
+    parser.add_argument('--json', dest='json_path', default=None, help='Also write the results to this file')
+    args = parser.parse_args()
+    
+    result = run(args.calls, args.concurrency, args.jobs, args.latency, args.tokens_per_second,
+                 args.error_rate, args.rate_limit_rate, args.rpm, args.tpm, args.cache)
+    
+    single, batch = result['single'], result['batch']
+    print(f"single calls:  {single['succeeded']}/{single['calls']} in {single['seconds']}s "
+          f"({single['calls_per_sec']} calls/sec, {single['tokens_per_sec']} tokens/sec)")
+    print(f"latency:       p50 {single['p50_ms']} ms, p95 {single['p95_ms']} ms")
+    print(f"cover letters: {batch['written']}/{batch['jobs']} in {batch['seconds']}s "
+          f"({batch['letters_per_sec']} letters/sec)")
+    print(f"retries:       {result['retries']} ({result['quota']['pauses']} rate-limit pauses)")
+    
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Per-page CPU time of the scraper HTML parsing backends.
+
+Builds synthetic results pages shaped like each job board (cards buried in
+navigation, scripts and filler markup) and times ``parse_cards`` with every
+available parser, both restricted to the cards and building the full tree.
+
+    python -m benchmarks.parse_benchmark [--pages 50] [--cards 20]
+"""
+import argparse
+import time
+from bs4 import BeautifulSoup
+from app.services.job_scraper import JobScraperService
+
+CARD_TEMPLATES = {
+    'indeed': (
+        '<div class="job_seen_beacon"><h2 class="jobTitle"><a href="/viewjob?jk={i}">Accountant {i}</a></h2>'
+        '<span class="companyName">Company {i}</span><div class="companyLocation">Johannesburg</div>'
+        '<div class="salary-snippet">R{i}0 000 per month</div><div class="job-snippet"><ul><li>Duties {i}</li></ul></div></div>'
+    ),
+    'careerjet': (
+        '<article class="job"><header><h2><a href="/jobad/{i}">Accountant {i}</a></h2></header>'
+        '<p class="company">Company {i}</p><ul class="location"><li>Johannesburg</li></ul>'
+        '<div class="desc">Duties {i}</div><footer><span class="badge badge--default">{i} days ago</span></footer></article>'
+    ),
+    'careers24': (
+        '<div class="job-card"><h3><a href="/jobs/adverts/{i}">Accountant {i}</a></h3>'
+        '<div class="company">Company {i}</div><div class="location">Johannesburg</div>'
+        '<div class="job-card__summary">Duties {i}</div></div>'
+    )
+}
+
+FILLER = (
+    '<nav><ul>' + ''.join(f'<li><a href="/nav/{n}">Link {n}</a></li>' for n in range(60)) + '</ul></nav>'
+    '<script>var tracking = {' + ','.join(f'"k{n}": {n}' for n in range(200)) + '};</script>'
+    '<aside>' + ''.join(f'<div class="filter"><input type="checkbox" id="f{n}"><label for="f{n}">Filter {n}</label></div>' for n in range(80)) + '</aside>'
+)
+
+def build_page(source: str, cards: int) -> bytes:
+    body = ''.join(CARD_TEMPLATES[source].format(i=i) for i in range(cards))
+    return f'<html><head><title>Jobs</title></head><body>{FILLER}<main>{body}</main>{FILLER}</body></html>'.encode()
+
+def available_parsers():
+    parsers = []
+    for parser in ('html.parser', 'lxml', 'html5lib'):
+        try:
+            BeautifulSoup('<p></p>', parser)
+            parsers.append(parser)
+        except Exception:
+            continue
+    return parsers
+
+def time_pages(fn, pages: int) -> float:
+    """Average CPU milliseconds per call of ``fn``"""
+    started = time.process_time()
+    for _ in range(pages):
+        fn()
+    return (time.process_time() - started) * 1000 / pages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--cards', type=int, default=20)
+    args = parser.parse_args()
+    
+    scraper = JobScraperService()
+    print(f"{'source':<10} {'parser':<12} {'full tree ms':>13} {'cards only ms':>14} {'cards':>6}")
+    
+    for source, (tag, css_class) in scraper.card_selectors.items():
+        page = build_page(source, args.cards)
+        for backend in available_parsers():
+            full = time_pages(lambda: BeautifulSoup(page, backend).find_all(tag, class_=css_class), args.pages)
+            strained = time_pages(lambda: scraper.parse_cards(source, page, parser=backend), args.pages)
+            found = len(scraper.parse_cards(source, page, parser=backend))
+            print(f"{source:<10} {backend:<12} {full:>13.2f} {strained:>14.2f} {found:>6}")
+
+if __name__ == '__main__':
+    main()
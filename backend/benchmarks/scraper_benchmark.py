@@ -0,0 +1,171 @@
+"""Offline scraper benchmark over synthetic results pages.
+
+Replays the fixture pages in ``benchmarks/fixtures/<source>/`` through
+``scrape_indeed``, ``scrape_careerjet`` and ``scrape_careers24`` with the HTTP
+layer stubbed, then reports pages/sec, jobs/sec, peak memory and the time
+spent in each stage (fetch, parse, extract, dedup).
+
+The fixtures are hand-built, not recorded from the live boards: each one
+uses the card markup the scrapers' selectors expect, padded with filler
+styles, navigation and scripts to a realistic page size. Treat the numbers
+as relative (before/after a change), not as live-site throughput, and note
+that the pages can't catch markup drift on the real boards.
+
+    python -m benchmarks.scraper_benchmark [--iterations 20] [--parser lxml] [--json out.json]
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from app.services.job_dedup import JobDeduplicator
+from app.services.job_scraper import JobScraperService
+from app.services.resilience import TokenBucket
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+class FixtureResponse:
+    """Just enough of requests.Response for the scrapers"""
+    
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+        self.ok = True
+        self.headers = {}
+
+def load_fixtures(fixture_dir: str = FIXTURE_DIR):
+    """Return {source: [page bytes, ...]} in page order"""
+    fixtures = {}
+    for source in sorted(os.listdir(fixture_dir)):
+        source_dir = os.path.join(fixture_dir, source)
+        if not os.path.isdir(source_dir):
+            continue
+        pages = sorted(name for name in os.listdir(source_dir) if name.endswith('.html'))
+        fixtures[source] = []
+        for name in pages:
+            with open(os.path.join(source_dir, name), 'rb') as f:
+                fixtures[source].append(f.read())
+    return fixtures
+
+class StageTimer:
+    def __init__(self):
+        self.totals = defaultdict(float)
+    
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - started
+        return timed
+
+def build_scraper(fixtures, timer: StageTimer, parser: str = None) -> JobScraperService:
+    """A scraper whose network, rate limits and page-skip cache are stubbed out"""
+    scraper = JobScraperService()
+    if parser:
+        scraper.html_parser = parser
+    
+    hosts = {base_url: source for source, base_url in scraper.base_urls.items()}
+    
+    def fetch(url, params, headers=None):
+        source = next(s for base, s in hosts.items() if url.startswith(base))
+        pages = fixtures[source]
+        page = 0
+        for key in ('start', 'p', 'page'):
+            if key in params:
+                page = params[key] // 10 if key == 'start' else params[key] - 1
+        return FixtureResponse(pages[page % len(pages)])
+    
+    scraper._fetch = timer.wrap('fetch', fetch)
+    scraper.parse_cards = timer.wrap('parse', scraper.parse_cards)
+    for source in scraper.sources:
+        name = f'extract_{source}'
+        setattr(scraper, name, timer.wrap('extract', getattr(scraper, name)))
+    
+    # Every iteration must really parse, and never wait on politeness limits
+    scraper.validators.get = lambda key: None
+    scraper.rate_limiters = {source: TokenBucket(rate=1e9, capacity=1e9) for source in scraper.base_urls}
+    return scraper
+
+def run(iterations: int = 20, parser: str = None, fixture_dir: str = FIXTURE_DIR) -> dict:
+    fixtures = load_fixtures(fixture_dir)
+    timer = StageTimer()
+    scraper = build_scraper(fixtures, timer, parser)
+    dedupe = timer.wrap('dedup', lambda jobs: JobDeduplicator().dedupe(jobs))
+    
+    scrapers = {
+        'indeed': scraper.scrape_indeed,
+        'careerjet': scraper.scrape_careerjet,
+        'careers24': scraper.scrape_careers24
+    }
+    
+    def replay():
+        counts = {'pages': 0, 'jobs': 0, 'unique': 0}
+        batch = []
+        for source, scrape in scrapers.items():
+            for page in range(len(fixtures.get(source, []))):
+                batch.extend(scrape('accountant', 'johannesburg', page))
+                counts['pages'] += 1
+        counts['jobs'] = len(batch)
+        counts['unique'] = len(dedupe(batch))
+        return counts
+    
+    # Peak memory from one traced pass; tracing would distort the timings
+    tracemalloc.start()
+    replay()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timer.totals.clear()
+    
+    pages = jobs = unique = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        counts = replay()
+        pages += counts['pages']
+        jobs += counts['jobs']
+        unique += counts['unique']
+    elapsed = time.perf_counter() - started
+    
+    # parse_cards runs inside extract_*, so report extraction net of parsing
+    stages = dict(timer.totals)
+    stages['extract'] = stages.get('extract', 0) - stages.get('parse', 0)
+    
+    return {
+        'parser': scraper.html_parser,
+        'iterations': iterations,
+        'pages': pages,
+        'jobs': jobs,
+        'unique_jobs': unique,
+        'seconds': round(elapsed, 4),
+        'pages_per_sec': round(pages / elapsed, 1),
+        'jobs_per_sec': round(jobs / elapsed, 1),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'stage_ms_per_page': {
+            stage: round(total * 1000 / pages, 3) for stage, total in sorted(stages.items())
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--parser', default=None, help='BeautifulSoup parser backend to benchmark')
+    parser.add_argument('--json', dest='json_path', default=None, help='Also write the results to this file')
+    args = parser.parse_args()
+    
+    result = run(args.iterations, args.parser)
+    
+    print(f"parser:        {result['parser']}")
+    print(f"pages:         {result['pages']} ({result['pages_per_sec']} pages/sec)")
+    print(f"jobs:          {result['jobs']} ({result['jobs_per_sec']} jobs/sec, {result['unique_jobs']} unique)")
+    print(f"peak memory:   {result['peak_memory_kb']} KiB")
+    for stage, ms in result['stage_ms_per_page'].items():
+        print(f"{stage + ':':<14} {ms} ms/page")
+    
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == '__main__':
+    main()
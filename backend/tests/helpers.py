@@ -0,0 +1,41 @@
+import unittest
+import os
+import tempfile
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.user import User
+
+class TestConfig:
+    TESTING = True
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JWT_SECRET_KEY = 'test-jwt-secret-key-with-enough-length'
+    SECRET_KEY = 'test-secret-key'
+
+class DatabaseTestCase(unittest.TestCase):
+    """App with a throwaway SQLite file, so background threads share the data"""
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        config = type('Config', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{self.db_path}'})
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.remove(self.db_path)
+
+    def create_user(self, email='user@example.com'):
+        user = User(email=email, password_hash='x', first_name='Jane', last_name='Doe')
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    def auth_headers(self, user=None):
+        user = user or self.create_user()
+        return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
@@ -0,0 +1,535 @@
+import unittest
+import tempfile
+import threading
+import time
+import openai
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+from app.services.ai_agent import AIAgentService
+from app.services.llm_cache import DiskLLMBackend, LLMCache
+from app.services.llm_providers import LocalProvider
+from app.services.prompt_compactor import PromptCompactor
+from app.services.model_router import LatencyTracker, ModelRouter
+from app.services.resilience import QuotaLimiter, SingleFlight
+from benchmarks.ai_benchmark import run as run_ai_benchmark
+
+def fake_completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def fake_stream(*parts):
+    return iter([SimpleNamespace(choices=[SimpleNamespace(delta={'content': part})]) for part in parts])
+
+class LLMCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backend = DiskLLMBackend(self.tmp.name, ttl=60, max_entries=3, max_bytes=1024 * 1024)
+        self.service = AIAgentService(cache=LLMCache(self.backend))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeat_call_is_served_from_cache(self):
+        """Test an identical request only reaches the model once"""
+        with mock.patch('openai.ChatCompletion.create', return_value=fake_completion('Better resume')) as create:
+            first = self.service.enhance_resume('My resume', 'Developer', 'IT')
+            second = self.service.enhance_resume('My resume', 'Developer', 'IT')
+
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(first, second)
+        stats = self.service.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_key_covers_prompt_and_parameters(self):
+        """Test different inputs or a bypass flag go to the model"""
+        with mock.patch('openai.ChatCompletion.create', return_value=fake_completion('Letter')) as create:
+            self.service.generate_cover_letter('Resume', 'Job A')
+            self.service.generate_cover_letter('Resume', 'Job B')
+            self.service.generate_cover_letter('Resume', 'Job A', use_cache=False)
+
+        self.assertEqual(create.call_count, 3)
+        self.assertEqual(self.service.cache.get_stats()['bypassed'], 1)
+
+    def test_stream_yields_chunks_and_caches_full_text(self):
+        """Test streamed output arrives in pieces and a repeat is served whole from cache"""
+        with mock.patch('openai.ChatCompletion.create', return_value=fake_stream('\n', 'Dear ', 'hiring ', 'manager')) as create:
+            chunks = list(self.service.stream('generate_cover_letter', resume='Resume', job_description='Job'))
+            repeat = list(self.service.stream('generate_cover_letter', resume='Resume', job_description='Job'))
+
+        self.assertEqual(chunks, ['Dear ', 'hiring ', 'manager'])
+        self.assertEqual(repeat, ['Dear hiring manager'])
+        self.assertEqual(create.call_count, 1)
+        self.assertTrue(create.call_args.kwargs['stream'])
+
+        # The blocking call shares the same cache entry
+        self.assertEqual(self.service.generate_cover_letter('Resume', 'Job')['cover_letter'], 'Dear hiring manager')
+
+    def test_failures_are_not_cached(self):
+        """Test an API error is returned but not stored"""
+        with mock.patch('openai.ChatCompletion.create', side_effect=Exception('rate limited')):
+            result = self.service.optimize_for_ats('Resume', ['python'])
+        self.assertFalse(result['success'])
+        self.assertEqual(self.backend.size(), 0)
+
+    def test_disk_backend_ttl_and_size_eviction(self):
+        """Test expired entries are dropped and the least recently used go first"""
+        for i in range(3):
+            self.backend.set(f'key{i}', f'value{i}')
+            time.sleep(0.01)
+        self.backend.get('key0')
+        self.backend.set('key3', 'value3')
+
+        self.assertEqual(self.backend.size(), 3)
+        self.assertIsNone(self.backend.get('key1'))
+        self.assertEqual(self.backend.get('key0'), 'value0')
+
+        self.backend.ttl = 0
+        time.sleep(0.01)
+        self.assertIsNone(self.backend.get('key3'))
+
+class BatchCoverLetterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        backend = DiskLLMBackend(self.tmp.name, ttl=60, max_entries=100, max_bytes=1024 * 1024)
+        self.service = AIAgentService(cache=LLMCache(backend))
+        self.jobs = [{'title': f'Developer {i}', 'company': f'Company {i}', 'snippet': 'Python'} for i in range(8)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_letters_stream_with_bounded_concurrency(self):
+        """Test every match gets a letter and no more than the limit run at once"""
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def create(**kwargs):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return fake_completion('Dear hiring manager')
+
+        with mock.patch('openai.ChatCompletion.create', side_effect=create):
+            results = list(self.service.generate_cover_letters('Resume', self.jobs, max_concurrency=3))
+
+        self.assertEqual(sorted(r['index'] for r in results), list(range(8)))
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertLessEqual(max(peak), 3)
+        self.assertGreater(max(peak), 1)
+
+    def test_token_budget_skips_remaining_jobs(self):
+        """Test jobs that would exceed the token budget are skipped, not sent"""
+        with mock.patch('openai.ChatCompletion.create', return_value=fake_completion('Letter')) as create:
+            results = list(self.service.generate_cover_letters('Resume', self.jobs, token_budget=2500))
+
+        sent = [r for r in results if not r.get('skipped')]
+        skipped = [r for r in results if r.get('skipped')]
+        self.assertEqual(create.call_count, len(sent))
+        self.assertTrue(sent and skipped)
+        self.assertEqual(len(sent) + len(skipped), 8)
+
+    def test_requested_budget_cannot_exceed_server_budget(self):
+        """Test a client token budget above the configured one is clamped to it"""
+        self.service.batch_token_budget = 2500
+        with mock.patch('openai.ChatCompletion.create', return_value=fake_completion('Letter')) as create:
+            results = list(self.service.generate_cover_letters('Resume', self.jobs, token_budget=10 ** 9))
+
+        self.assertTrue(any(r.get('skipped') for r in results))
+        self.assertLess(create.call_count, 8)
+
+RESUME = """Curriculum Vitae
+Jane Doe
+jane@example.com
+Summary
+Backend developer building Python APIs.
+Experience
+Acme Corp - Python developer building Flask services
+Acme Corp - Python developer building Flask services
+Maintained PostgreSQL databases and Redis caches
+Organised the office year-end function
+Skills
+Python, Flask, PostgreSQL, Redis
+Education
+BSc Computer Science, University of Cape Town
+Projects
+""" + "\n".join(f"Hobby project {i}: a mobile game about gardening" for i in range(40)) + """
+References available on request
+Page 1 of 2"""
+
+class PromptCompactorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.compactor = PromptCompactor(resume_budget=80, job_budget=30)
+
+    def test_boilerplate_and_repeats_are_removed(self):
+        """Test compaction drops filler lines even when under budget"""
+        result = self.compactor.compact_resume(RESUME, budget=10000)
+
+        self.assertNotIn('Curriculum Vitae', result['text'])
+        self.assertNotIn('References available', result['text'])
+        self.assertNotIn('Page 1 of 2', result['text'])
+        self.assertEqual(result['text'].count('Acme Corp - Python developer'), 1)
+        self.assertGreater(result['tokens_saved'], 0)
+
+    def test_resume_fits_budget_keeping_relevant_sections(self):
+        """Test optional sections go first and relevant experience is kept"""
+        result = self.compactor.compact_resume(RESUME, terms=self.compactor.terms('Python developer Flask'))
+
+        self.assertLessEqual(result['tokens'], 80)
+        self.assertIn('projects', result['dropped_sections'])
+        self.assertIn('jane@example.com', result['text'])
+        self.assertIn('Python developer building Flask services', result['text'])
+        self.assertNotIn('Hobby project', result['text'])
+        self.assertEqual(result['tokens_saved'], result['original_tokens'] - result['tokens'])
+
+    def make_service(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        return AIAgentService(
+            cache=LLMCache(DiskLLMBackend(tmp.name, ttl=60, max_entries=10, max_bytes=1024 * 1024)),
+            compactor=self.compactor
+        )
+
+    def test_service_reports_tokens_saved(self):
+        """Test AI calls send the compacted resume and report the saving"""
+        service = self.make_service()
+
+        with mock.patch('openai.ChatCompletion.create', return_value=fake_completion('Dear hiring manager')) as create:
+            result = service.generate_cover_letter(RESUME, 'Python developer to build Flask APIs', 'Acme')
+
+        prompt = create.call_args.kwargs['messages'][1]['content']
+        self.assertNotIn('Hobby project', prompt)
+        self.assertGreater(result['tokens_saved'], 0)
+        self.assertEqual(self.compactor.get_stats()['tokens_saved'], result['tokens_saved'])
+
+    def test_rewrites_keep_every_section(self):
+        """Test enhancement and ATS prompts only lose filler, since their output replaces the resume"""
+        service = self.make_service()
+
+        with mock.patch('openai.ChatCompletion.create', return_value=fake_completion('Better resume')) as create:
+            enhanced = service.enhance_resume(RESUME, 'Python developer')
+            service.optimize_for_ats(RESUME, ['python', 'flask'])
+
+        for call in create.call_args_list:
+            prompt = call.kwargs['messages'][1]['content']
+            for line in ('Jane Doe', 'Organised the office year-end function', 'BSc Computer Science',
+                         'Hobby project 0', 'Hobby project 39'):
+                self.assertIn(line, prompt)
+            self.assertNotIn('References available', prompt)
+            self.assertEqual(prompt.count('Acme Corp - Python developer'), 1)
+        self.assertGreater(enhanced['tokens_saved'], 0)
+
+class OpenAIQuotaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.limiter = QuotaLimiter(requests_per_minute=100, tokens_per_minute=100000, window=1.0)
+        self.service = AIAgentService(
+            cache=LLMCache(DiskLLMBackend(self.tmp.name, ttl=60, max_entries=10, max_bytes=1024 * 1024)),
+            limiter=self.limiter
+        )
+        self.service.retry_base = 0.01
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_limiter_holds_requests_over_quota(self):
+        """Test calls past the per-window request limit wait for the window to slide"""
+        limiter = QuotaLimiter(requests_per_minute=3, tokens_per_minute=1000, window=0.5)
+        started = time.monotonic()
+        for _ in range(4):
+            self.assertTrue(limiter.acquire(10, timeout=5))
+        self.assertGreater(time.monotonic() - started, 0.1)
+
+        exhausted = QuotaLimiter(requests_per_minute=1, tokens_per_minute=100, window=60)
+        self.assertTrue(exhausted.acquire(50))
+        self.assertFalse(exhausted.acquire(50, timeout=0.05))
+
+    def test_rate_limit_honours_retry_after(self):
+        """Test a 429 pauses the quota for Retry-After and the call is retried"""
+        error = openai.error.RateLimitError('Rate limit reached', headers={'retry-after': '0.2'})
+
+        with mock.patch('openai.ChatCompletion.create', side_effect=[error, fake_completion('Resume')]) as create:
+            started = time.monotonic()
+            result = self.service.enhance_resume('My resume')
+
+        self.assertTrue(result['success'])
+        self.assertEqual(create.call_count, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(self.limiter.get_stats()['pauses'], 1)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test persistent server errors are retried with backoff and then reported"""
+        self.service.max_attempts = 3
+        with mock.patch('openai.ChatCompletion.create', side_effect=openai.error.ServiceUnavailableError('down')) as create:
+            result = self.service.optimize_for_ats('Resume', ['python'])
+
+        self.assertFalse(result['success'])
+        self.assertEqual(create.call_count, 3)
+
+    def test_client_errors_are_not_retried(self):
+        """Test a bad request fails straight away"""
+        with mock.patch('openai.ChatCompletion.create', side_effect=openai.error.InvalidRequestError('bad', 'messages')) as create:
+            result = self.service.generate_cover_letter('Resume', 'Job')
+
+        self.assertFalse(result['success'])
+        self.assertEqual(create.call_count, 1)
+
+class LocalProviderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_backend = DiskLLMBackend(self.tmp.name, ttl=60, max_entries=100, max_bytes=1024 * 1024)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_service(self, **provider_options):
+        service = AIAgentService(
+            cache=LLMCache(self.cache_backend),
+            limiter=QuotaLimiter(requests_per_minute=1000, tokens_per_minute=10 ** 7),
+            provider=LocalProvider(seed=7, **provider_options)
+        )
+        service.retry_base = 0.001
+        return service
+
+    def test_responses_are_deterministic(self):
+        """Test the same prompt gives the same text and streaming matches it"""
+        provider = LocalProvider()
+        messages = [{'role': 'user', 'content': 'Write a cover letter'}]
+
+        first = provider.complete('gpt-4', messages, 200, 0.7)
+        second = provider.complete('gpt-4', messages, 200, 0.7)
+        other = provider.complete('gpt-4', [{'role': 'user', 'content': 'Something else'}], 200, 0.7)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first['content'], other['content'])
+        self.assertEqual(''.join(provider.stream('gpt-4', messages, 200, 0.7)).strip(), first['content'])
+        self.assertGreater(first['usage']['total_tokens'], first['usage']['prompt_tokens'])
+
+    def test_service_runs_offline_and_tracks_usage(self):
+        """Test the AI pipeline works end to end on the local provider"""
+        service = self.make_service()
+
+        result = service.enhance_resume('My resume', 'Developer')
+        letters = list(service.generate_cover_letters('My resume', [{'title': 'Dev', 'company': 'A'}] * 3,
+                                                      use_cache=False))
+
+        self.assertTrue(result['success'])
+        self.assertTrue(all(letter['success'] for letter in letters))
+        usage = service.get_usage()
+        self.assertEqual((usage['provider'], usage['requests']), ('local', 4))
+        self.assertGreater(usage['total_tokens'], 0)
+
+    def test_simulated_failures_are_retried(self):
+        """Test injected errors and rate limits go through the retry path"""
+        service = self.make_service(error_rate=0.3, rate_limit_rate=0.2)
+        service.max_attempts = 10
+
+        results = [service.enhance_resume(f'Resume {i}', use_cache=False) for i in range(10)]
+
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertGreater(service.provider.calls, 10)
+
+    def test_benchmark_reports_throughput(self):
+        """Test the offline AI benchmark runs and reports its figures"""
+        result = run_ai_benchmark(calls=6, concurrency=3, jobs=4, latency=0.01)
+
+        self.assertEqual(result['single']['succeeded'], 6)
+        self.assertEqual(result['batch']['written'], 4)
+        self.assertGreater(result['single']['calls_per_sec'], 0)
+        self.assertEqual(result['retries'], 0)
+
+class ModelRouterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.router = ModelRouter(
+            models={'premium': 'big', 'standard': 'medium', 'fast': 'small'},
+            routes={'enhance_resume': ('premium', 1.0), 'analyze_job_description': ('fast', 0.1)},
+            min_samples=3
+        )
+
+    def test_tasks_start_on_their_tier(self):
+        """Test each task goes to its configured tier until latency data says otherwise"""
+        self.assertEqual(self.router.choose('enhance_resume'), 'big')
+        self.assertEqual(self.router.choose('analyze_job_description'), 'small')
+
+        # Too few samples to judge
+        self.router.record('big', 5.0)
+        self.assertEqual(self.router.choose('enhance_resume'), 'big')
+
+    def test_slow_tier_falls_back_to_faster_one(self):
+        """Test a tier whose p95 misses the deadline is skipped"""
+        for seconds in (0.5, 2.0, 3.0, 4.0):
+            self.router.record('big', seconds)
+        for seconds in (0.2, 0.3, 0.4):
+            self.router.record('medium', seconds)
+
+        self.assertEqual(self.router.choose('enhance_resume'), 'medium')
+        self.assertEqual(self.router.get_stats()['fallbacks'], {'enhance_resume': 1})
+
+        # The fastest tier is used even if it is also too slow
+        for seconds in (0.5, 0.6, 0.7):
+            self.router.record('small', seconds)
+        self.assertEqual(self.router.choose('analyze_job_description'), 'small')
+
+    def make_timed_router(self):
+        now = [0.0]
+        router = ModelRouter(
+            models={'premium': 'big', 'standard': 'medium', 'fast': 'small'},
+            routes={'enhance_resume': ('premium', 1.0)},
+            tracker=LatencyTracker(max_age=60, clock=lambda: now[0]),
+            min_samples=3,
+            probe_interval=10
+        )
+        return router, now
+
+    def test_primary_recovers_after_window_passes(self):
+        """Test a slowdown stops counting once its samples are older than the window"""
+        router, now = self.make_timed_router()
+        for seconds in (2.0, 3.0, 4.0):
+            router.record('big', seconds)
+        self.assertEqual(router.choose('enhance_resume'), 'medium')
+
+        now[0] = 61.0
+        self.assertEqual(router.tracker.count('big'), 0)
+        self.assertEqual(router.choose('enhance_resume'), 'big')
+        self.assertNotIn('big', router.get_stats()['latency'])
+
+    def test_skipped_tier_is_probed_and_can_recover(self):
+        """Test a skipped tier still gets a periodic request and is used again once it is fast"""
+        router, now = self.make_timed_router()
+        for seconds in (2.0, 3.0, 4.0):
+            router.record('big', seconds)
+        self.assertEqual(router.choose('enhance_resume'), 'medium')
+
+        now[0] = 11.0
+        self.assertEqual(router.choose('enhance_resume'), 'big')  # probe
+        self.assertEqual(router.choose('enhance_resume'), 'medium')
+        self.assertEqual(router.get_stats()['probes'], {'big': 1})
+
+        # Fast responses (including the probe's) bring the p95 back under the deadline
+        now[0] = 45.0
+        for seconds in [0.2] * 60:
+            router.record('big', seconds)
+        self.assertEqual(router.choose('enhance_resume'), 'big')
+
+    def test_service_sends_routed_model_and_records_latency(self):
+        """Test AIAgentService calls the provider with the routed model"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        provider = LocalProvider(latency=0.01)
+        service = AIAgentService(
+            cache=LLMCache(DiskLLMBackend(tmp.name, ttl=60, max_entries=10, max_bytes=1024 * 1024)),
+            provider=provider,
+            router=self.router
+        )
+
+        with mock.patch.object(provider, 'complete', wraps=provider.complete) as complete:
+            service.analyze_job_description('Accountant needed')
+            service.enhance_resume('My resume')
+
+        self.assertEqual([call.args[0] for call in complete.call_args_list], ['small', 'big'])
+        latency = self.router.get_stats()['latency']
+        self.assertEqual((latency['small']['samples'], latency['big']['samples']), (1, 1))
+        self.assertGreaterEqual(latency['big']['p50_ms'], 10)
+
+class JobAnalysisParsingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.provider = LocalProvider()
+        self.service = AIAgentService(
+            cache=LLMCache(DiskLLMBackend(self.tmp.name, ttl=60, max_entries=10, max_bytes=1024 * 1024)),
+            provider=self.provider
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def respond(self, content):
+        return mock.patch.object(self.provider, 'complete', return_value={'content': content, 'usage': {
+            'prompt_tokens': 10, 'completion_tokens': 10, 'total_tokens': 20}})
+
+    def test_fenced_json_is_parsed_into_fields(self):
+        """Test a JSON answer (even in a code fence) comes back as a structured dict"""
+        content = '```json\n{"required_skills": ["IFRS", "Excel"], "experience_level": "senior", "extra": 1}\n```'
+        with self.respond(content):
+            result = self.service.analyze_job_description('Senior accountant, IFRS and Excel', use_cache=False)
+
+        self.assertTrue(result['structured'])
+        self.assertEqual(result['analysis']['required_skills'], ['IFRS', 'Excel'])
+        self.assertEqual(result['analysis']['experience_level'], 'senior')
+        self.assertIsNone(result['analysis']['salary_range'])
+        self.assertNotIn('extra', result['analysis'])
+
+    def test_free_text_is_flagged_unstructured(self):
+        """Test a non-JSON answer is returned as a summary and marked unstructured"""
+        with self.respond('Needs IFRS experience; mid-level role.'):
+            result = self.service.analyze_job_description('Accountant', use_cache=False)
+
+        self.assertTrue(result['success'])
+        self.assertFalse(result['structured'])
+        self.assertEqual(result['analysis'], {'summary': 'Needs IFRS experience; mid-level role.'})
+
+class SingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.provider = LocalProvider(latency=0.2)
+        self.service = AIAgentService(
+            cache=LLMCache(DiskLLMBackend(self.tmp.name, ttl=60, max_entries=10, max_bytes=1024 * 1024)),
+            provider=self.provider,
+            single_flight=SingleFlight()
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def call_concurrently(self, fn, count):
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            return list(pool.map(lambda _: fn(), range(count)))
+
+    def test_identical_requests_share_one_call(self):
+        """Test concurrent identical requests reach the provider once and get the same result"""
+        results = self.call_concurrently(
+            lambda: self.service.enhance_resume('My resume', 'Developer', use_cache=False), 5)
+
+        self.assertEqual(self.provider.calls, 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        stats = self.service.single_flight.get_stats()
+        self.assertEqual((stats['calls'], stats['coalesced'], stats['in_flight']), (1, 4, 0))
+
+    def test_different_requests_are_not_coalesced(self):
+        """Test requests with different prompts each get their own call"""
+        jobs = iter(['Job A', 'Job B', 'Job C'])
+        lock = threading.Lock()
+
+        def letter():
+            with lock:
+                job = next(jobs)
+            return self.service.generate_cover_letter('Resume', job, use_cache=False)
+
+        self.call_concurrently(letter, 3)
+        self.assertEqual(self.provider.calls, 3)
+
+    def test_failure_reaches_every_waiter(self):
+        """Test a failed shared call fails all its waiters, and a later call tries again"""
+        flight = SingleFlight()
+        calls = []
+
+        def failing():
+            calls.append(1)
+            time.sleep(0.1)
+            raise ValueError('boom')
+
+        def call():
+            try:
+                return flight.do('key', failing)
+            except ValueError as e:
+                return str(e)
+
+        self.assertEqual(self.call_concurrently(call, 4), ['boom'] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.do('key', lambda: 'ok'), 'ok')
+
+if __name__ == '__main__':
+    unittest.main()
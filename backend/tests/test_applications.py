@@ -0,0 +1,237 @@
+import unittest
+import json
+import os
+import time
+from unittest import mock
+from app import db, task_queue
+from app.models.application import JobApplication
+from app.services.job_analysis import JobAnalysisService
+import app.routes.ai_processing as ai_routes
+import app.routes.applications as applications_routes
+from tests.helpers import DatabaseTestCase
+
+def sse_events(response):
+    """(event, data) pairs from a Server-Sent Events body"""
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+class ApplicationTestCase(DatabaseTestCase):
+    """A signed-in user with one application to process"""
+
+    def setUp(self):
+        super().setUp()
+        user = self.create_user()
+        self.headers = self.auth_headers(user)
+
+        self.application = JobApplication(
+            user_id=user.id,
+            original_resume='Accountant with IFRS and payroll experience',
+            job_title='Accountant',
+            target_region='gauteng'
+        )
+        db.session.add(self.application)
+        db.session.commit()
+
+class SharedServiceTestCase(unittest.TestCase):
+    def test_blueprints_share_one_ai_service(self):
+        """Test quota, cache, latency samples and usage are shared by every route and the pipeline"""
+        self.assertIs(applications_routes.ai_service, ai_routes.ai_service)
+        self.assertIs(applications_routes.pipeline.ai_service, ai_routes.job_analysis.ai_service)
+
+class CoverLetterRouteTestCase(ApplicationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.application.set_job_matches([
+            {'title': f'Accountant {i}', 'company': 'Acme', 'url': f'https://example.com/jobs/{i}', 'source': 'indeed'}
+            for i in range(3)
+        ])
+        db.session.commit()
+        self.url = f'/api/applications/cover-letters/{self.application.id}'
+
+    def test_invalid_limits_are_rejected_before_streaming(self):
+        """Test non-integer or non-positive limits get a 400 instead of a broken stream"""
+        for body in ({'max_concurrency': 'lots'}, {'token_budget': 'all'}, {'token_budget': 0}):
+            response = self.client.post(self.url, headers=self.headers, json=body)
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_over_budget_request_is_clamped(self):
+        """Test a token budget above the server's is clamped to the server budget"""
+        service = applications_routes.ai_service
+        letter = {'success': True, 'cover_letter': 'Dear hiring manager', 'tokens_saved': 0}
+
+        with mock.patch.object(service, 'batch_token_budget', 1), \
+                mock.patch.object(service, 'generate_cover_letter', return_value=letter) as generate:
+            response = self.client.post(self.url, headers=self.headers,
+                                        json={'token_budget': '1000000', 'max_concurrency': '2'})
+            events = sse_events(response)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(generate.call_count, 0)
+        self.assertTrue(all(data['skipped'] for event, data in events if event == 'letter'))
+        self.assertEqual(events[-1][1]['written'], 0)
+
+class ProcessRouteTestCase(ApplicationTestCase):
+    """POST /process answers 202 at once and the in-process queue runs the pipeline"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/applications/process/{self.application.id}'
+        self.jobs = [
+            {'title': 'Accountant', 'company': 'Acme', 'location': 'Johannesburg',
+             'url': 'https://example.com/jobs/1', 'source': 'indeed', 'snippet': 'IFRS and payroll'},
+            {'title': 'Driver', 'company': 'Acme', 'location': 'Johannesburg',
+             'url': 'https://example.com/jobs/2', 'source': 'indeed', 'snippet': 'Code 10 licence'}
+        ]
+        patches = [
+            mock.patch.dict(os.environ, {'JOB_ANALYSIS_EAGER': '0'}),
+            mock.patch.object(applications_routes.ai_service, 'enhance_resume',
+                              return_value={'success': True, 'enhanced_resume': 'Enhanced resume'}),
+            mock.patch.object(applications_routes.job_scraper, 'search_jobs', return_value=self.jobs)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def process(self):
+        """Start processing and poll the status URL until the task settles"""
+        response = self.client.post(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json['task_id'])
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            # Requests share the test's app context, so drop what the session saw last time
+            db.session.expire_all()
+            status = self.client.get(response.json['status_url'], headers=self.headers).json
+            if status['task'] and status['task']['state'] in ('finished', 'failed'):
+                return response.json, status
+            time.sleep(0.02)
+        self.fail('Processing did not finish')
+
+    def test_pipeline_runs_to_completion(self):
+        """Test a processed application is completed with ranked matches and an enhanced resume"""
+        started, status = self.process()
+
+        self.assertEqual(status['task']['id'], started['task_id'])
+        self.assertEqual(status['task']['state'], 'finished')
+        self.assertEqual(status['task']['result']['jobs_found'], 2)
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['application']['matches_found'], 2)
+        self.assertEqual(status['application']['job_matches'][0]['title'], 'Accountant')
+
+        db.session.expire_all()
+        application = db.session.get(JobApplication, self.application.id)
+        self.assertEqual(application.enhanced_resume, 'Enhanced resume')
+        self.assertIsNotNone(application.completed_at)
+
+    def test_matched_postings_are_scheduled_for_analysis(self):
+        """Test a completed application queues analysis for exactly its matched postings"""
+        scheduled = []
+        with mock.patch.object(JobAnalysisService, 'schedule',
+                               side_effect=lambda jobs: scheduled.extend(job.url for job in jobs) or []):
+            self.process()
+
+        self.assertEqual(sorted(scheduled), [job['url'] for job in self.jobs])
+
+    def test_analysis_scheduling_failure_keeps_application_completed(self):
+        """Test a failed enqueue for eager analysis doesn't fail an application that completed"""
+        with mock.patch.object(JobAnalysisService, 'schedule', side_effect=ConnectionError('redis down')), \
+                mock.patch('builtins.print'):
+            started, status = self.process()
+
+        self.assertEqual(status['task']['state'], 'finished')
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['application']['matches_found'], 2)
+
+    def test_failed_search_marks_application_failed(self):
+        """Test a failing search fails the task and application but keeps the enhanced resume"""
+        applications_routes.job_scraper.search_jobs.side_effect = RuntimeError('board offline')
+
+        with mock.patch('builtins.print'):
+            started, status = self.process()
+
+        self.assertEqual(status['task']['state'], 'failed')
+        self.assertIn('board offline', status['task']['error'])
+        self.assertEqual(status['status'], 'failed')
+        self.assertNotIn('application', status)
+
+        db.session.expire_all()
+        application = db.session.get(JobApplication, self.application.id)
+        self.assertEqual(application.enhanced_resume, 'Enhanced resume')
+        self.assertEqual(application.get_job_matches(), [])
+
+class StaleTaskTestCase(ApplicationTestCase):
+    """A task whose worker died stops blocking its application"""
+
+    def setUp(self):
+        super().setUp()
+        for name, value in (('stale_after', 0.1), ('heartbeat_interval', 0.02)):
+            patch = mock.patch.object(task_queue, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_dead_running_task_can_be_reprocessed(self):
+        """Test a running task without heartbeats is failed and the route enqueues a new one"""
+        task_queue.update('dead-task', name='process_application', state='running')
+        self.application.status = 'processing'
+        self.application.task_id = 'dead-task'
+        db.session.commit()
+        time.sleep(0.15)
+
+        with mock.patch.object(task_queue, 'enqueue', return_value='new-task') as enqueue:
+            response = self.client.post(f'/api/applications/process/{self.application.id}', headers=self.headers)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json['task_id'], 'new-task')
+        enqueue.assert_called_once()
+        self.assertEqual(task_queue.get_status('dead-task')['state'], 'failed')
+
+    def test_status_reports_dead_task_as_failed(self):
+        """Test polling a dead task marks its application failed instead of processing forever"""
+        task_queue.update('dead-task', name='process_application', state='running')
+        self.application.status = 'processing'
+        self.application.task_id = 'dead-task'
+        db.session.commit()
+        time.sleep(0.15)
+
+        status = self.client.get(f'/api/applications/process/{self.application.id}/status',
+                                 headers=self.headers).json
+
+        self.assertEqual(status['task']['state'], 'failed')
+        self.assertEqual(status['status'], 'failed')
+
+    def test_heartbeat_keeps_a_slow_task_alive(self):
+        """Test a live task outlasting the stale limit keeps beating and finishes normally"""
+        task_queue.register('slow', lambda payload, progress: time.sleep(0.4) or 'done')
+        self.addCleanup(task_queue.handlers.pop, 'slow')
+        task_id = task_queue.enqueue('slow', {})
+
+        states = set()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            status = task_queue.get_status(task_id)
+            states.add(status['state'])
+            if status['state'] in ('finished', 'failed'):
+                break
+            time.sleep(0.02)
+
+        self.assertNotIn('failed', states)
+        self.assertEqual((status['state'], status['result']), ('finished', 'done'))
+
+    def test_abandoned_queued_task_is_skipped(self):
+        """Test a queued task given up on is not run when a worker picks it up late"""
+        handler = mock.Mock()
+        task_queue.register('late', handler)
+        self.addCleanup(task_queue.handlers.pop, 'late')
+        task_queue.update('late-task', name='late', state='queued')
+        time.sleep(0.15)
+
+        self.assertEqual(task_queue.get_status('late-task')['state'], 'failed')
+        task_queue._run('late-task', 'late', {})
+        handler.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
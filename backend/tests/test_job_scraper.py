@@ -0,0 +1,429 @@
+import unittest
+import time
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from app.services.job_scraper import JobScraperService
+from app.services.scrape_cache import ScrapeCache
+from app.services.job_crawler import JobCrawler
+from app.services.job_dedup import JobDeduplicator
+from app.services.job_ranker import JobRanker
+from app.services.resilience import CircuitBreaker
+from benchmarks.scraper_benchmark import StageTimer, build_scraper, load_fixtures, run
+
+def make_job(title, company, source):
+    return {
+        'title': title,
+        'company': company,
+        'location': 'johannesburg',
+        'url': '',
+        'source': source,
+        'date_posted': 'Recent',
+        'salary': 'Not specified'
+    }
+
+class JobScraperTestCase(unittest.TestCase):
+    def setUp(self):
+        self.scraper = JobScraperService()
+
+    def test_concurrent_search_takes_slowest_source(self):
+        """Test sources are scraped in parallel, not back to back"""
+        def slow_source(name):
+            def scrape(keywords, location, page=0):
+                time.sleep(0.3)
+                return [make_job(f'{name} developer', name, name)] if page == 0 else []
+            return scrape
+
+        self.scraper.sources = {name: slow_source(name) for name in ('indeed', 'careerjet', 'careers24')}
+
+        started = time.monotonic()
+        jobs = self.scraper.search_jobs('developer', 'gauteng', 'johannesburg')
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(len(jobs), 3)
+        self.assertLess(elapsed, 0.8)
+
+    def test_search_returns_sources_that_met_deadline(self):
+        """Test a board that misses its deadline is dropped"""
+        def fast(keywords, location, page=0):
+            return [make_job('Accountant', 'ABC', 'indeed')]
+
+        def hung(keywords, location, page=0):
+            time.sleep(1)
+            return [make_job('Bookkeeper', 'XYZ', 'careerjet')]
+
+        self.scraper.source_timeout = 0.2
+        self.scraper.sources = {'indeed': fast, 'careerjet': hung}
+
+        jobs = self.scraper.search_jobs('accountant', 'gauteng', 'johannesburg')
+
+        self.assertEqual([job['source'] for job in jobs], ['indeed'])
+
+    def test_stream_stops_fetching_at_limit(self):
+        """Test deeper pages are only fetched when more unique jobs are needed"""
+        fetched = []
+
+        def paged(keywords, location, page=0):
+            fetched.append(page)
+            return [make_job(f'Role {page}-{i}', f'Company {page}-{i}', 'indeed') for i in range(5)]
+
+        self.scraper.sources = {'indeed': paged}
+
+        shallow = self.scraper.search_jobs('developer', 'gauteng', 'johannesburg', limit=5)
+        self.assertEqual(len(shallow), 5)
+        self.assertEqual(fetched, [0])
+
+        deep = self.scraper.search_jobs('developer', 'gauteng', 'pretoria', limit=12, max_pages=5)
+        self.assertEqual(len(deep), 12)
+        self.assertEqual(fetched, [0, 0, 1, 2])
+
+    def test_region_search_covers_every_town(self):
+        """Test a search without a town fans out over the region's towns"""
+        searched = []
+
+        def by_town(keywords, location, page=0):
+            searched.append(location)
+            return [make_job('Nurse', f'Clinic {location}', 'indeed')]
+
+        self.scraper.sources = {'indeed': by_town}
+
+        jobs = self.scraper.search_jobs('nurse', 'free_state', limit=50)
+
+        towns = self.scraper.get_region_towns('free_state')
+        self.assertEqual(sorted(searched), sorted(towns))
+        self.assertEqual(len(jobs), len(towns))
+
+    def test_region_lookup_ignores_case(self):
+        """Test KwaZulu-Natal resolves however the client capitalises its key"""
+        towns = self.scraper.get_region_towns('kwazulu_natal')
+        self.assertIn('durban', towns)
+        self.assertEqual(self.scraper.get_region_towns('kwaZulu_natal'), towns)
+        self.assertEqual(self.scraper.get_region_towns('KWAZULU_NATAL'), towns)
+
+        searched = []
+
+        def by_town(keywords, location, page=0):
+            searched.append(location)
+            return []
+
+        self.scraper.sources = {'indeed': by_town}
+        self.scraper.search_jobs('nurse', 'kwaZulu_natal', limit=50)
+        self.assertEqual(sorted(searched), sorted(towns))
+
+    def test_region_search_is_bounded_by_deadline(self):
+        """Test slow towns don't hold up a region-wide search"""
+        def slow_town(keywords, location, page=0):
+            if location != 'bloemfontein':
+                time.sleep(1)
+            return [make_job('Nurse', f'Clinic {location}', 'indeed')]
+
+        self.scraper.sources = {'indeed': slow_town}
+
+        started = time.monotonic()
+        jobs = list(self.scraper.stream_region_jobs('nurse', 'free_state', timeout=0.3))
+
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual([job['company'] for job in jobs], ['Clinic bloemfontein'])
+
+    def test_parse_cards_only_builds_job_cards(self):
+        """Test the restricted parse returns just the cards and their contents"""
+        page = (
+            b'<html><body><nav><div class="menu">Menu</div></nav>'
+            b'<div class="job_seen_beacon"><h2 class="jobTitle"><a href="/viewjob?jk=1">Accountant</a></h2>'
+            b'<span class="companyName">ABC</span></div>'
+            b'<div class="job_seen_beacon"><h2 class="jobTitle">Clerk</h2><span class="companyName">XYZ</span></div>'
+            b'</body></html>'
+        )
+
+        for parser in ('html.parser', self.scraper.html_parser):
+            cards = self.scraper.parse_cards('indeed', page, parser=parser)
+            self.assertEqual(len(cards), 2)
+            self.assertEqual(cards[0].find('span', class_='companyName').text, 'ABC')
+
+    def test_unchanged_page_is_not_parsed_again(self):
+        """Test conditional GET replays the previous jobs on a 304"""
+        page = (
+            b'<article class="job"><h2><a href="/jobad/1">Accountant</a></h2>'
+            b'<p class="company">ABC</p></article>'
+        )
+        ok = mock.Mock(status_code=200, ok=True, content=page, headers={'ETag': '"v1"'})
+        not_modified = mock.Mock(status_code=304, ok=False, content=b'', headers={})
+        self.scraper._fetch = mock.Mock(side_effect=[ok, not_modified])
+
+        with mock.patch.object(self.scraper, 'extract_careerjet', wraps=self.scraper.extract_careerjet) as extract:
+            first = self.scraper.scrape_careerjet('accountant', 'johannesburg')
+            second = self.scraper.scrape_careerjet('accountant', 'johannesburg')
+
+        self.assertEqual(first, second)
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(self.scraper._fetch.call_args[0][2], {'If-None-Match': '"v1"'})
+
+    def test_boards_share_pooled_session(self):
+        """Test each board has its own pooled adapter on one keep-alive session"""
+        adapters = {self.scraper.session.get_adapter(url) for url in self.scraper.base_urls.values()}
+
+        self.assertEqual(len(adapters), len(self.scraper.base_urls))
+        self.assertEqual(self.scraper.session.headers['Connection'], 'keep-alive')
+        self.assertIn('gzip', self.scraper.session.headers['Accept-Encoding'])
+
+    def test_retries_ignore_retry_after(self):
+        """Test a board's Retry-After can't stall a worker; the circuit breaker backs off instead"""
+        for url in self.scraper.base_urls.values():
+            retries = self.scraper.session.get_adapter(url).max_retries
+            self.assertFalse(retries.respect_retry_after_header)
+            self.assertIn(503, retries.status_forcelist)
+
+class ScrapeCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = ScrapeCache(ttls={'indeed': 60}, stale_ttl=60)
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        return [make_job('Accountant', f'ABC {self.calls}', 'indeed')]
+
+    def test_keys_are_normalised(self):
+        """Test case, whitespace and town spelling map to one key"""
+        self.assertEqual(
+            self.cache.make_key('indeed', '  Senior   Accountant ', 'Kempton Park'),
+            self.cache.make_key('indeed', 'senior accountant', 'kempton-park')
+        )
+
+    def test_second_lookup_is_a_hit(self):
+        """Test a repeated query is served without scraping again"""
+        self.cache.get_or_fetch('indeed', 'accountant', 'johannesburg', self.fetch)
+        jobs = self.cache.get_or_fetch('indeed', 'Accountant', 'Johannesburg', self.fetch)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(jobs[0]['company'], 'ABC 1')
+        self.assertEqual(self.cache.get_stats()['hits'], 1)
+
+    def test_stale_entry_served_while_refreshing(self):
+        """Test a stale hit returns immediately and refreshes in the background"""
+        self.cache.get_or_fetch('indeed', 'accountant', 'johannesburg', self.fetch)
+        key = self.cache.make_key('indeed', 'accountant', 'johannesburg')
+        self.cache.local.get(key)['stored_at'] -= 90
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            jobs = self.cache.get_or_fetch('indeed', 'accountant', 'johannesburg', self.fetch, executor)
+
+        self.assertEqual(jobs[0]['company'], 'ABC 1')
+        self.assertEqual(self.calls, 2)
+        self.assertTrue(self.cache.get('indeed', 'accountant', 'johannesburg')['fresh'])
+
+class JobDeduplicatorTestCase(unittest.TestCase):
+    def test_cross_posted_variants_collapse(self):
+        """Test company suffixes, punctuation and title noise don't defeat dedup"""
+        jobs = [
+            make_job('Senior Accountant', 'ABC (Pty) Ltd', 'indeed'),
+            make_job('Senior Accountant!', 'ABC Pty Ltd.', 'careerjet'),
+            make_job('URGENT: Senior Accountant', 'abc', 'careers24')
+        ]
+
+        self.assertEqual(len(JobDeduplicator().dedupe(jobs)), 1)
+
+    def test_distinct_roles_are_kept(self):
+        """Test different roles or employers are not merged"""
+        jobs = [
+            make_job('Senior Accountant', 'ABC', 'indeed'),
+            make_job('Accountant', 'ABC', 'indeed'),
+            make_job('Senior Accountant', 'XYZ', 'indeed')
+        ]
+
+        self.assertEqual(len(JobDeduplicator().dedupe(jobs)), 3)
+
+    def test_threshold_is_configurable(self):
+        """Test a lower threshold merges looser matches"""
+        jobs = [
+            make_job('Senior Financial Accountant', 'ABC', 'indeed'),
+            make_job('Financial Accountant', 'ABC', 'careerjet')
+        ]
+
+        self.assertEqual(len(JobDeduplicator(threshold=0.9).dedupe(jobs)), 2)
+        self.assertEqual(len(JobDeduplicator(threshold=0.6).dedupe(jobs)), 1)
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, cool_off=0.1, max_cool_off=1)
+
+    def test_opens_after_repeated_failures(self):
+        """Test the breaker opens at the threshold and refuses calls"""
+        self.breaker.record_failure('indeed')
+        self.assertTrue(self.breaker.allow('indeed'))
+
+        self.breaker.record_failure('indeed')
+        self.assertEqual(self.breaker.state('indeed'), 'open')
+        self.assertFalse(self.breaker.allow('indeed'))
+
+    def test_rate_limit_opens_immediately(self):
+        """Test a 429 trips the breaker on the first occurrence"""
+        self.breaker.record_failure('careerjet', rate_limited=True)
+        self.assertFalse(self.breaker.allow('careerjet'))
+
+    def test_half_open_allows_single_probe(self):
+        """Test one probe goes through after the cool-off and success closes the breaker"""
+        self.breaker.record_failure('careers24', rate_limited=True)
+        time.sleep(0.15)
+
+        self.assertTrue(self.breaker.allow('careers24'))
+        self.assertFalse(self.breaker.allow('careers24'))
+
+        self.breaker.record_success('careers24')
+        self.assertEqual(self.breaker.state('careers24'), 'closed')
+
+    def test_open_source_is_skipped_without_request(self):
+        """Test a scraper doesn't touch the network while its breaker is open"""
+        scraper = JobScraperService()
+        scraper._fetch = mock.Mock()
+        scraper.breaker.record_failure('indeed', rate_limited=True)
+
+        self.assertEqual(scraper.scrape_indeed('accountant', 'johannesburg'), [])
+        scraper._fetch.assert_not_called()
+
+    def open_half_way(self, scraper):
+        scraper.breaker = CircuitBreaker(failure_threshold=1, cool_off=0.05, max_cool_off=1)
+        scraper.breaker.record_failure('indeed', rate_limited=True)
+        time.sleep(0.1)
+        self.assertEqual(scraper.breaker.state('indeed'), 'half_open')
+
+    def test_rate_limit_timeout_leaves_probe_unclaimed(self):
+        """Test a half-open source whose rate limit times out can still be probed later"""
+        scraper = JobScraperService()
+        scraper._fetch = mock.Mock()
+        self.open_half_way(scraper)
+
+        with mock.patch.object(scraper.rate_limiters['indeed'], 'acquire', return_value=False):
+            self.assertEqual(scraper.scrape_indeed('accountant', 'johannesburg'), [])
+
+        scraper._fetch.assert_not_called()
+        self.assertTrue(scraper.breaker.allow('indeed'))
+
+    def test_unexpected_fetch_error_settles_probe(self):
+        """Test a probe that fails with a non-HTTP error re-opens the breaker instead of hanging"""
+        scraper = JobScraperService()
+        scraper._fetch = mock.Mock(side_effect=ValueError('bad response'))
+        self.open_half_way(scraper)
+
+        with mock.patch('builtins.print'):
+            self.assertEqual(scraper.scrape_indeed('accountant', 'johannesburg'), [])
+
+        self.assertEqual(scraper.breaker.state('indeed'), 'open')
+        time.sleep(0.15)
+        self.assertTrue(scraper.breaker.allow('indeed'))
+
+class FixtureScrapeTestCase(unittest.TestCase):
+    """Selector regression tests against the synthetic benchmark pages"""
+
+    def setUp(self):
+        self.fixtures = load_fixtures()
+        self.scraper = build_scraper(self.fixtures, StageTimer())
+
+    def test_every_fixture_page_yields_complete_jobs(self):
+        """Test each board's recorded pages still extract full job cards"""
+        for source in ('indeed', 'careerjet', 'careers24'):
+            for page in range(len(self.fixtures[source])):
+                jobs = self.scraper.sources[source]('accountant', 'johannesburg', page)
+                self.assertEqual(len(jobs), 15, f'{source} page {page + 1}')
+                for job in jobs:
+                    self.assertTrue(job['title'] and job['company'], f'{source} page {page + 1}')
+                    self.assertTrue(job['url'].startswith(self.scraper.base_urls[source]))
+
+    def test_benchmark_reports_all_stages(self):
+        """Test the benchmark runs offline and reports every stage"""
+        result = run(iterations=1)
+
+        self.assertEqual(result['jobs'], 90)
+        self.assertEqual(set(result['stage_ms_per_page']), {'fetch', 'parse', 'extract', 'dedup'})
+
+class JobCrawlerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.scraper = JobScraperService()
+        self.scraper.sources = {
+            'indeed': lambda keywords, location, page=0: [make_job(keywords, 'ABC', 'indeed')]
+        }
+        self.crawler = JobCrawler(self.scraper, titles=['accountant', 'nurse'], top_n=1, delay=0)
+
+    def test_crawl_warms_cache_for_region(self):
+        """Test a crawl pass fills the cache for every town in the region"""
+        stats = self.crawler.run_once(['free_state'])
+        towns = self.scraper.get_region_towns('free_state')
+
+        self.assertEqual(stats['scraped'], len(towns))
+        self.assertIsNotNone(self.scraper.cache.get('indeed', 'Accountant', towns[0].title()))
+
+    def test_crawl_warms_every_page_a_search_walks(self):
+        """Test every results page a town search walks is cached; only the empty end page is fetched live"""
+        fetched = []
+
+        def two_pages(keywords, location, page=0):
+            fetched.append(page)
+            return [make_job(f'{keywords} {page}', 'ABC', 'indeed')] if page < 2 else []
+
+        self.scraper.sources = {'indeed': two_pages}
+        self.scraper.max_pages = 3
+        self.crawler.titles = ['accountant']
+        stats = self.crawler.run_once(['free_state'])
+
+        towns = self.scraper.get_region_towns('free_state')
+        self.assertEqual(stats['jobs'], 2 * len(towns))
+        self.assertEqual(sorted(set(fetched)), [0, 1, 2])
+
+        fetched.clear()
+        jobs = self.scraper.search_jobs('accountant', 'free_state', towns[0], limit=10)
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(fetched, [2])
+
+    def test_fresh_targets_are_skipped(self):
+        """Test a second pass doesn't re-scrape fresh results"""
+        self.crawler.run_once(['free_state'])
+        stats = self.crawler.run_once(['free_state'])
+
+        self.assertEqual(stats['scraped'], 0)
+        self.assertEqual(stats['skipped'], stats['targets'])
+
+class JobRankerTestCase(unittest.TestCase):
+    RESUME = """Senior Accountant
+Eight years in audit, IFRS financial reporting and month-end close.
+Skills: IFRS, Excel, SAP, payroll, reconciliations"""
+
+    def setUp(self):
+        self.ranker = JobRanker()
+
+    def test_relevant_jobs_rank_first(self):
+        jobs = [
+            dict(make_job('Chef', 'Grill House', 'indeed'), snippet='Kitchen prep and menu planning'),
+            dict(make_job('Junior Accountant', 'Beta Retail', 'indeed'), snippet='Reconciliations and payroll'),
+            dict(make_job('Financial Reporting Accountant', 'Acme', 'careers24'), snippet='IFRS reporting, audit, SAP'),
+            dict(make_job('Driver', 'Fast Freight', 'pnet'), snippet='Code 10 licence')
+        ]
+
+        ranked = self.ranker.rank(self.RESUME, jobs, 'Accountant')
+
+        self.assertEqual([job['title'] for job in ranked[:2]],
+                         ['Financial Reporting Accountant', 'Junior Accountant'])
+        self.assertEqual(ranked[0]['relevance_score'], 1.0)
+        self.assertEqual(ranked[-1]['relevance_score'], 0.0)
+        scores = [job['relevance_score'] for job in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_ties_keep_scrape_order_and_empty_input(self):
+        jobs = [make_job(f'Driver {i}', 'Fast Freight', 'pnet') for i in range(3)]
+        ranked = self.ranker.rank(self.RESUME, jobs)
+        self.assertEqual([job['title'] for job in ranked], ['Driver 0', 'Driver 1', 'Driver 2'])
+        self.assertEqual(self.ranker.rank(self.RESUME, []), [])
+
+    def test_ranks_hundreds_of_jobs_quickly(self):
+        jobs = [
+            dict(make_job(f'{role} {i}', f'Company {i}', 'indeed'), snippet=f'{role} role with Excel and SAP')
+            for i, role in enumerate(['Accountant', 'Chef', 'Driver', 'Cashier'] * 125)
+        ]
+
+        started = time.perf_counter()
+        ranked = self.ranker.rank(self.RESUME, jobs, 'Accountant')
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(ranked), 500)
+        self.assertTrue(all(job['title'].startswith('Accountant') for job in ranked[:125]))
+        self.assertLess(elapsed, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
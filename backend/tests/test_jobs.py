@@ -0,0 +1,229 @@
+import unittest
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+from sqlalchemy import inspect, text
+from app import db
+from app.commands import persist_crawled_jobs, upgrade_schema
+from app.models.job import Job, JobAnalysis
+from app.services.job_analysis import JobAnalysisService
+from app.services.job_index import JobSearchIndex
+import app.services.job_analysis as job_analysis_module
+import app.routes.applications as applications_routes
+from tests.helpers import DatabaseTestCase
+
+def make_posting(title, url, **fields):
+    return dict({
+        'title': title,
+        'company': 'Acme',
+        'location': 'Johannesburg',
+        'url': url,
+        'source': 'indeed',
+        'snippet': f'{title} role',
+        'scraped_at': datetime.utcnow().isoformat()
+    }, **fields)
+
+class JobUpsertTestCase(DatabaseTestCase):
+    def test_postings_collapse_and_keep_input_order(self):
+        """Test repeated postings share one row and rows come back in input order"""
+        rows = Job.upsert_many([
+            make_posting('Accountant', 'https://example.com/jobs/1'),
+            make_posting('Clerk', 'https://example.com/jobs/2'),
+            make_posting('Accountant again', 'https://EXAMPLE.com/jobs/1/')
+        ], region='Gauteng')
+        db.session.commit()
+
+        self.assertEqual([row.title for row in rows], ['Accountant', 'Clerk'])
+        self.assertEqual(Job.query.count(), 2)
+        self.assertEqual(rows[0].region, 'gauteng')
+
+    def test_existing_row_is_updated_not_reinserted(self):
+        """Test a posting another writer already inserted is refreshed instead of failing"""
+        posting = make_posting('Accountant', 'https://example.com/jobs/1')
+        first_seen = datetime(2024, 1, 1)
+        with db.engine.begin() as connection:
+            connection.execute(Job.__table__.insert().values(
+                id=Job.make_id(posting), source='indeed', url=posting['url'], title='Old title',
+                region='gauteng', snippet='Old snippet', first_seen_at=first_seen
+            ))
+
+        refreshed = dict(posting, title='Senior Accountant')
+        del refreshed['snippet']
+        rows = Job.upsert_many([refreshed])
+        db.session.commit()
+
+        self.assertEqual(Job.query.count(), 1)
+        row = db.session.get(Job, Job.make_id(posting))
+        self.assertIs(rows[0], row)
+        self.assertEqual(row.title, 'Senior Accountant')
+        self.assertEqual(row.snippet, 'Old snippet')
+        self.assertEqual(row.region, 'gauteng')
+        self.assertEqual(row.first_seen_at, first_seen)
+
+    def test_failed_crawl_save_does_not_break_later_regions(self):
+        """Test a region whose save fails is rolled back so the next region still saves"""
+        with mock.patch('builtins.print'):
+            persist_crawled_jobs('gauteng', [make_posting(None, 'https://example.com/jobs/1')])
+        persist_crawled_jobs('western_cape', [make_posting('Accountant', 'https://example.com/jobs/2')])
+
+        self.assertEqual([job.region for job in Job.query.all()], ['western_cape'])
+
+class SchemaUpgradeTestCase(DatabaseTestCase):
+    def test_existing_database_gains_new_tables_and_columns(self):
+        """Test a database from before jobs and task_id is upgraded in place, keeping its rows"""
+        db.drop_all()
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE job_applications (id VARCHAR(36) PRIMARY KEY, user_id VARCHAR(36) NOT NULL, "
+                "original_resume TEXT NOT NULL, target_region VARCHAR(100), status VARCHAR(50))"
+            ))
+            connection.execute(text(
+                "INSERT INTO job_applications (id, user_id, original_resume, status) "
+                "VALUES ('app-1', 'user-1', 'Resume', 'completed')"
+            ))
+
+        upgrade_schema()
+        upgrade_schema()
+
+        inspector = inspect(db.engine)
+        self.assertTrue({'jobs', 'application_jobs', 'job_analyses'} <= set(inspector.get_table_names()))
+        self.assertIn('task_id', {column['name'] for column in inspector.get_columns('job_applications')})
+        with db.engine.connect() as connection:
+            rows = connection.execute(text("SELECT id, task_id FROM job_applications")).all()
+        self.assertEqual([tuple(row) for row in rows], [('app-1', None)])
+
+class JobSearchIndexTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = JobSearchIndex(min_hits=2)
+        self.index.ensure_index()
+        Job.upsert_many([
+            make_posting('Bookkeeper', 'https://example.com/jobs/1', snippet='Works with an accountant on payroll'),
+            make_posting('Senior Accountant', 'https://example.com/jobs/2'),
+            make_posting('Accountant', 'https://example.com/jobs/3', location='Durban'),
+            make_posting('Driver', 'https://example.com/jobs/4')
+        ], region='Gauteng')
+        Job.upsert_many([make_posting('Accountant', 'https://example.com/jobs/5')], region='Western_Cape')
+        db.session.commit()
+
+    def test_written_postings_are_indexed_and_ranked(self):
+        """Test new and updated rows are searchable and title matches outrank snippet matches"""
+        titles = [job['title'] for job in self.index.search('accountant', 'gauteng')]
+        self.assertEqual(set(titles[:2]), {'Senior Accountant', 'Accountant'})
+        self.assertEqual(titles[2:], ['Bookkeeper'])
+
+        Job.upsert_many([make_posting('Payroll Officer', 'https://example.com/jobs/4')], region='Gauteng')
+        db.session.commit()
+        self.assertEqual([job['title'] for job in self.index.search('payroll officer', 'gauteng')],
+                         ['Payroll Officer'])
+        self.assertEqual(self.index.search('driver', 'gauteng'), [])
+
+    def test_town_and_freshness_filters(self):
+        """Test a town narrows matches by location and stale postings are left out"""
+        self.assertEqual([job['title'] for job in self.index.search('accountant', 'gauteng', 'durban')],
+                         ['Accountant'])
+
+        Job.query.filter_by(title='Senior Accountant').update({'scraped_at': datetime.utcnow() - timedelta(days=3)})
+        db.session.commit()
+        titles = [job['title'] for job in self.index.search('accountant', 'gauteng')]
+        self.assertNotIn('Senior Accountant', titles)
+
+    def test_search_route_falls_back_to_live_scrape(self):
+        """Test a thin index triggers a live scrape whose postings are saved for the next search"""
+        headers = self.auth_headers()
+        live = [make_posting('Data Analyst', f'https://example.com/live/{i}') for i in range(3)]
+
+        with mock.patch.object(applications_routes, 'job_index', self.index), \
+                mock.patch.object(applications_routes.job_scraper, 'search_jobs', return_value=live) as search:
+            first = self.client.get('/api/applications/jobs/search?q=data+analyst&region=gauteng', headers=headers)
+            second = self.client.get('/api/applications/jobs/search?q=data+analyst&region=gauteng', headers=headers)
+            indexed = self.client.get('/api/applications/jobs/search?q=accountant&region=gauteng', headers=headers)
+
+        self.assertEqual(first.json['source'], 'live')
+        self.assertEqual(len(first.json['jobs']), 3)
+        self.assertEqual(second.json['source'], 'index')
+        self.assertEqual(len(second.json['jobs']), 3)
+        self.assertEqual(indexed.json['source'], 'index')
+        self.assertEqual(search.call_count, 1)
+
+class JobAnalysisTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ai_service = mock.Mock()
+        self.ai_service.analyze_job_description.return_value = {
+            'success': True,
+            'analysis': {'summary': 'Accounting role', 'skills': ['IFRS']},
+            'structured': True,
+            'tokens_saved': 0
+        }
+        self.service = JobAnalysisService(self.ai_service)
+
+    def test_analysis_is_reused_for_the_same_description(self):
+        """Test a description is sent to the model once, including re-pasted copies"""
+        first = self.service.analyze('Accountant\nAcme, Johannesburg: IFRS & payroll')
+        again = self.service.analyze('  ACCOUNTANT acme johannesburg -- ifrs payroll ')
+
+        self.assertFalse(first['cached'])
+        self.assertTrue(again['cached'])
+        self.assertEqual(again['analysis_id'], first['analysis_id'])
+        self.assertEqual(again['analysis'], first['analysis'])
+        self.assertEqual(self.ai_service.analyze_job_description.call_count, 1)
+        self.assertEqual(self.service.get_stats()['hit_rate'], 0.5)
+
+        self.service.analyze('Accountant\nAcme, Johannesburg: IFRS & payroll', refresh=True)
+        self.assertEqual(self.ai_service.analyze_job_description.call_count, 2)
+
+    def test_unstructured_analysis_is_not_stored(self):
+        """Test an analysis that isn't valid JSON is returned but asked for again next time"""
+        self.ai_service.analyze_job_description.return_value = {
+            'success': True, 'analysis': {'summary': 'free text'}, 'structured': False, 'tokens_saved': 0
+        }
+        self.service.analyze('Accountant')
+        self.service.analyze('Accountant')
+
+        self.assertEqual(JobAnalysis.query.count(), 0)
+        self.assertEqual(self.ai_service.analyze_job_description.call_count, 2)
+
+    def test_task_links_postings_and_shares_their_analysis(self):
+        """Test the background task analyses each distinct posting text once"""
+        rows = Job.upsert_many([
+            make_posting('Accountant', 'https://example.com/jobs/1'),
+            make_posting('Accountant', 'https://example.com/jobs/2'),
+            make_posting('Clerk', 'https://example.com/jobs/3')
+        ], region='gauteng')
+        db.session.commit()
+
+        summary = self.service.run_task({'job_ids': [row.id for row in rows]}, lambda stage, percent: None)
+
+        self.assertEqual(summary, {'jobs': 3, 'analysed': 2, 'shared': 1, 'failed': 0})
+        self.assertTrue(all(JobAnalysisService.is_analysed(row) for row in rows))
+        self.assertEqual(self.ai_service.analyze_job_description.call_count, 2)
+
+    def test_schedule_batches_postings_without_analysis(self):
+        """Test only unanalysed postings are queued, in batches, and the switch turns it off"""
+        rows = Job.upsert_many([make_posting(f'Clerk {i}', f'https://example.com/jobs/{i}') for i in range(5)])
+        db.session.commit()
+        self.service.analyze_job(rows[0])
+
+        with mock.patch.object(job_analysis_module.task_queue, 'enqueue', side_effect=['a', 'b']) as enqueue, \
+                mock.patch.dict(os.environ, {'JOB_ANALYSIS_EAGER': '1', 'JOB_ANALYSIS_BATCH_SIZE': '3'}):
+            self.assertEqual(JobAnalysisService.schedule(rows), ['a', 'b'])
+
+        self.assertEqual([call.args[1]['job_ids'] for call in enqueue.call_args_list],
+                         [[row.id for row in rows[1:4]], [rows[4].id]])
+
+        with mock.patch.object(job_analysis_module.task_queue, 'enqueue') as enqueue, \
+                mock.patch.dict(os.environ, {'JOB_ANALYSIS_EAGER': '0'}):
+            self.assertEqual(JobAnalysisService.schedule(rows), [])
+        enqueue.assert_not_called()
+
+    def test_crawled_postings_are_not_scheduled(self):
+        """Test the crawler saves postings without queueing an analysis for each one"""
+        with mock.patch.object(JobAnalysisService, 'schedule') as schedule:
+            persist_crawled_jobs('gauteng', [make_posting('Accountant', 'https://example.com/jobs/1')])
+
+        self.assertEqual(Job.query.count(), 1)
+        schedule.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import time
+from app.services.stage_graph import Stage, StageGraph
+
+def sleeper(seconds, value):
+    def run(inputs):
+        time.sleep(seconds)
+        return value
+    return run
+
+class StageGraphTestCase(unittest.TestCase):
+    def test_independent_stages_run_concurrently(self):
+        """Test two independent stages take about as long as the slower one, not their sum"""
+        graph = StageGraph([
+            Stage('enhance', sleeper(0.3, 'resume')),
+            Stage('search', sleeper(0.3, ['job'])),
+            Stage('rank', lambda inputs: inputs['search'] * 2, after=('search',))
+        ])
+
+        started = time.monotonic()
+        outcomes = graph.run()
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(outcomes['enhance']['value'], 'resume')
+        self.assertEqual(outcomes['rank']['value'], ['job', 'job'])
+        self.assertTrue(all(outcome['status'] == 'finished' for outcome in outcomes.values()))
+
+    def test_failure_skips_dependents_and_keeps_other_results(self):
+        """Test a failed stage skips what follows it while other branches finish"""
+        def fail(inputs):
+            raise RuntimeError('board offline')
+
+        finished = []
+        outcomes = StageGraph([
+            Stage('enhance', sleeper(0.05, 'resume')),
+            Stage('search', fail),
+            Stage('rank', lambda inputs: inputs['search'], after=('search',))
+        ]).run(lambda name, outcome: finished.append(name))
+
+        self.assertEqual(outcomes['enhance']['value'], 'resume')
+        self.assertEqual((outcomes['search']['status'], outcomes['search']['error']), ('failed', 'board offline'))
+        self.assertEqual((outcomes['rank']['status'], outcomes['rank']['error']), ('skipped', 'search failed'))
+        self.assertEqual(sorted(finished), ['enhance', 'rank', 'search'])
+
+    def test_slow_stage_times_out(self):
+        """Test a stage past its timeout is abandoned without holding up the graph"""
+        started = time.monotonic()
+        outcomes = StageGraph([
+            Stage('enhance', sleeper(1.0, 'late'), timeout=0.1),
+            Stage('search', sleeper(0.05, ['job']))
+        ]).run()
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(outcomes['enhance']['status'], 'timed_out')
+        self.assertIsNone(outcomes['enhance']['value'])
+        self.assertEqual(outcomes['search']['value'], ['job'])
+
+    def test_unknown_dependency_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StageGraph([Stage('rank', lambda inputs: None, after=('search',))])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 -- Initialize database for JobApp Automator
 -- This script creates the initial database structure
+-- It only runs on a fresh volume; existing databases are upgraded by `flask upgrade-db`
+-- (run on backend start), which must be kept in step with new tables and columns here
 
 -- Enable UUID extension if using PostgreSQL
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
@@ -45,6 +47,7 @@ CREATE TABLE IF NOT EXISTS job_applications (
     job_title VARCHAR(200),
     industry VARCHAR(100),
     status VARCHAR(50) DEFAULT 'pending',
+    task_id VARCHAR(36),
     applications_sent INTEGER DEFAULT 0,
     matches_found INTEGER DEFAULT 0,
     job_matches JSONB,
@@ -52,6 +55,47 @@ CREATE TABLE IF NOT EXISTS job_applications (
     completed_at TIMESTAMP WITH TIME ZONE
 );
 
+-- Shared AI analyses of job descriptions, keyed by sha256 of the normalised text
+CREATE TABLE IF NOT EXISTS job_analyses (
+    id VARCHAR(64) PRIMARY KEY,
+    analysis TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Scraped job postings, one row per canonical posting (source + URL)
+CREATE TABLE IF NOT EXISTS jobs (
+    id VARCHAR(40) PRIMARY KEY,
+    source VARCHAR(50) NOT NULL,
+    url VARCHAR(1000),
+    title VARCHAR(300) NOT NULL,
+    company VARCHAR(300),
+    location VARCHAR(200),
+    region VARCHAR(100),
+    salary VARCHAR(200),
+    date_posted VARCHAR(100),
+    snippet TEXT,
+    scraped_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    first_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    analysis_id VARCHAR(64) REFERENCES job_analyses(id) ON DELETE SET NULL,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(company, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(snippet, '')), 'D')
+    ) STORED
+);
+
+-- Job matches per application
+CREATE TABLE IF NOT EXISTS application_jobs (
+    application_id UUID NOT NULL REFERENCES job_applications(id) ON DELETE CASCADE,
+    job_id VARCHAR(40) NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL DEFAULT 0,
+    relevance_score REAL,
+    cover_letter TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (application_id, job_id)
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_verified ON users(is_verified);
@@ -60,6 +104,13 @@ CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status);
 CREATE INDEX IF NOT EXISTS idx_applications_user_id ON job_applications(user_id);
 CREATE INDEX IF NOT EXISTS idx_applications_status ON job_applications(status);
 CREATE INDEX IF NOT EXISTS idx_applications_region ON job_applications(target_region);
+CREATE INDEX IF NOT EXISTS idx_jobs_source ON jobs(source);
+CREATE INDEX IF NOT EXISTS idx_jobs_region ON jobs(region);
+CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company);
+CREATE INDEX IF NOT EXISTS idx_jobs_scraped_at ON jobs(scraped_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_analysis_id ON jobs(analysis_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_application_jobs_job_id ON application_jobs(job_id);
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
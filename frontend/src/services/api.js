@@ -40,6 +40,46 @@ api.interceptors.response.use(
     }
 );
 
+// POST and read a Server-Sent Events response, calling onEvent(name, data) per event.
+// Resolves with the data of the final `done` event.
+const streamEvents = async (path, body, onEvent) => {
+    const response = await fetch(`${API_BASE_URL}${path}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            Authorization: `Bearer ${localStorage.getItem('token')}`,
+        },
+        body: JSON.stringify(body),
+    });
+
+    if (!response.ok) {
+        throw new Error((await response.json()).error || `Request failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+            const name = raw.match(/^event: (.*)$/m)?.[1] || 'message';
+            const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || 'null');
+            if (name === 'error') throw new Error(data?.error || 'Stream failed');
+            if (name === 'done') result = data;
+            onEvent?.(name, data);
+        }
+    }
+
+    return result;
+};
+
 // Auth API
 export const authAPI = {
     login: (credentials) => api.post('/api/auth/login', credentials),
@@ -59,6 +99,9 @@ export const paymentsAPI = {
 export const applicationsAPI = {
     create: (applicationData) => api.post('/api/applications/create', applicationData),
     process: (applicationId) => api.post(`/api/applications/process/${applicationId}`),
+    getProcessStatus: (applicationId) => api.get(`/api/applications/process/${applicationId}/status`),
+    generateCoverLetters: (applicationId, onLetter, options = {}) =>
+        streamEvents(`/api/applications/cover-letters/${applicationId}`, options, onLetter),
     getHistory: () => api.get('/api/applications/history'),
     getRegions: () => api.get('/api/applications/regions'),
 };
@@ -68,6 +111,10 @@ export const aiAPI = {
     enhanceResume: (data) => api.post('/api/ai/enhance-resume', data),
     generateCoverLetter: (data) => api.post('/api/ai/generate-cover-letter', data),
     optimizeATS: (data) => api.post('/api/ai/optimize-ats', data),
+    // Streaming variants: onEvent('token', { text }) per chunk, resolve with the `done` payload
+    streamEnhanceResume: (data, onEvent) => streamEvents('/api/ai/enhance-resume?stream=sse', data, onEvent),
+    streamCoverLetter: (data, onEvent) => streamEvents('/api/ai/generate-cover-letter?stream=sse', data, onEvent),
+    streamOptimizeATS: (data, onEvent) => streamEvents('/api/ai/optimize-ats?stream=sse', data, onEvent),
     processDocument: (formData) => api.post('/api/ai/process-document', formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
     }),